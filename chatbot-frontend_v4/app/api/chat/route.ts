@@ -12,7 +12,8 @@ export async function POST(request: NextRequest) {
     // Substitua pela URL do seu backend real
     const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000"
 
-    const response = await fetch(`${BACKEND_URL}/responder`, {
+    // Endpoint em streaming (Server-Sent Events): os tokens chegam à medida que são gerados
+    const response = await fetch(`${BACKEND_URL}/responder/stream`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -20,37 +21,57 @@ export async function POST(request: NextRequest) {
       body: JSON.stringify({ pergunta }),
     })
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       throw new Error(`Backend retornou status ${response.status}`)
     }
 
-    const responseText = await response.text()
-
-    // Se a resposta for JSON, extrair apenas o valor da string
-    try {
-      const jsonResponse = JSON.parse(responseText)
-      // Se for um objeto com uma propriedade string, retornar apenas o valor
-      if (typeof jsonResponse === "object" && jsonResponse !== null) {
-        const firstValue = Object.values(jsonResponse)[0]
-        if (typeof firstValue === "string") {
-          return new NextResponse(firstValue, {
-            headers: { "Content-Type": "text/plain" },
-          })
+    // Converte os eventos SSE (`data: {"token": ...}`) em texto simples, repassado em partes ao navegador
+    const decoder = new TextDecoder()
+    const encoder = new TextEncoder()
+    const reader = response.body.getReader()
+
+    const stream = new ReadableStream({
+      async start(controller) {
+        let buffer = ""
+        let evento: string | null = null
+
+        try {
+          while (true) {
+            const { done, value } = await reader.read()
+            if (done) break
+
+            buffer += decoder.decode(value, { stream: true })
+            const linhas = buffer.split("\n")
+            buffer = linhas.pop() ?? ""
+
+            for (const linha of linhas) {
+              if (linha.startsWith("event: ")) {
+                evento = linha.slice("event: ".length)
+              } else if (linha.startsWith("data: ")) {
+                const dados = JSON.parse(linha.slice("data: ".length))
+                if (evento === "erro") {
+                  throw new Error(dados.erro)
+                }
+                if (evento === null && typeof dados.token === "string") {
+                  controller.enqueue(encoder.encode(dados.token))
+                }
+                evento = null
+              }
+            }
+          }
+          controller.close()
+        } catch (error) {
+          console.error("Erro no streaming:", error)
+          controller.error(error)
         }
-      }
-      // Se for uma string direta no JSON, retornar ela
-      if (typeof jsonResponse === "string") {
-        return new NextResponse(jsonResponse, {
-          headers: { "Content-Type": "text/plain" },
-        })
-      }
-    } catch {
-      // Se não for JSON válido, tratar como texto simples
-    }
+      },
+      cancel() {
+        reader.cancel()
+      },
+    })
 
-    // Retornar como texto simples
-    return new NextResponse(responseText, {
-      headers: { "Content-Type": "text/plain" },
+    return new NextResponse(stream, {
+      headers: { "Content-Type": "text/plain; charset=utf-8", "Cache-Control": "no-cache" },
     })
   } catch (error) {
     console.error("Erro na API:", error)
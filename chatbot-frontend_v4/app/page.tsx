@@ -58,16 +58,30 @@ export default function ChatbotPage() {
         throw new Error("Erro na comunicação com o servidor")
       }
 
-      const data = await response.text()
-
+      // A resposta chega em partes (streaming); a mensagem do bot é atualizada a cada parte
       const botMessage: Message = {
         id: (Date.now() + 1).toString(),
-        text: data,
+        text: "",
         isUser: false,
         timestamp: new Date(),
       }
 
-      setMessages((prev) => [...prev, botMessage])
+      const reader = response.body!.getReader()
+      const decoder = new TextDecoder()
+      let texto = ""
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        texto += decoder.decode(value, { stream: true })
+        const parcial = texto
+        setMessages((prev) =>
+          prev.some((message) => message.id === botMessage.id)
+            ? prev.map((message) => (message.id === botMessage.id ? { ...message, text: parcial } : message))
+            : [...prev, { ...botMessage, text: parcial }],
+        )
+      }
     } catch (error) {
       const errorMessage: Message = {
         id: (Date.now() + 1).toString(),
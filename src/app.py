@@ -1,35 +1,249 @@
+import asyncio
+import json
+import os
+import time
+
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
+# O .env é carregado antes dos componentes, que leem a configuração do ambiente
+load_dotenv()
+
 # Framework para API
 import uvicorn
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from components.agent import *
+from components import agent
+from components.agent import aresponder, aresponder_lote, aresponder_stream, obter_cache_respostas
+from components.agrupador import AgrupadorPerguntas
+from components.perfil_rag import PerfilRequisicao, metricas_rag
 
-load_dotenv()
-
-app = FastAPI(
-    title='API de Análise de Autores com RAG',
-    description='Use esta API para fazer perguntas sobre a base de autores e suas descrições do Web Site https://quotes.toscrape.com.',
-    version='1.0.0'
-)
+rotas = APIRouter()
 
 # Modelo de dados para a requisição da API
 class PerguntaRequest(BaseModel):
     pergunta: str
+    # Inclui na resposta o perfil da pergunta (tempo por etapa, documentos e tokens)
+    debug: bool = False
+
+
+class LimiteEmVoo:
+    '''
+    Limita quantas perguntas são processadas ao mesmo tempo.
+    Até `max_fila` requisições aguardam uma vaga por no máximo `espera` segundos;
+    acima disso a API responde 429 (backpressure) em vez de acumular trabalho.
+    '''
+
+    def __init__(self, max_em_voo: int, max_fila: int, espera: float):
+        self._semaforo = asyncio.Semaphore(max_em_voo)
+        self.maximo = max_em_voo
+        self.max_fila = max_fila
+        self.espera = espera
+        self.aguardando = 0
+
+    def _ocupado(self) -> HTTPException:
+        return HTTPException(status_code=429, detail='Servidor ocupado, tente novamente.', headers={'Retry-After': '1'})
+
+    async def adquirir(self):
+        if self._semaforo.locked() and self.aguardando >= self.max_fila:
+            raise self._ocupado()
+
+        self.aguardando += 1
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), timeout=self.espera)
+        except asyncio.TimeoutError:
+            raise self._ocupado()
+        finally:
+            self.aguardando -= 1
 
-@app.post('/responder', summary='Responde a uma pergunta com base no Autores do Web Site https://quotes.toscrape.com')
-async def responder_pergunta(request: PerguntaRequest):
+    def liberar(self):
+        self._semaforo.release()
+
+    @property
+    def livres(self) -> int:
+        return self._semaforo._value
+
+
+limite_em_voo = LimiteEmVoo(
+    max_em_voo=int(os.getenv('RESPONDER_MAX_EM_VOO', '8')),
+    max_fila=int(os.getenv('RESPONDER_MAX_FILA', '64')),
+    espera=float(os.getenv('RESPONDER_ESPERA_FILA', '10'))
+)
+
+# Micro-batching: perguntas que chegam dentro da janela são respondidas em lote.
+# RESPONDER_JANELA_LOTE=0 desativa o agrupamento.
+_janela_lote = float(os.getenv('RESPONDER_JANELA_LOTE', '0.01'))
+agrupador = AgrupadorPerguntas(
+    aresponder_lote,
+    janela=_janela_lote,
+    max_lote=int(os.getenv('RESPONDER_MAX_LOTE', '8'))
+) if _janela_lote > 0 else None
+
+
+@rotas.post('/responder', summary='Responde a uma pergunta com base no Autores do Web Site https://quotes.toscrape.com')
+async def responder_pergunta(request: PerguntaRequest, response: Response):
     '''
     Recebe uma pergunta e retorna uma resposta gerada pelo sistema RAG.
+    O tempo de cada etapa vai no cabeçalho `Server-Timing` (e no campo
+    `perfil`, com `debug`); o agregado fica em /metrics.
     '''
     print(f'Recebida pergunta: {request.pergunta}')
-    resposta = cadeia_rag.invoke(request.pergunta)
+    perfil = PerfilRequisicao()
+    with perfil.medir('fila'):
+        await limite_em_voo.adquirir()
+    # Caminho assíncrono da cadeia: o event loop continua livre durante a
+    # recuperação e a chamada ao LLM. Perguntas repetidas saem do cache de respostas.
+    try:
+        if agrupador is not None:
+            resposta = await agrupador.submeter(request.pergunta, perfil)
+        else:
+            resposta = await aresponder(request.pergunta, perfil)
+    except Exception:
+        metricas_rag.registrar(perfil, erro=True)
+        raise
+    finally:
+        limite_em_voo.liberar()
+    metricas_rag.registrar(perfil)
     print(f'Resposta gerada: {resposta}')
+
+    response.headers.update(perfil.cabecalhos())
+    if request.debug:
+        return {'resposta': resposta, 'perfil': perfil.resumo()}
     return {'resposta': resposta}
 
 
+class RespostaEventos(StreamingResponse):
+    '''
+    StreamingResponse que chama `ao_encerrar` quando o envio termina, de
+    qualquer forma. Se o cliente desconectar antes do primeiro pedaço, o
+    gerador nem chega a rodar e o `finally` dele nunca é executado; a vaga
+    reservada pela rota é liberada aqui.
+    '''
+
+    def __init__(self, conteudo, ao_encerrar, **kwargs):
+        super().__init__(conteudo, **kwargs)
+        self.ao_encerrar = ao_encerrar
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ao_encerrar()
+
+
+def _evento_sse(dados, evento=None):
+    linhas = f'event: {evento}\n' if evento else ''
+    return f'{linhas}data: {json.dumps(dados, ensure_ascii=False)}\n\n'
+
+
+@rotas.post('/responder/stream', summary='Responde a uma pergunta em streaming (Server-Sent Events)')
+async def responder_pergunta_stream(request: PerguntaRequest):
+    '''
+    Mesma resposta de /responder, enviada token a token como eventos SSE:
+    `data: {"token": ...}` para cada pedaço e, ao final, um evento `fim` com o
+    tempo até o primeiro token e o tempo total (em segundos) e, com `debug`,
+    o perfil da pergunta.
+    '''
+    print(f'Recebida pergunta (stream): {request.pergunta}')
+    perfil = PerfilRequisicao()
+    # A vaga é reservada antes de iniciar a resposta, para que o 429 ainda possa ser enviado
+    with perfil.medir('fila'):
+        await limite_em_voo.adquirir()
+    concluida = False
+
+    async def eventos():
+        nonlocal concluida
+        inicio = time.perf_counter()
+        primeiro_token = None
+        try:
+            async for pedaco in aresponder_stream(request.pergunta, perfil):
+                if primeiro_token is None:
+                    primeiro_token = time.perf_counter() - inicio
+                yield _evento_sse({'token': pedaco})
+            fim = {'primeiro_token': primeiro_token, 'total': time.perf_counter() - inicio}
+            if request.debug:
+                fim['perfil'] = perfil.resumo()
+            yield _evento_sse(fim, 'fim')
+            concluida = True
+        except Exception as erro:
+            print(f'Erro durante o streaming: {erro}')
+            yield _evento_sse({'erro': 'Erro ao gerar a resposta.'}, 'erro')
+
+    def encerrar():
+        # Respostas interrompidas (desconexão do cliente) também contam como erro
+        limite_em_voo.liberar()
+        metricas_rag.registrar(perfil, erro=not concluida)
+
+    return RespostaEventos(
+        eventos(),
+        ao_encerrar=encerrar,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@rotas.get('/cache/estatisticas', summary='Acertos e falhas do cache de respostas')
+async def estatisticas_cache():
+    cache = await asyncio.to_thread(obter_cache_respostas)
+    return cache.metricas() if cache is not None else {'ativo': False}
+
+
+@rotas.get('/metrics', summary='Métricas do worker no formato do Prometheus', response_class=PlainTextResponse)
+async def metricas():
+    '''
+    Histogramas de latência por etapa (fila, cache, embedding, recuperação,
+    prompt, LLM, parse e total), acertos do cache, documentos e tokens.
+    '''
+    return PlainTextResponse(metricas_rag.prometheus(), media_type='text/plain; version=0.0.4')
+
+
+@rotas.get('/pronto', summary='Prontidão: índice vetorial e cadeia RAG carregados')
+async def prontidao(request: Request):
+    '''
+    200 quando o worker terminou a inicialização; 503 enquanto ela está em
+    andamento ou se falhou (com o erro no corpo).
+    '''
+    tarefa = getattr(request.app.state, 'inicializacao', None)
+    if agent.pronto():
+        return {'pronto': True}
+    if tarefa is not None and tarefa.done() and tarefa.exception() is not None:
+        return JSONResponse(status_code=503, content={'pronto': False, 'erro': str(tarefa.exception())})
+    return JSONResponse(status_code=503, content={'pronto': False, 'estado': 'inicializando'})
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    # Cada worker se inicializa depois do fork, em segundo plano: o servidor já
+    # aceita conexões (e responde a /pronto) enquanto o índice persistido é aberto
+    app.state.inicializacao = asyncio.create_task(asyncio.to_thread(agent.inicializar))
+    yield
+    if not app.state.inicializacao.done():
+        app.state.inicializacao.cancel()
+    if agrupador is not None:
+        await agrupador.encerrar()
+
+
+def criar_app() -> FastAPI:
+    '''
+    Fábrica da aplicação (também usável com `uvicorn --factory app:criar_app`).
+    Nada pesado acontece na importação: índice, recuperador e LLM são
+    preparados no lifespan de cada worker.
+    '''
+    app = FastAPI(
+        title='API de Análise de Autores com RAG',
+        description='Use esta API para fazer perguntas sobre a base de autores e suas descrições do Web Site https://quotes.toscrape.com.',
+        version='1.0.0',
+        lifespan=ciclo_de_vida
+    )
+    app.include_router(rotas)
+    return app
+
+
+app = criar_app()
+
+
 if __name__ == '__main__':
     print('Iniciando servidor da API...')    
     uvicorn.run(app, host='0.0.0.0', port=8000)
@@ -0,0 +1,105 @@
+'''
+Benchmark offline do cache de respostas (`components/cache_respostas.py`).
+
+Responde a uma sequência de perguntas com repetição (distribuição de Zipf
+sobre os autores, com variações de maiúsculas e pontuação) usando o LLM e o
+embedder simulados, e compara a latência de acertos e falhas do cache.
+Ao final reconstrói o índice com um autor a mais e confere que o cache foi
+invalidado.
+
+    $ cd src/
+    $ python -m benchmarks.bench_cache_respostas --perguntas 500 --latencia-llm 0.2
+'''
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+_temporario = tempfile.TemporaryDirectory()
+
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-offline')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+os.environ.setdefault('EMBEDDINGS_MODELO', 'falso')
+os.environ.setdefault('LLM_MODELO', 'falso')
+os.environ.setdefault('INDICE_VETORIAL_DIR', os.path.join(_temporario.name, 'indice'))
+os.environ.setdefault('EMBEDDINGS_CACHE_DIR', os.path.join(_temporario.name, 'cache_embeddings'))
+
+from benchmarks.dados_sinteticos import gerar_csv_autores, nome_autor  # noqa: E402
+
+VARIACOES = ['Quando nasceu {}?', 'quando nasceu {}', 'QUANDO NASCEU {} ?', 'Quando  nasceu {}.']
+
+
+def gerar_perguntas(total: int, autores: int, semente: int = 7):
+    rnd = random.Random(semente)
+    pesos = [1 / (i + 1) for i in range(autores)]
+    escolhidos = rnd.choices(range(autores), weights=pesos, k=total)
+    return [rnd.choice(VARIACOES).format(nome_autor(i)) for i in escolhidos]
+
+
+async def responder_todas(agent, perguntas):
+    tempos = []
+    for pergunta in perguntas:
+        inicio = time.perf_counter()
+        await agent.aresponder(pergunta)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do cache de respostas')
+    parser.add_argument('--perguntas', type=int, default=500)
+    parser.add_argument('--autores', type=int, default=200)
+    parser.add_argument('--latencia-llm', type=float, default=0.2, help='latência simulada do LLM (s)')
+    args = parser.parse_args()
+
+    os.environ['LLM_FALSO_LATENCIA'] = str(args.latencia_llm)
+    os.environ['RESPOSTAS_CACHE'] = '1'
+    csv_autores = gerar_csv_autores(os.path.join(_temporario.name, 'autores.csv'), args.autores)
+    os.environ['AUTHOR_CSV'] = csv_autores
+
+    from components import agent
+    logging.getLogger().setLevel(logging.WARNING)
+
+    agent.obter_vectorstore()
+    cache = agent.obter_cache_respostas()
+    perguntas = gerar_perguntas(args.perguntas, args.autores)
+
+    tempos = asyncio.run(responder_todas(agent, perguntas))
+    metricas = cache.metricas()
+    chamadas_llm = agent.llm.chamadas
+    acertos = [t for t in tempos if t < args.latencia_llm / 2]
+    falhas = [t for t in tempos if t >= args.latencia_llm / 2]
+
+    print(f'{len(perguntas)} perguntas sobre {args.autores} autores, LLM simulado com {args.latencia_llm}s')
+    print(f'acertos exatos {metricas["exatos"]}, semânticos {metricas["semanticos"]}, '
+          f'falhas {metricas["falhas"]} (taxa de acerto {metricas["taxa_acerto"]:.1%})')
+    print(f'chamadas ao LLM: {chamadas_llm} (sem cache seriam {len(perguntas)})')
+    if acertos:
+        print(f'latência de acerto: p50 {statistics.median(acertos) * 1000:.3f} ms')
+    if falhas:
+        print(f'latência de falha:  p50 {statistics.median(falhas) * 1000:.1f} ms')
+    print(f'tempo total: {sum(tempos):.2f}s (sem cache ~{len(perguntas) * statistics.median(falhas or tempos):.2f}s)')
+
+    if chamadas_llm != metricas['falhas']:
+        print('ERRO: o número de chamadas ao LLM difere do número de falhas do cache')
+        sys.exit(1)
+
+    # Reindexação com um autor a mais: o cache deve ser esvaziado
+    itens_antes = len(cache)
+    gerar_csv_autores(csv_autores, args.autores + 1)
+    agent.reconstruir_indice(csv_autores)
+    asyncio.run(responder_todas(agent, perguntas[:1]))
+    print(f'após reindexar: {itens_antes} -> {len(cache)} itens no cache, '
+          f'{cache.metricas()["invalidacoes"]} invalidação(ões)')
+    if len(cache) != 1:
+        print('ERRO: o cache não foi invalidado após a reconstrução do índice')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
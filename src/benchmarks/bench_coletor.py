@@ -0,0 +1,110 @@
+'''
+Benchmark do coletor contra o servidor local de `servidor_fixture`:
+
+* raspagem sequencial de autores x raspagem concorrente;
+* duas passadas (citações + autores) x passada única de `raspagem_unificada`;
+* primeira raspagem x nova raspagem de um site inalterado usando o `CacheHttp`;
+* onde o tempo da passada única é gasto (`MetricasColeta`): busca, parse,
+  escrita e espera, com p50/p95 de cada etapa.
+
+Uso:
+
+    $ cd src/
+    $ python -m benchmarks.bench_coletor --autores 50 --citacoes 200 --latencia 0.02
+'''
+import argparse
+import logging
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'components'))
+
+import coletor  # noqa: E402
+from benchmarks.servidor_fixture import ServidorFixture  # noqa: E402
+
+
+def medir(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da raspagem de autores')
+    parser.add_argument('--autores', type=int, default=50)
+    parser.add_argument('--citacoes', type=int, default=200)
+    parser.add_argument('--latencia', type=float, default=0.02)
+    parser.add_argument('--max-por-host', type=int, default=8)
+    parser.add_argument('--taxa', type=float, default=200.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with ServidorFixture(latencia=args.latencia, autores=args.autores, citacoes=args.citacoes) as servidor:
+        sequencial, t_seq = medir(coletor.raspagem_page_author, servidor.url, delay=0)
+
+        requisicoes_antes = servidor.requisicoes
+        concorrente, t_conc = medir(
+            coletor.raspagem_page_author_concorrente, servidor.url,
+            max_por_host=args.max_por_host, taxa=args.taxa
+        )
+        citacoes, t_cit = medir(coletor.raspagem_quotes_toscrape, servidor.url)
+        requisicoes_duas_passadas = servidor.requisicoes - requisicoes_antes
+
+        citacoes_unificada: list = []
+        autores_unificada: list = []
+        metricas = coletor.MetricasColeta()
+        requisicoes_antes = servidor.requisicoes
+        contadores, t_unif = medir(
+            coletor.raspagem_unificada, servidor.url, citacoes_unificada.append, autores_unificada.append,
+            max_por_host=args.max_por_host, taxa=args.taxa, metricas=metricas
+        )
+        requisicoes_unificada = servidor.requisicoes - requisicoes_antes
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            cache = coletor.CacheHttp(str(Path(diretorio) / 'cache.sqlite'))
+            _, t_fria = medir(
+                coletor.raspagem_unificada, servidor.url, [].append, [].append,
+                max_por_host=args.max_por_host, taxa=args.taxa, cache=cache
+            )
+            citacoes_cache: list = []
+            contadores_cache, t_quente = medir(
+                coletor.raspagem_unificada, servidor.url, citacoes_cache.append, [].append,
+                max_por_host=args.max_por_host, taxa=args.taxa, cache=cache
+            )
+            cache.fechar()
+
+    print(f'Autores raspados: {len(sequencial)}')
+    print(f'Sequencial:  {t_seq:.3f}s')
+    print(f'Concorrente: {t_conc:.3f}s ({t_seq / t_conc:.1f}x)')
+    print(f'Duas passadas: {t_conc + t_cit:.3f}s, {requisicoes_duas_passadas} requisições')
+    print(f'Passada única: {t_unif:.3f}s, {requisicoes_unificada} requisições')
+    print(f'Contadores: {contadores}')
+    resumo = metricas.resumo()
+    print(f'Métricas: {resumo["paginas_por_segundo"]:.1f} páginas/s, {resumo["autores_por_segundo"]:.1f} autores/s, '
+          f'{resumo["bytes"]} bytes, status {resumo["status"]}')
+    for etapa, histograma in resumo['etapas'].items():
+        print(f'  {etapa:>7}: {histograma["contagem"]:5d} x, total {histograma["soma"]:.3f}s, '
+              f'p50 {histograma["p50"] * 1000:.2f} ms, p95 {histograma["p95"] * 1000:.2f} ms')
+    print(f'Cache frio:   {t_fria:.3f}s')
+    print(f'Cache quente: {t_quente:.3f}s, estatísticas {cache.estatisticas}')
+    print(f'Contadores com cache quente: {contadores_cache}')
+
+    if sequencial != concorrente:
+        print('ERRO: as duas versões produziram linhas diferentes')
+        sys.exit(1)
+
+    if citacoes != citacoes_unificada or concorrente != autores_unificada:
+        print('ERRO: a passada única produziu linhas diferentes')
+        sys.exit(1)
+
+    if citacoes != citacoes_cache:
+        print('ERRO: o cache produziu linhas diferentes')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
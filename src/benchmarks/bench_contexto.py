@@ -0,0 +1,121 @@
+'''
+Benchmark offline da compressão do contexto (`components/compressor_contexto.py`).
+
+Responde às mesmas perguntas sobre autores de um CSV sintético com a cadeia
+RAG sem compressão (a lista de chunks vai direto ao prompt) e com o
+`CompressorContexto` em cada orçamento de tokens. O LLM simulado cobra
+`--latencia-token` segundos por token do prompt, como o processamento da
+entrada de um modelo real. Reporta por pergunta os tokens do contexto e do
+prompt, os tokens economizados, a latência do LLM e em quantos contextos a
+data de nascimento do autor perguntado continua presente.
+
+    $ cd src/
+    $ python -m benchmarks.bench_contexto --perguntas 50 --orcamentos 1000 300
+'''
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+
+_temporario = tempfile.TemporaryDirectory()
+
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-offline')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+os.environ.setdefault('EMBEDDINGS_MODELO', 'falso')
+os.environ.setdefault('LLM_MODELO', 'falso')
+os.environ.setdefault('INDICE_VETORIAL_DIR', os.path.join(_temporario.name, 'indice'))
+os.environ.setdefault('EMBEDDINGS_CACHE_DIR', os.path.join(_temporario.name, 'cache_embeddings'))
+
+from benchmarks.dados_sinteticos import gerar_csv_autores, nome_autor  # noqa: E402
+from components.perfil_rag import PerfilRequisicao  # noqa: E402
+
+MODELOS = ['Quando nasceu {}?', 'Onde nasceu {}?', 'Quem foi {}?', 'Sobre o que {} escreveu?']
+
+
+def gerar_perguntas(total: int, autores: int, semente: int = 5):
+    rnd = random.Random(semente)
+    return [(rnd.choice(MODELOS).format(nome_autor(i)), nome_autor(i))
+            for i in rnd.sample(range(autores), min(total, autores))]
+
+
+def medir(agent, perguntas, datas, orcamento=None):
+    '''
+    Responde às perguntas com a cadeia reconstruída para o modo pedido
+    (sem compressão quando `orcamento` é None) e retorna os perfis e quantos
+    contextos com o autor correto mantiveram a data de nascimento.
+    '''
+    os.environ['CONTEXTO_COMPRESSAO'] = '0' if orcamento is None else '1'
+    if orcamento is not None:
+        os.environ['CONTEXTO_MAX_TOKENS'] = str(orcamento)
+    agent._cadeia_rag = None
+    compressor = agent.criar_compressor()
+
+    perfis = []
+    com_autor = com_data = 0
+    for pergunta, autor in perguntas:
+        documentos = agent.recuperar_documentos(pergunta)
+        if any(documento.metadata.get('author') == autor for documento in documentos):
+            contexto = str(documentos) if compressor is None else compressor(documentos)
+            com_autor += 1
+            com_data += datas[autor] in contexto
+
+        perfil = PerfilRequisicao()
+        agent.responder(pergunta, perfil)
+        perfis.append(perfil)
+    return perfis, com_autor, com_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tokens e latência do LLM com e sem compressão do contexto')
+    parser.add_argument('--perguntas', type=int, default=50)
+    parser.add_argument('--autores', type=int, default=200)
+    parser.add_argument('--orcamentos', type=int, nargs='+', default=[1000, 300],
+                        help='valores de CONTEXTO_MAX_TOKENS a medir')
+    parser.add_argument('--latencia-token', type=float, default=0.0002,
+                        help='latência simulada do LLM por token do prompt (s)')
+    args = parser.parse_args()
+
+    os.environ['LLM_FALSO_LATENCIA_TOKEN'] = str(args.latencia_token)
+    os.environ['RESPOSTAS_CACHE'] = '0'
+    csv_autores = gerar_csv_autores(os.path.join(_temporario.name, 'autores.csv'), args.autores)
+    os.environ['AUTHOR_CSV'] = csv_autores
+
+    from components import agent
+    logging.getLogger().setLevel(logging.WARNING)
+
+    datas = {linha['author']: linha['data nascimento'] for linha in agent.ler_linhas_autores(csv_autores)}
+    agent.obter_vectorstore()
+    perguntas = gerar_perguntas(args.perguntas, args.autores)
+    print(f'{len(perguntas)} perguntas sobre {args.autores} autores, '
+          f'LLM simulado com {args.latencia_token * 1000:.2f} ms por token do prompt')
+    print(f'{"modo":>22} | {"contexto":>8} | {"prompt":>6} | {"economia":>8} | {"LLM p50":>9} | data no contexto')
+
+    referencia = None
+    falhou = False
+    for orcamento in [None, *args.orcamentos]:
+        perfis, com_autor, com_data = medir(agent, perguntas, datas, orcamento)
+        nome = 'sem compressão' if orcamento is None else f'compressão ({orcamento} tok)'
+        tokens_prompt = statistics.mean(perfil.tokens_prompt for perfil in perfis)
+        llm = statistics.median(perfil.etapas['llm'] for perfil in perfis)
+        if orcamento is None:
+            contexto = economia = '-'
+            referencia = tokens_prompt
+        else:
+            contexto = f'{statistics.mean(perfil.tokens_contexto for perfil in perfis):8.0f}'
+            economia = f'{statistics.mean(perfil.tokens_economizados for perfil in perfis):8.0f}'
+            if tokens_prompt >= referencia:
+                print(f'ERRO: a compressão com {orcamento} tokens não reduziu o prompt')
+                falhou = True
+        print(f'{nome:>22} | {contexto:>8} | {tokens_prompt:6.0f} | {economia:>8} | {llm * 1000:6.1f} ms | '
+              f'{com_data}/{com_autor}')
+
+    print('contexto e economia: tokens estimados (4 caracteres/token); prompt: tokens do LLM simulado (palavras)')
+    if falhou:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
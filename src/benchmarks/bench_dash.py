@@ -0,0 +1,146 @@
+'''
+Benchmark do callback do dashboard (`dash/callbaks.py`).
+
+Gera um `dados.csv` sintético em escala, carrega o módulo de callbacks sobre
+ele e compara, por autor selecionado, a latência dos callbacks (resumo e
+página da lista) com a implementação anterior (filtro do DataFrame inteiro,
+`ast.literal_eval`, `iterrows` e um card por citação a cada seleção), além do
+tamanho da lista enviada ao navegador com e sem paginação. A nuvem de tags é
+medida à parte: renderização sem cache, leitura do cache em disco e em
+memória, e o tamanho da resposta com a imagem em base64 x apenas a URL:
+
+    $ cd src/
+    $ python -m benchmarks.bench_dash --citacoes 200000 --autores 2000
+'''
+import argparse
+import ast
+import base64
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+import dash_mantine_components as dmc
+import pandas as pd
+import plotly.utils
+
+from benchmarks.dados_sinteticos import gerar_csv_citacoes
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'dash'))
+
+
+def atualizar_antigo(df, selected_autor):
+    '''
+    Referência: caminho de dados do callback antes do pré-processamento
+    (sem a nuvem de tags).
+    '''
+    df_autor = df[df['autor'] == selected_autor].copy()
+    df_autor['tags'] = df_autor['tags'].apply(ast.literal_eval)
+    df_autor['tags'] = df_autor['tags'].apply(lambda x: ', '.join(x))
+    all_tags = ' '.join(df_autor['tags'].dropna().str.replace(',', ' '))
+    pd.Series(all_tags).str.strip().value_counts()
+
+    cards = []
+    for _, row in df_autor.iterrows():
+        badges = [dmc.Badge(tag.strip(), variant="light", color="blue", radius="xl")
+                  for tag in row['tags'].split(',')] if row['tags'] else []
+        texto = dmc.Text(f"“{row['citacao']}”", style={'fontStyle': 'italic'}, size="md", fw=500)
+        componente = dmc.Anchor(texto, href=row['pagina'], target="_blank", underline=False)
+        cards.append(dmc.Card(children=[componente, dmc.Group(badges, gap="xs", mt="sm")],
+                              withBorder=True, shadow="sm", radius="md", p="sm", style={'marginBottom': '10px'}))
+    return len(df_autor), all_tags, cards
+
+
+def medir(funcao, autores):
+    tempos = []
+    for autor in autores:
+        inicio = time.perf_counter()
+        funcao(autor)
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(0.99 * (len(tempos) - 1))]
+
+
+def tamanho_json(componentes):
+    return len(json.dumps(componentes, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def medir_nuvens(callbaks, autores):
+    '''
+    Nuvem de tags: renderização sem cache (como o callback fazia antes, com o
+    PNG em base64 na resposta), leitura do disco e da memória.
+    '''
+    cache = callbaks.cache_nuvens
+    urls = [callbaks.update_dashboard(autor)[1] for autor in autores]
+    nuvens = [(autor, callbaks.dados_autores[autor]['frequencias']) for autor in autores]
+    nuvens = [(cache.chave(autor, frequencias), autor, frequencias) for autor, frequencias in nuvens if frequencias]
+    chaves = [nuvem[0] for nuvem in nuvens]
+
+    tamanho_base64 = 0
+    inicio = time.perf_counter()
+    for nuvem in nuvens:
+        tamanho_base64 += len(base64.b64encode(cache.png(*nuvem))) + len('data:image/png;base64,')
+    renderizacao = (time.perf_counter() - inicio) / len(nuvens)
+
+    cache._imagens.clear()
+    disco, _ = medir(cache.png, chaves)
+    memoria, _ = medir(cache.png, chaves)
+
+    print(f'{"nuvem de tags":>15}: renderização {renderizacao * 1000:8.2f} ms | disco {disco * 1e6:7.1f} µs | '
+          f'memória {memoria * 1e6:5.1f} µs')
+    print(f'{"payload":>15}: {tamanho_base64 / len(chaves):8.0f} bytes em base64 -> '
+          f'{sum(map(len, urls)) / len(urls):.0f} bytes de URL')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latência do callback do dashboard')
+    parser.add_argument('--citacoes', type=int, default=100000)
+    parser.add_argument('--autores', type=int, default=1000)
+    parser.add_argument('--selecoes', type=int, default=100)
+    parser.add_argument('--nuvens', type=int, default=5, help='seleções medidas com a nuvem de tags')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = gerar_csv_citacoes(os.path.join(diretorio, 'dados.csv'), args.citacoes, args.autores)
+        os.environ['DADOS_CSV'] = caminho
+        os.environ['NUVENS_CACHE_DIR'] = os.path.join(diretorio, 'nuvens')
+
+        inicio = time.perf_counter()
+        import agregados
+        import callbaks
+        carga = time.perf_counter() - inicio
+        df = pd.read_csv(caminho)
+
+        rnd = random.Random(7)
+        # O autor com mais citações sempre entra na amostra (pior caso)
+        maior = max(callbaks.autores_unicos, key=lambda autor: len(callbaks.dados_autores[autor]['citacoes']))
+        autores = [maior] + rnd.choices(callbaks.autores_unicos, k=args.selecoes - 1)
+        print(f'{len(df)} citações, {len(callbaks.autores_unicos)} autores '
+              f'(maior: {len(callbaks.dados_autores[maior]["citacoes"])} citações)')
+        inicio = time.perf_counter()
+        agregados.agrupar_por_autor(df)
+        print(f'importação de callbaks (leitura + pré-processamento): {carga:.2f}s | '
+              f'pré-processamento: {time.perf_counter() - inicio:.2f}s')
+
+        for nome, funcao in [('anterior', lambda autor: atualizar_antigo(df, autor)),
+                             ('paginado', lambda autor: (callbaks.update_dashboard(autor),
+                                                         callbaks.update_lista_citacoes(autor, 1)))]:
+            p50, p99 = medir(funcao, autores)
+            print(f'{nome:>15}: p50 {p50 * 1000:8.2f} ms | p99 {p99 * 1000:8.2f} ms (sem nuvem de tags)')
+
+        # Tamanho (JSON) da lista de citações enviada ao navegador para o maior autor
+        completa = atualizar_antigo(df, maior)[2]
+        pagina = callbaks.update_lista_citacoes(maior, 1)
+        print(f'{"lista (maior)":>15}: {len(completa)} cards, {tamanho_json(completa) / 1024:.0f} KB -> '
+              f'{len(pagina)} cards por página, {tamanho_json(pagina) / 1024:.1f} KB')
+
+        medir_nuvens(callbaks, autores[:args.nuvens])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+'''
+Benchmark de throughput dos extratores de HTML (`components/extratores.py`).
+
+Mede páginas/segundo de cada backend sobre as páginas de listagem e de autor
+e confere que todos produzem exatamente os mesmos dicionários.
+
+As páginas vêm do gerador de `servidor_fixture` ou de um diretório com páginas
+salvas do site (arquivos .html; páginas com `author-details` são tratadas como
+páginas de autor):
+
+    $ cd src/
+    $ python -m benchmarks.bench_extratores --repeticoes 5
+    $ python -m benchmarks.bench_extratores --diretorio ../fixtures/quotes
+'''
+import argparse
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'components'))
+
+from extratores import EXTRATORES, obter_extrator  # noqa: E402
+from benchmarks.servidor_fixture import gerar_site  # noqa: E402
+
+URL = 'http://quotes.toscrape.com'
+
+
+def carregar_paginas(diretorio: str = None, autores: int = 50, citacoes: int = 500):
+    if diretorio:
+        paginas = {f'/{arquivo.name}': arquivo.read_text(encoding='utf-8')
+                   for arquivo in sorted(Path(diretorio).glob('*.html'))}
+    else:
+        paginas = gerar_site(autores=autores, citacoes=citacoes)
+
+    listagens = [html for caminho, html in paginas.items() if 'author-details' not in html and caminho != '/']
+    paginas_autor = [html for html in paginas.values() if 'author-details' in html]
+    return listagens, paginas_autor
+
+
+def medir_backend(backend: str, listagens, paginas_autor, repeticoes: int):
+    extrator = obter_extrator(backend)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado_listagens = [extrator.pagina_listagem(html, URL, URL) for html in listagens]
+    t_listagens = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado_autores = [extrator.autor(html) for html in paginas_autor]
+    t_autores = time.perf_counter() - inicio
+
+    return (resultado_listagens, resultado_autores), t_listagens, t_autores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput dos extratores de HTML')
+    parser.add_argument('--diretorio', help='diretório com páginas .html salvas')
+    parser.add_argument('--autores', type=int, default=50)
+    parser.add_argument('--citacoes', type=int, default=500)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    listagens, paginas_autor = carregar_paginas(args.diretorio, args.autores, args.citacoes)
+    print(f'{len(listagens)} páginas de listagem, {len(paginas_autor)} páginas de autor, '
+          f'{args.repeticoes} repetições')
+
+    referencia = None
+    tempos = {}
+    for backend in EXTRATORES:
+        resultado, t_listagens, t_autores = medir_backend(backend, listagens, paginas_autor, args.repeticoes)
+        tempos[backend] = t_listagens + t_autores
+        print(f'{backend:>5}: listagens {len(listagens) * args.repeticoes / t_listagens:8.1f} pág/s | '
+              f'autores {len(paginas_autor) * args.repeticoes / t_autores:8.1f} pág/s')
+
+        if referencia is None:
+            referencia = resultado
+        elif resultado != referencia:
+            print(f'ERRO: o backend {backend} produziu dicionários diferentes')
+            sys.exit(1)
+
+    base = tempos['bs4']
+    for backend, tempo in tempos.items():
+        print(f'{backend:>5}: {base / tempo:.1f}x em relação ao bs4')
+
+
+if __name__ == '__main__':
+    main()
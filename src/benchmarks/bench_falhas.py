@@ -0,0 +1,120 @@
+'''
+Injeção de falhas no coletor contra o `ServidorFixture`.
+
+Cada cenário sobe o servidor local com um tipo de falha (503, 429 com
+Retry-After, conexões derrubadas, respostas lentas com timeout curto) e
+executa os três scrapers (`raspagem_quotes_toscrape`, `raspagem_page_author`
+e `raspagem_unificada`). O resultado precisa ser igual ao de um servidor sem
+falhas: nenhuma página pode ficar de fora em silêncio. Reporta o tempo, as
+novas tentativas e as falhas injetadas de cada cenário.
+
+    $ cd src/
+    $ python -m benchmarks.bench_falhas --autores 30 --citacoes 100
+'''
+import argparse
+import logging
+import sys
+import time
+
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'components'))
+
+import coletor  # noqa: E402
+from cliente_http import ClienteHttp  # noqa: E402
+from benchmarks.servidor_fixture import ServidorFixture  # noqa: E402
+
+CENARIOS = {
+    'sem falhas': {},
+    '503 (20%)': {'falhas': 0.2},
+    '503 + Retry-After': {'falhas': 0.2, 'retry_after': 0.05},
+    '429 (limite 40 req/s)': {'limite_taxa': 40, 'retry_after': 0.1},
+    'desconexões (10%)': {'desconexoes': 0.1},
+    'lentas + timeout': {'lentas': 0.05, 'atraso_lento': 0.6},
+}
+
+
+def sem_host(linhas: list, url: str) -> list:
+    # A URL da página (campo 'pagina') muda com a porta de cada servidor
+    return [{chave: valor.replace(url, '') if isinstance(valor, str) else valor for chave, valor in linha.items()}
+            for linha in linhas]
+
+
+def raspar(servidor: ServidorFixture, args) -> tuple:
+    '''
+    Executa os três scrapers; retorna (citações, autores, autores da passada única, métricas, tempo).
+    '''
+    def novo_cliente(max_por_host: int) -> ClienteHttp:
+        return ClienteHttp(max_por_host=max_por_host, timeout=args.timeout, tentativas=args.tentativas,
+                           espera_inicial=0.05, espera_maxima=2.0, metricas=metricas)
+
+    metricas = coletor.MetricasColeta()
+    inicio = time.perf_counter()
+    with novo_cliente(1) as cliente:
+        citacoes = coletor.raspagem_quotes_toscrape(servidor.url, cliente=cliente)
+        autores = coletor.raspagem_page_author(servidor.url, delay=0, cliente=cliente)
+    autores_unificada: list = []
+    with novo_cliente(args.max_por_host) as cliente:
+        contadores = coletor.raspagem_unificada(servidor.url, None, autores_unificada.append, cliente=cliente)
+    tempo = time.perf_counter() - inicio
+    if contadores['listagens_com_erro']:
+        raise RuntimeError('a passada única interrompeu a paginação')
+    return sem_host(citacoes, servidor.url), autores, autores_unificada, metricas, tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrapers contra um servidor local com falhas injetadas')
+    parser.add_argument('--autores', type=int, default=30)
+    parser.add_argument('--citacoes', type=int, default=100)
+    parser.add_argument('--latencia', type=float, default=0.005)
+    parser.add_argument('--max-por-host', type=int, default=4)
+    parser.add_argument('--tentativas', type=int, default=6)
+    parser.add_argument('--timeout', type=float, default=0.3)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    referencia = None
+    falhou = False
+    print(f'{"cenário":>22} | {"tempo":>7} | {"retries":>7} | {"com erro":>8} | injetadas')
+    for nome, falhas in CENARIOS.items():
+        with ServidorFixture(latencia=args.latencia, autores=args.autores, citacoes=args.citacoes,
+                             condicional=False, **falhas) as servidor:
+            try:
+                *linhas, metricas, tempo = raspar(servidor, args)
+            except Exception as erro:
+                print(f'{nome:>22} | ERRO: {erro}')
+                falhou = True
+                continue
+
+        resumo = metricas.resumo()
+        print(f'{nome:>22} | {tempo:6.2f}s | {resumo["retries"]:>7} | {resumo["paginas_com_erro"]:>8} | '
+              f'{dict(servidor.falhas_injetadas)}')
+        if referencia is None:
+            referencia = linhas
+        elif linhas != referencia:
+            print(f'ERRO: o cenário "{nome}" produziu linhas diferentes do servidor sem falhas')
+            falhou = True
+
+    # Servidor fora do ar: o erro precisa chegar ao chamador, sem resultado parcial
+    with ServidorFixture(autores=args.autores, citacoes=args.citacoes, falhas=1.0) as servidor:
+        cliente = ClienteHttp(tentativas=3, espera_inicial=0.01)
+        try:
+            coletor.raspagem_quotes_toscrape(servidor.url, cliente=cliente)
+            print('ERRO: servidor indisponível, mas a raspagem terminou sem erro')
+            falhou = True
+        except requests.RequestException as erro:
+            print(f'{"indisponível":>22} | erro propagado após {cliente.tentativas} tentativas: {erro}')
+        contadores = coletor.raspagem_unificada(servidor.url, None, [].append, cliente=cliente)
+        if not contadores['listagens_com_erro']:
+            print('ERRO: a passada única não registrou a listagem com erro')
+            falhou = True
+
+    if falhou:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+'''
+Benchmark de carga de `dados.csv` x `dados.parquet` x `dados.arrow`.
+
+Gera um `dados.csv` sintético, converte para Parquet e Arrow IPC com o
+`escritor_colunar` do coletor e mede, cada formato e etapa em um processo novo:
+
+* leitura: `pd.read_csv` (CSV) ou `ler_tabela` com memory mapping (colunar);
+* carga do dashboard: leitura + `carregar_dados_autores` (agrupamento por autor);
+* memória da etapa, em uma execução à parte (o rastreamento deixa a etapa
+  mais lenta): pico das alocações do Python e do NumPy (`tracemalloc`) e pico
+  do pool de memória do Arrow. No Arrow IPC mapeado, as colunas ficam no page
+  cache do arquivo, fora dessas contas;
+* pico de RSS do processo filho (inclui as importações e as páginas mapeadas
+  que foram lidas).
+
+    $ cd src/
+    $ python -m benchmarks.bench_formatos --citacoes 200000 --autores 2000
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC / 'components'))
+sys.path.insert(0, str(SRC / 'dash'))
+
+
+def _rss_mb() -> float:
+    # ru_maxrss em KB no Linux: pico do processo, que nunca diminui
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(caminho: str, etapa: str, memoria: bool = False) -> dict:
+    '''
+    Executado no processo filho: mede uma etapa sobre `caminho`. Com
+    `memoria`, rastreia as alocações da etapa em vez de medir só o tempo.
+    '''
+    import pandas as pd
+    import pyarrow as pa
+
+    import agregados
+    from escritor_colunar import formato_do_arquivo, ler_tabela
+
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    if etapa == 'leitura':
+        if formato_do_arquivo(caminho) == 'csv':
+            dados = pd.read_csv(caminho)
+        else:
+            dados = ler_tabela(caminho)
+    else:
+        dados = agregados.carregar_dados_autores(caminho)
+    resultado = {'tempo': time.perf_counter() - inicio, 'itens': len(dados), 'rss_pico_mb': _rss_mb()}
+    if memoria:
+        resultado['python_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        resultado['arrow_mb'] = pa.default_memory_pool().max_memory() / 2 ** 20
+        tracemalloc.stop()
+    return resultado
+
+
+def _executar(caminho: str, etapa: str, memoria: bool) -> dict:
+    processo = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_formatos', '--medir', caminho, '--etapa', etapa]
+        + (['--memoria'] if memoria else []),
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def medir_em_processo(caminho: str, etapa: str, repeticoes: int) -> dict:
+    # Menor tempo entre as repetições (menos ruído do sistema); memória de uma execução rastreada
+    tempos = [_executar(caminho, etapa, False) for _ in range(repeticoes)]
+    melhor = min(tempos, key=lambda resultado: resultado['tempo'])
+    return {**_executar(caminho, etapa, True), 'tempo': melhor['tempo'], 'rss_pico_mb': melhor['rss_pico_mb']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de carga e memória: CSV x Parquet x Arrow')
+    parser.add_argument('--citacoes', type=int, default=100000)
+    parser.add_argument('--autores', type=int, default=1000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--medir', help=argparse.SUPPRESS)
+    parser.add_argument('--etapa', default='leitura', help=argparse.SUPPRESS)
+    parser.add_argument('--memoria', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.etapa, args.memoria)))
+        return
+
+    from escritor_colunar import converter_csv
+    from benchmarks.dados_sinteticos import gerar_csv_citacoes
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv_dados = gerar_csv_citacoes(os.path.join(diretorio, 'dados.csv'), args.citacoes, args.autores)
+        arquivos = [csv_dados]
+        for extensao in ('.parquet', '.arrow'):
+            destino = os.path.join(diretorio, f'dados{extensao}')
+            inicio = time.perf_counter()
+            converter_csv(csv_dados, destino)
+            print(f'conversão para {extensao}: {time.perf_counter() - inicio:.2f}s')
+            arquivos.append(destino)
+
+        print(f'{args.citacoes} citações, {args.autores} autores')
+        print('Python e Arrow: pico das alocações da etapa (Python + NumPy e pool do Arrow); RSS: pico do processo')
+        print(f'{"formato":>8} | {"arquivo":>9} | {"etapa":>9} | {"tempo":>8} | {"Python":>8} | {"Arrow":>8} | {"RSS":>8}')
+        for arquivo in arquivos:
+            for etapa in ('leitura', 'dashboard'):
+                medida = medir_em_processo(arquivo, etapa, args.repeticoes)
+                print(f'{Path(arquivo).suffix[1:]:>8} | {os.path.getsize(arquivo) / 2 ** 20:7.1f}MB | {etapa:>9} | '
+                      f'{medida["tempo"]:7.3f}s | {medida["python_mb"]:6.1f}MB | {medida["arrow_mb"]:6.1f}MB | '
+                      f'{medida["rss_pico_mb"]:6.1f}MB')
+
+if __name__ == '__main__':
+    main()
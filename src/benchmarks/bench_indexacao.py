@@ -0,0 +1,82 @@
+'''
+Benchmark offline da indexação do CSV de autores.
+
+Usa o `EmbedderFalso` (com latência simulada por chamada) para comparar:
+
+* embedding direto em lotes sequenciais de 100 textos, como o `GoogleGenerativeAIEmbeddings`
+  chamado pelo `Chroma.from_documents` original;
+* `EmbeddingsEmLote` com cache frio (lotes + requisições concorrentes);
+* `EmbeddingsEmLote` com cache quente (nenhuma chamada ao embedder).
+
+Antes das medidas, uma indexação de aquecimento (sem latência e fora da
+medida) absorve a inicialização do Chroma, que ficaria no primeiro cenário
+medido e inflaria o ganho dos lotes.
+
+    $ cd src/
+    $ python -m benchmarks.bench_indexacao --autores 500 --latencia 0.05
+'''
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-offline')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+
+from components import agent  # noqa: E402
+from components.embeddings import CacheEmbeddings, EmbedderFalso, EmbeddingsEmLote  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_csv_autores  # noqa: E402
+
+
+class _Sequencial(EmbedderFalso):
+    # Lotes de 100 textos, uma chamada por vez, sem cache
+    def embed_documents(self, texts):
+        vetores = []
+        for inicio in range(0, len(texts), 100):
+            vetores.extend(super().embed_documents(texts[inicio:inicio + 100]))
+        return vetores
+
+
+def indexar(chunks, embeddings):
+    with tempfile.TemporaryDirectory() as diretorio:
+        inicio = time.perf_counter()
+        agent.criar_base_vetorial(chunks, os.path.join(diretorio, 'indice'), embeddings)
+        return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da indexação do CSV de autores')
+    parser.add_argument('--autores', type=int, default=500)
+    parser.add_argument('--latencia', type=float, default=0.05, help='latência simulada por chamada (s)')
+    parser.add_argument('--lote', type=int, default=100)
+    parser.add_argument('--concorrencia', type=int, default=4)
+    parser.add_argument('--sem-sequencial', action='store_true', help='pula o cenário sequencial (lento)')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv_autores = gerar_csv_autores(os.path.join(diretorio, 'autores.csv'), args.autores)
+        chunks = agent.processar_csv_author_preparar_chunks(csv_autores)
+        print(f'{len(chunks)} chunks de {args.autores} autores, latência simulada {args.latencia}s')
+
+        aquecimento = indexar(chunks, EmbedderFalso(latencia=0))
+        print(f'Aquecimento:       {aquecimento:7.2f}s (fora da comparação)')
+
+        if not args.sem_sequencial:
+            sequencial = _Sequencial(latencia=args.latencia)
+            tempo = indexar(chunks, sequencial)
+            print(f'Sequencial:        {tempo:7.2f}s ({len(chunks) / tempo:8.1f} chunks/s, {sequencial.chamadas} chamadas)')
+
+        cache = CacheEmbeddings(os.path.join(diretorio, 'cache'))
+        for rotulo in ('Lotes, cache frio', 'Lotes, cache quente'):
+            base = EmbedderFalso(latencia=args.latencia)
+            embeddings = EmbeddingsEmLote(base, 'falso', cache=cache,
+                                          tamanho_lote=args.lote, max_concorrencia=args.concorrencia)
+            tempo = indexar(chunks, embeddings)
+            print(f'{rotulo + ":":<19}{tempo:7.2f}s ({len(chunks) / tempo:8.1f} chunks/s, {base.chamadas} chamadas)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+'''
+Benchmark de recuperação: busca vetorial pura x `RecuperadorHibrido`.
+
+Gera um conjunto de perguntas rotuladas a partir do CSV de autores (o autor
+correto de cada pergunta é conhecido) e mede latência por consulta, recall@3
+(o autor correto aparece entre os 3 chunks retornados) e chamadas de embedding.
+
+Tipos de pergunta:
+
+* nome: nome completo do autor ("Quando nasceu Albert Einstein?");
+* erro: nome com um erro de digitação;
+* descricao: trecho da descrição, sem o nome do autor.
+
+    $ cd src/
+    $ python -m benchmarks.bench_recuperador --autores 300
+    $ python -m benchmarks.bench_recuperador --csv ./documents/author_sem_duplicatas.csv
+
+Com o `EmbedderFalso` (padrão, offline) a busca vetorial não tem relação com
+o significado do texto; use EMBEDDINGS_MODELO com um modelo real para medir a
+busca densa de verdade.
+'''
+import argparse
+import csv
+import logging
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+
+from collections import defaultdict
+
+_temporario = tempfile.TemporaryDirectory()
+
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-offline')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+os.environ.setdefault('EMBEDDINGS_MODELO', 'falso')
+# `criar_embeddings` abre o cache de embeddings; fora da árvore do repositório
+os.environ.setdefault('EMBEDDINGS_CACHE_DIR', os.path.join(_temporario.name, 'cache_embeddings'))
+
+from components import agent  # noqa: E402
+from components.recuperador import RecuperadorHibrido  # noqa: E402
+from benchmarks.dados_sinteticos import gerar_csv_autores  # noqa: E402
+
+MODELOS = ['Quando nasceu {}?', 'Onde nasceu {}?', 'Quem foi {}?', 'Fale sobre {}.']
+
+
+def _com_erro(nome: str, rnd: random.Random) -> str:
+    posicoes = [i for i, c in enumerate(nome) if c.isalpha()]
+    i = rnd.choice(posicoes[1:] or posicoes)
+    return nome[:i] + nome[i + 1:] if rnd.random() < 0.5 else nome[:i] + nome[i] + nome[i:]
+
+
+def gerar_perguntas(file_path_csv: str, por_tipo: int = 100, semente: int = 3):
+    '''
+    Retorna [(tipo, pergunta, autor correto)].
+    '''
+    with open(file_path_csv, 'r', newline='', encoding='utf-8') as arquivo:
+        linhas = [linha for linha in csv.DictReader(arquivo) if linha['author']]
+
+    rnd = random.Random(semente)
+    perguntas = []
+    for linha in rnd.sample(linhas, min(por_tipo, len(linhas))):
+        perguntas.append(('nome', rnd.choice(MODELOS).format(linha['author']), linha['author']))
+    for linha in rnd.sample(linhas, min(por_tipo, len(linhas))):
+        perguntas.append(('erro', rnd.choice(MODELOS).format(_com_erro(linha['author'], rnd)), linha['author']))
+    for linha in rnd.sample(linhas, min(por_tipo, len(linhas))):
+        frases = [f for f in re.split(r'(?<=\.)\s+', linha['descricao']) if len(f.split()) >= 6]
+        if not frases:
+            continue
+        trecho = rnd.choice(frases)
+        for parte in linha['author'].split():
+            trecho = trecho.replace(parte, '')
+        perguntas.append(('descricao', f'Quem {" ".join(trecho.split())}', linha['author']))
+    return perguntas
+
+
+def medir(nome: str, recuperador, perguntas, embedder):
+    chamadas_antes = embedder.chamadas
+    latencias = defaultdict(list)
+    acertos = defaultdict(int)
+    for tipo, pergunta, autor in perguntas:
+        inicio = time.perf_counter()
+        documentos = recuperador.invoke(pergunta)
+        latencias[tipo].append(time.perf_counter() - inicio)
+        acertos[tipo] += any(d.metadata.get('author') == autor for d in documentos[:3])
+
+    print(f'{nome}: {embedder.chamadas - chamadas_antes} chamadas de embedding')
+    for tipo, tempos in latencias.items():
+        print(f'  {tipo:>9}: recall@3 {acertos[tipo] / len(tempos):6.1%} | '
+              f'p50 {statistics.median(tempos) * 1000:7.2f} ms | p99 {sorted(tempos)[int(0.99 * (len(tempos) - 1))] * 1000:7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latência e recall@3 do retriever')
+    parser.add_argument('--csv', help='CSV de autores (padrão: sintético)')
+    parser.add_argument('--autores', type=int, default=300)
+    parser.add_argument('--por-tipo', type=int, default=100)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv_autores = args.csv or gerar_csv_autores(os.path.join(diretorio, 'autores.csv'), args.autores)
+        embeddings = agent.criar_embeddings()
+        embedder = embeddings.base if hasattr(embeddings.base, 'chamadas') else None
+        # Sem cache de embeddings nem LRU de consultas, para contar as chamadas de consulta
+        embeddings.cache = None
+        embeddings.max_consultas = 0
+
+        chunks = agent.processar_csv_author_preparar_chunks(csv_autores)
+        vectorstore = agent.criar_base_vetorial(chunks, os.path.join(diretorio, 'indice'), embeddings)
+        perguntas = gerar_perguntas(csv_autores, args.por_tipo)
+        print(f'{len(chunks)} chunks, {len(perguntas)} perguntas rotuladas')
+
+        if embedder is None:
+            class _Contador:
+                chamadas = 0
+            embedder = _Contador()
+
+        medir('vetorial', vectorstore.as_retriever(search_kwargs={'k': 3}), perguntas, embedder)
+
+        inicio = time.perf_counter()
+        hibrido = RecuperadorHibrido.do_vectorstore(vectorstore, k=3)
+        print(f'construção dos índices em memória: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+        medir('hibrido', hibrido, perguntas, embedder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+'''
+Compara o tempo até o primeiro token (TTFT) e a latência total de
+`/responder` (JSON único) e `/responder/stream` (Server-Sent Events).
+
+Usa a API local com o embedder e o LLM simulados, como em `carga_responder`;
+a latência do LLM simulado é distribuída entre os tokens da resposta.
+
+Ao final, abandona tantos streams quanto as vagas do `LimiteEmVoo`, com o
+cliente desconectando antes do primeiro pedaço do corpo, e confere que todas
+as vagas voltam a ficar livres.
+
+    $ cd src/
+    $ python -m benchmarks.bench_streaming --perguntas 20 --latencia-llm 1.0
+'''
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from benchmarks.carga_responder import _temporario, iniciar_servidor, porta_livre
+
+
+async def medir_json(cliente: httpx.AsyncClient, url: str, pergunta: str):
+    inicio = time.perf_counter()
+    resposta = await cliente.post(url, json={'pergunta': pergunta})
+    resposta.raise_for_status()
+    total = time.perf_counter() - inicio
+    return total, total, resposta.json()['resposta']
+
+
+async def medir_stream(cliente: httpx.AsyncClient, url: str, pergunta: str):
+    inicio = time.perf_counter()
+    primeiro_token = None
+    pedacos = []
+    async with cliente.stream('POST', url, json={'pergunta': pergunta}) as resposta:
+        resposta.raise_for_status()
+        evento = None
+        async for linha in resposta.aiter_lines():
+            if linha.startswith('event: '):
+                evento = linha[len('event: '):]
+            elif linha.startswith('data: '):
+                dados = json.loads(linha[len('data: '):])
+                if evento == 'erro':
+                    raise RuntimeError(dados['erro'])
+                if evento is None:
+                    if primeiro_token is None:
+                        primeiro_token = time.perf_counter() - inicio
+                    pedacos.append(dados['token'])
+                evento = None
+    return primeiro_token, time.perf_counter() - inicio, ''.join(pedacos)
+
+
+async def comparar(base: str, perguntas):
+    resultados = {'/responder': [], '/responder/stream': []}
+    async with httpx.AsyncClient(timeout=120.0) as cliente:
+        for pergunta in perguntas:
+            json_unico = await medir_json(cliente, f'{base}/responder', pergunta)
+            stream = await medir_stream(cliente, f'{base}/responder/stream', pergunta)
+            if json_unico[2] != stream[2]:
+                raise RuntimeError(f'Respostas diferentes para {pergunta!r}')
+            resultados['/responder'].append(json_unico[:2])
+            resultados['/responder/stream'].append(stream[:2])
+    return resultados
+
+
+async def abandonar_stream(app, pergunta: str):
+    '''
+    Chama o app ASGI com um cliente que desconecta enquanto os cabeçalhos da
+    resposta são enviados, antes do primeiro pedaço do corpo.
+    '''
+    pedido = [{'type': 'http.request', 'body': json.dumps({'pergunta': pergunta}).encode(), 'more_body': False}]
+
+    async def receber():
+        return pedido.pop() if pedido else {'type': 'http.disconnect'}
+
+    async def enviar(mensagem):
+        # A desconexão é percebida enquanto o servidor envia os cabeçalhos
+        await asyncio.sleep(0.01)
+
+    escopo = {
+        'type': 'http', 'asgi': {'version': '3.0', 'spec_version': '2.3'}, 'http_version': '1.1',
+        'method': 'POST', 'scheme': 'http', 'path': '/responder/stream', 'raw_path': b'/responder/stream',
+        'query_string': b'', 'root_path': '', 'headers': [(b'content-type', b'application/json')],
+        'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+    }
+    await app(escopo, receber, enviar)
+
+
+async def vagas_apos_desconexoes(app, limite, perguntas):
+    # Uma pergunta por vez: sem disputa pelas vagas, uma vaga perdida não é recuperada
+    for pergunta in perguntas:
+        await abandonar_stream(app, pergunta)
+    return limite.livres
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TTFT e latência total: /responder x /responder/stream')
+    parser.add_argument('--perguntas', type=int, default=20)
+    parser.add_argument('--autores', type=int, default=100)
+    parser.add_argument('--latencia-llm', type=float, default=1.0, help='latência simulada do LLM (s)')
+    args = parser.parse_args()
+
+    os.environ['LLM_FALSO_LATENCIA'] = str(args.latencia_llm)
+    os.environ['RESPOSTAS_CACHE'] = '0'
+
+    from benchmarks.dados_sinteticos import gerar_csv_autores, nome_autor
+    os.environ.setdefault('AUTHOR_CSV', gerar_csv_autores(os.path.join(_temporario.name, 'autores.csv'), args.autores))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as api
+        from components.agent import obter_vectorstore
+        obter_vectorstore()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    porta = porta_livre()
+    servidor = iniciar_servidor(api.app, porta)
+    perguntas = [f'Quando nasceu {nome_autor(i % args.autores)}?' for i in range(args.perguntas)]
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultados = asyncio.run(comparar(f'http://127.0.0.1:{porta}', perguntas))
+    except RuntimeError as erro:
+        print(f'ERRO: {erro}')
+        sys.exit(1)
+    finally:
+        servidor.should_exit = True
+
+    # Depois do servidor, para que o semáforo do limite seja usado por um event loop de cada vez
+    abandonadas = [f'Onde nasceu {nome_autor(i % args.autores)}?' for i in range(api.limite_em_voo.maximo)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        livres = asyncio.run(vagas_apos_desconexoes(api.app, api.limite_em_voo, abandonadas))
+
+    print(f'{args.perguntas} perguntas, LLM simulado com {args.latencia_llm}s')
+    print(f'{"rota":>18} {"TTFT p50 (s)":>13} {"total p50 (s)":>14}')
+    for rota, medidas in resultados.items():
+        ttft = statistics.median(m[0] for m in medidas)
+        total = statistics.median(m[1] for m in medidas)
+        print(f'{rota:>18} {ttft:13.3f} {total:14.3f}')
+
+    print(f'vagas livres após {len(abandonadas)} desconexões antes do primeiro token: '
+          f'{livres}/{api.limite_em_voo.maximo}')
+    if livres != api.limite_em_voo.maximo:
+        print('ERRO: a API perdeu vagas com as desconexões')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
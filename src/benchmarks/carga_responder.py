@@ -0,0 +1,194 @@
+'''
+Teste de carga offline do endpoint `/responder` (`app.py`).
+
+Sobe a API em um servidor uvicorn local com o embedder e o LLM simulados
+(`EMBEDDINGS_MODELO=falso`, `LLM_MODELO=falso`) sobre um CSV sintético de
+autores e dispara perguntas com concorrência crescente (o cache de respostas
+fica desligado, a menos que RESPOSTAS_CACHE=1 seja definido). Para comparação, o
+mesmo app ganha a rota `/responder_bloqueante`, que chama `cadeia_rag.invoke`
+dentro de um endpoint `async` (o comportamento anterior, que bloqueia o event loop).
+
+Também mede o `/responder` com micro-batching (`AgrupadorPerguntas`), que junta
+as perguntas de uma janela curta em uma chamada de embeddings e um `abatch`.
+
+Reporta latência p50/p99, requisições/segundo, respostas 429 e chamadas ao
+embedder e ao LLM simulados por nível:
+
+    $ cd src/
+    $ python -m benchmarks.carga_responder --niveis 1 4 16 64 --latencia-llm 0.2
+'''
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from collections import Counter
+
+_temporario = tempfile.TemporaryDirectory()
+
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-offline')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+os.environ.setdefault('EMBEDDINGS_MODELO', 'falso')
+os.environ.setdefault('LLM_MODELO', 'falso')
+os.environ.setdefault('RESPOSTAS_CACHE', '0')
+os.environ.setdefault('INDICE_VETORIAL_DIR', os.path.join(_temporario.name, 'indice'))
+os.environ.setdefault('EMBEDDINGS_CACHE_DIR', os.path.join(_temporario.name, 'cache_embeddings'))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def iniciar_servidor(app, porta: int) -> uvicorn.Server:
+    servidor = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=porta, log_level='warning'))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+async def executar_carga(url: str, perguntas, concorrencia: int, total: int, timeout: float = 120.0):
+    '''
+    Envia `total` perguntas mantendo `concorrencia` requisições em voo.
+    Retorna (latências das respostas 200 em segundos, contagem de status, duração).
+    '''
+    latencias = []
+    status = Counter()
+    fila = iter(range(total))
+
+    async with httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=concorrencia)) as cliente:
+        async def trabalhador():
+            for indice in fila:
+                inicio = time.perf_counter()
+                resposta = await cliente.post(url, json={'pergunta': perguntas[indice % len(perguntas)]})
+                status[resposta.status_code] += 1
+                if resposta.status_code == 200:
+                    latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+        return latencias, status, time.perf_counter() - inicio
+
+
+def gerar_perguntas(autores: int, rodada: int, total: int):
+    '''
+    Metade das perguntas cita um autor pelo nome; a outra metade só tem
+    palavras-chave (e precisa do embedding da consulta). O sufixo torna as
+    perguntas de cada rodada inéditas para os caches.
+    '''
+    from benchmarks.dados_sinteticos import nome_autor
+    from benchmarks.servidor_fixture import TAGS
+
+    perguntas = []
+    for i in range(total):
+        if i % 2 == 0:
+            perguntas.append(f'Onde nasceu {nome_autor(i % autores)}? ({rodada}-{i})')
+        else:
+            perguntas.append(f'Quem escreveu sobre {TAGS[i % len(TAGS)]} em {1800 + i % 200}? ({rodada}-{i})')
+    return perguntas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga do endpoint /responder')
+    parser.add_argument('--niveis', type=int, nargs='+', default=[1, 4, 16, 64], help='níveis de concorrência')
+    parser.add_argument('--requisicoes', type=int, default=4, help='requisições por cliente em cada nível')
+    parser.add_argument('--latencia-llm', type=float, default=0.2, help='latência simulada do LLM (s)')
+    parser.add_argument('--latencia-embeddings', type=float, default=0.05,
+                        help='latência simulada por chamada de embedding (s)')
+    parser.add_argument('--taxa-embeddings', type=float, default=20.0,
+                        help='cota simulada de chamadas de embedding por segundo (0 = sem limite)')
+    parser.add_argument('--autores', type=int, default=200)
+    parser.add_argument('--max-em-voo', type=int, default=8)
+    parser.add_argument('--max-fila', type=int, default=64)
+    parser.add_argument('--espera-fila', type=float, default=10.0)
+    parser.add_argument('--janela', type=float, default=0.01, help='janela de micro-batching (s)')
+    parser.add_argument('--max-lote', type=int, default=8)
+    parser.add_argument('--sem-bloqueante', action='store_true', help='pula a rota bloqueante (lenta)')
+    args = parser.parse_args()
+
+    os.environ['LLM_FALSO_LATENCIA'] = str(args.latencia_llm)
+    os.environ['EMBEDDINGS_FALSO_LATENCIA'] = str(args.latencia_embeddings)
+    os.environ['EMBEDDINGS_FALSO_TAXA'] = str(args.taxa_embeddings)
+    os.environ['RESPONDER_MAX_EM_VOO'] = str(args.max_em_voo)
+    os.environ['RESPONDER_MAX_FILA'] = str(args.max_fila)
+    os.environ['RESPONDER_ESPERA_FILA'] = str(args.espera_fila)
+    os.environ['RESPONDER_JANELA_LOTE'] = '0'
+
+    from benchmarks.dados_sinteticos import gerar_csv_autores
+    os.environ.setdefault('AUTHOR_CSV', gerar_csv_autores(os.path.join(_temporario.name, 'autores.csv'), args.autores))
+
+    # As prints do endpoint e os logs do agente poluiriam a saída do relatório
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as api
+        from components.agent import aresponder_lote, cadeia_rag, llm, obter_vectorstore
+        from components.agrupador import AgrupadorPerguntas
+
+        @api.app.post('/responder_bloqueante')
+        async def responder_bloqueante(request: api.PerguntaRequest):
+            return {'resposta': cadeia_rag.invoke(request.pergunta)}
+
+        embedder = obter_vectorstore().embeddings.base
+
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    porta = porta_livre()
+    servidor = iniciar_servidor(api.app, porta)
+
+    # (nome, rota, agrupador usado pelo /responder)
+    cenarios = [('async', '/responder', None),
+                (f'lote {args.janela * 1000:g}ms', '/responder',
+                 AgrupadorPerguntas(aresponder_lote, janela=args.janela, max_lote=args.max_lote))]
+    if not args.sem_bloqueante:
+        cenarios.insert(0, ('bloqueante', '/responder_bloqueante', None))
+
+    print(f'LLM simulado com {args.latencia_llm}s, embeddings com {args.latencia_embeddings}s '
+          f'e cota de {args.taxa_embeddings:g} chamadas/s, max em voo {args.max_em_voo}, fila {args.max_fila}')
+    print(f'{"cenário":>12} {"conc":>5} {"req/s":>8} {"p50 (s)":>8} {"p99 (s)":>8} {"429":>5} '
+          f'{"emb":>5} {"llm":>5}')
+    rodada = 0
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as silencio:
+            for nome, rota, agrupador in cenarios:
+                api.agrupador = agrupador
+                for nivel in args.niveis:
+                    rodada += 1
+                    total = nivel * args.requisicoes
+                    chamadas_embedder, chamadas_llm = embedder.chamadas, llm.chamadas
+                    latencias, status, duracao = asyncio.run(executar_carga(
+                        f'http://127.0.0.1:{porta}{rota}', gerar_perguntas(args.autores, rodada, total), nivel, total
+                    ))
+                    linha = (f'{nome:>12} {nivel:>5} {sum(status.values()) / duracao:8.1f} '
+                             f'{statistics.median(latencias) if latencias else float("nan"):8.3f} '
+                             f'{percentil(latencias, 99) if latencias else float("nan"):8.3f} {status[429]:>5} '
+                             f'{embedder.chamadas - chamadas_embedder:>5} {llm.chamadas - chamadas_llm:>5}')
+                    print(linha, file=sys.__stdout__)
+                    outros = {codigo: n for codigo, n in status.items() if codigo not in (200, 429)}
+                    if outros:
+                        print(f'ERRO: respostas inesperadas {outros}', file=sys.__stdout__)
+                        sys.exit(1)
+                    silencio.seek(0)
+                    silencio.truncate()
+    finally:
+        servidor.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+'''
+Geradores de arquivos sintéticos no formato dos CSVs do projeto, usados pelos
+benchmarks offline.
+'''
+import csv
+import random
+
+from benchmarks.servidor_fixture import LOCAIS, MESES, TAGS
+
+SOBRENOMES = ['Silva', 'Souza', 'Einstein', 'Austen', 'Rowling', 'Twain', 'Lispector', 'Assis']
+
+
+def nome_autor(indice: int) -> str:
+    return f'Autor {indice:05d} {SOBRENOMES[indice % len(SOBRENOMES)]}'
+
+
+def gerar_csv_autores(caminho: str, autores: int = 500, semente: int = 42) -> str:
+    '''
+    Gera um CSV no formato de `author_sem_duplicatas.csv`
+    (author, data nascimento, local nascimento, descricao).
+    '''
+    rnd = random.Random(semente)
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=['author', 'data nascimento', 'local nascimento', 'descricao'])
+        escritor.writeheader()
+        for indice in range(autores):
+            nome = nome_autor(indice)
+            frases = ' '.join(
+                f'{nome} wrote about {rnd.choice(TAGS)} and {rnd.choice(TAGS)} in {rnd.randint(1800, 2000)}.'
+                for _ in range(rnd.randint(5, 40))
+            )
+            escritor.writerow({
+                'author': nome,
+                'data nascimento': f'{rnd.choice(MESES)} {rnd.randint(1, 28)}, {rnd.randint(1700, 1990)}',
+                'local nascimento': rnd.choice(LOCAIS),
+                'descricao': frases,
+            })
+    return caminho
+
+
+def gerar_csv_citacoes(caminho: str, citacoes: int = 10000, autores: int = 500, semente: int = 42) -> str:
+    '''
+    Gera um CSV no formato de `dados.csv` (autor, citacao, tags, pagina), com
+    as tags gravadas como o coletor grava ("['a', 'b']"). Os autores seguem
+    uma distribuição desigual, como no site original.
+    '''
+    rnd = random.Random(semente)
+    pesos = [1 / (indice + 1) for indice in range(autores)]
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=['autor', 'citacao', 'tags', 'pagina'])
+        escritor.writeheader()
+        for indice, autor in enumerate(rnd.choices(range(autores), weights=pesos, k=citacoes)):
+            escritor.writerow({
+                'autor': nome_autor(autor),
+                'citacao': ' '.join(rnd.choice(TAGS) for _ in range(rnd.randint(8, 40))).capitalize() + '.',
+                'tags': str(rnd.sample(TAGS, rnd.randint(0, 5))),
+                'pagina': f'http://quotes.toscrape.com/page/{indice // 10 + 1}/',
+            })
+    return caminho
@@ -0,0 +1,314 @@
+'''
+Servidor HTTP local que imita o site quotes.toscrape.com.
+
+Gera páginas de listagem e páginas (about) de autores com a mesma marcação do
+site original, permitindo medir o coletor sem depender da internet. Também
+injeta falhas (503, 429 com Retry-After, conexões derrubadas e respostas
+lentas) para exercitar as novas tentativas do `ClienteHttp`.
+
+Uso:
+
+    $ cd src/
+    $ python -m benchmarks.servidor_fixture --autores 50 --citacoes 100 --latencia 0.02
+    $ python -m benchmarks.servidor_fixture --falhas 0.2 --desconexoes 0.05 --limite-taxa 20
+'''
+import argparse
+import hashlib
+import random
+import threading
+import time
+
+from collections import Counter, deque
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+TAGS = [
+    'change', 'deep-thoughts', 'thinking', 'world', 'abilities', 'choices',
+    'inspirational', 'life', 'live', 'miracle', 'miracles', 'aliteracy',
+    'books', 'classic', 'humor', 'be-yourself', 'adulthood', 'success',
+    'value', 'love', 'friendship', 'truth', 'simile', 'music',
+]
+
+MESES = [
+    'January', 'February', 'March', 'April', 'May', 'June', 'July',
+    'August', 'September', 'October', 'November', 'December',
+]
+
+LOCAIS = [
+    'in Ulm, Germany', 'in London, The United Kingdom', 'in Dorchester, Massachusetts, The United States',
+    'in Tupelo, Mississippi, The United States', 'in Paris, France', 'in Rio de Janeiro, Brazil',
+]
+
+PAGINA = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Quotes to Scrape</title>
+</head>
+<body>
+    <div class="container">
+        <div class="row header-box">
+            <div class="col-md-8">
+                <h1><a href="/" style="text-decoration: none">Quotes to Scrape</a></h1>
+            </div>
+        </div>
+{conteudo}
+    </div>
+</body>
+</html>
+'''
+
+CITACAO = '''
+    <div class="quote" itemscope itemtype="http://schema.org/CreativeWork">
+        <span class="text" itemprop="text">“{texto}”</span>
+        <span>by <small class="author" itemprop="author">{autor}</small>
+        <a href="/author/{slug}">(about)</a>
+        </span>
+        <div class="tags">
+            Tags:
+            <meta class="keywords" itemprop="keywords" content="{keywords}" /    >
+{tags}
+        </div>
+    </div>
+'''
+
+TAG = '            <a class="tag" href="/tag/{tag}/page/1/">{tag}</a>'
+
+PROXIMA = '''
+    <nav>
+        <ul class="pager">
+            <li class="next">
+                <a href="/page/{pagina}/">Next <span aria-hidden="true">&rarr;</span></a>
+            </li>
+        </ul>
+    </nav>
+'''
+
+AUTOR = '''
+    <div class="author-details">
+        <h3 class="author-title">{nome}</h3>
+        <p><strong>Born:</strong> <span class="author-born-date">{data}</span> <span class="author-born-location">{local}</span></p>
+        <p><strong>Description:</strong></p>
+        <div class="author-description">
+        {descricao}
+    </div>
+    </div>
+'''
+
+
+def gerar_site(autores: int = 50, citacoes: int = 100, por_pagina: int = 10, semente: int = 42) -> Dict[str, str]:
+    '''
+    Gera o mapa caminho -> HTML de um site no formato do quotes.toscrape.com.
+    O resultado é determinístico para uma mesma `semente`.
+    '''
+    rnd = random.Random(semente)
+    nomes = [f'Autor {i:04d} {rnd.choice(["Silva", "Souza", "Einstein", "Austen", "Rowling"])}' for i in range(autores)]
+    slugs = [nome.replace(' ', '-') for nome in nomes]
+
+    paginas: Dict[str, str] = {}
+
+    for nome, slug in zip(nomes, slugs):
+        frases = ' '.join(
+            f'"{nome}" wrote about {rnd.choice(TAGS)} and {rnd.choice(TAGS)} in {rnd.randint(1800, 2000)}.'
+            for _ in range(rnd.randint(5, 15))
+        )
+        paginas[f'/author/{slug}'] = PAGINA.format(conteudo=AUTOR.format(
+            nome=nome,
+            data=f'{rnd.choice(MESES)} {rnd.randint(1, 28)}, {rnd.randint(1700, 1990)}',
+            local=rnd.choice(LOCAIS),
+            descricao=f'\n        {frases}\n'
+        ))
+
+    blocos = []
+    for i in range(citacoes):
+        indice = rnd.randrange(autores)
+        tags = rnd.sample(TAGS, rnd.randint(0, 5))
+        blocos.append(CITACAO.format(
+            texto=f'Citação número {i} sobre {" e ".join(tags) or "nada"}, dita com convicção.',
+            autor=nomes[indice],
+            slug=slugs[indice],
+            keywords=','.join(tags),
+            tags='\n'.join(TAG.format(tag=tag) for tag in tags)
+        ))
+
+    total_paginas = max(1, -(-citacoes // por_pagina))
+    for numero in range(1, total_paginas + 1):
+        conteudo = ''.join(blocos[(numero - 1) * por_pagina:numero * por_pagina])
+        if numero < total_paginas:
+            conteudo += PROXIMA.format(pagina=numero + 1)
+        paginas[f'/page/{numero}/'] = PAGINA.format(conteudo=conteudo)
+
+    paginas['/'] = paginas['/page/1/']
+    return paginas
+
+
+class ServidorFixture:
+    '''
+    Servidor HTTP em thread que responde com as páginas geradas por `gerar_site`.
+    `latencia` simula o tempo de ida e volta (segundos) de cada requisição.
+    Com `condicional`, envia ETag/Last-Modified e responde 304 a requisições
+    condicionais de páginas que não mudaram.
+
+    Injeção de falhas (sorteadas por requisição, reproduzíveis com `semente_falhas`):
+
+    * `falhas`: fração das requisições respondidas com 503 (com `Retry-After`,
+      se `retry_after` for informado);
+    * `desconexoes`: fração em que a conexão é fechada sem resposta;
+    * `lentas`: fração atrasada em `atraso_lento` segundos (para timeouts);
+    * `limite_taxa`: acima dessas requisições por segundo, responde 429 com
+      `Retry-After` (`retry_after` ou 1 s).
+
+    As falhas injetadas ficam em `falhas_injetadas`.
+    Pode ser usado como context manager; `url` aponta para a raiz do site.
+    '''
+
+    def __init__(self, paginas: Optional[Dict[str, str]] = None, latencia: float = 0.0,
+                 host: str = '127.0.0.1', porta: int = 0, condicional: bool = True,
+                 falhas: float = 0.0, desconexoes: float = 0.0, lentas: float = 0.0,
+                 atraso_lento: float = 1.0, limite_taxa: float = 0.0, retry_after: Optional[float] = None,
+                 semente_falhas: int = 0, **kwargs_site):
+        self.paginas = paginas if paginas is not None else gerar_site(**kwargs_site)
+        self.latencia = latencia
+        self.condicional = condicional
+        self.falhas = falhas
+        self.desconexoes = desconexoes
+        self.lentas = lentas
+        self.atraso_lento = atraso_lento
+        self.limite_taxa = limite_taxa
+        self.retry_after = retry_after
+        self.last_modified = formatdate(usegmt=True)
+        self.requisicoes = 0
+        self.nao_modificadas = 0
+        self.falhas_injetadas: Counter = Counter()
+        self._aleatorio = random.Random(semente_falhas)
+        self._recentes: deque = deque()
+        self._lock = threading.Lock()
+
+        servidor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with servidor._lock:
+                    servidor.requisicoes += 1
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+
+                falha = servidor._sortear_falha()
+                if falha == 'desconexao':
+                    self.close_connection = True
+                    return
+                if falha == 'lenta':
+                    time.sleep(servidor.atraso_lento)
+                elif falha in ('503', '429'):
+                    self.send_response(int(falha))
+                    retry_after = servidor.retry_after if falha == '503' else (servidor.retry_after or 1)
+                    if retry_after is not None:
+                        self.send_header('Retry-After', f'{retry_after:g}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                html = servidor.paginas.get(self.path)
+                if html is None:
+                    self.send_error(404)
+                    return
+
+                corpo = html.encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(corpo).hexdigest()[:16]
+
+                if servidor.condicional and self.headers.get('If-None-Match') == etag:
+                    with servidor._lock:
+                        servidor.nao_modificadas += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if servidor.condicional:
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', servidor.last_modified)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                try:
+                    self.wfile.write(corpo)
+                except (BrokenPipeError, ConnectionResetError):
+                    # O cliente desistiu (timeout) de uma resposta lenta
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, porta), _Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def _sortear_falha(self) -> Optional[str]:
+        with self._lock:
+            if self.limite_taxa:
+                agora = time.monotonic()
+                while self._recentes and agora - self._recentes[0] > 1.0:
+                    self._recentes.popleft()
+                if len(self._recentes) >= self.limite_taxa:
+                    self.falhas_injetadas['429'] += 1
+                    return '429'
+                self._recentes.append(agora)
+
+            sorteio = self._aleatorio.random()
+            for falha, fracao in (('desconexao', self.desconexoes), ('503', self.falhas), ('lenta', self.lentas)):
+                if sorteio < fracao:
+                    self.falhas_injetadas[falha] += 1
+                    return falha
+                sorteio -= fracao
+            return None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._httpd.server_address[:2]
+        return f'http://{host}:{porta}'
+
+    def iniciar(self) -> 'ServidorFixture':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'ServidorFixture':
+        return self.iniciar()
+
+    def __exit__(self, *exc) -> None:
+        self.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local no formato do quotes.toscrape.com')
+    parser.add_argument('--autores', type=int, default=50)
+    parser.add_argument('--citacoes', type=int, default=100)
+    parser.add_argument('--latencia', type=float, default=0.0)
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--falhas', type=float, default=0.0, help='fração de respostas 503')
+    parser.add_argument('--desconexoes', type=float, default=0.0, help='fração de conexões derrubadas')
+    parser.add_argument('--lentas', type=float, default=0.0, help='fração de respostas lentas')
+    parser.add_argument('--limite-taxa', type=float, default=0.0, help='requisições/s acima das quais responde 429')
+    args = parser.parse_args()
+
+    servidor = ServidorFixture(latencia=args.latencia, porta=args.porta,
+                               autores=args.autores, citacoes=args.citacoes,
+                               falhas=args.falhas, desconexoes=args.desconexoes, lentas=args.lentas,
+                               limite_taxa=args.limite_taxa)
+    print(f'Servindo {len(servidor.paginas)} páginas em {servidor.url}')
+    try:
+        servidor._httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == '__main__':
+    main()
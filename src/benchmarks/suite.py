@@ -0,0 +1,374 @@
+'''
+Suíte de benchmarks de ponta a ponta, offline e reprodutível:
+raspagem -> índice -> respostas -> dashboard.
+
+Para cada escala (múltiplo do quotes.toscrape.com: 50 autores e 100 citações
+por unidade), um diretório novo recebe o resultado de cada cenário, que
+alimenta o seguinte. Cada cenário roda em um processo novo (os módulos do
+agente, da API e do dashboard leem a configuração na importação):
+
+* coleta: `coletor.main` contra o `ServidorFixture` (site local em escala);
+* indexacao: `agent.reconstruir_indice` sobre o `author.csv` raspado, com o
+  `EmbedderFalso` (embeddings determinísticos com latência simulada);
+* responder: vazão e latência do `/responder` (uvicorn local, LLM `ChatFalso`
+  e cache de respostas desligado), com o índice do cenário anterior;
+* dashboard: carga do `dados.csv` raspado (`callbaks`) e latência de
+  `update_dashboard` e `update_lista_citacoes` para cada autor.
+
+Os resultados são gravados em JSON (`--saida`). Com `--referencia`, os tempos
+são comparados com os de uma execução anterior: uma piora acima de
+`--tolerancia` (ou contagens diferentes de páginas, autores, citações e
+chunks) é reportada como regressão e o processo termina com erro.
+
+    $ cd src/
+    $ python -m benchmarks.suite --escalas 1 10 --saida base.json
+    $ python -m benchmarks.suite --escalas 1 10 --saida atual.json --referencia base.json
+'''
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1]
+
+# Uma unidade de escala é o tamanho do site original
+AUTORES_POR_ESCALA = 50
+CITACOES_POR_ESCALA = 100
+
+CENARIOS = ('coleta', 'indexacao', 'responder', 'dashboard')
+
+# Cenários cujos arquivos cada cenário lê
+DEPENDENCIAS = {
+    'indexacao': ('coleta',),
+    'responder': ('coleta', 'indexacao'),
+    'dashboard': ('coleta',),
+}
+
+# Métricas comparadas com a referência: o sentido em que melhoram e a
+# diferença absoluta abaixo da qual uma piora é ruído de medida
+COMPARADAS = {
+    'coleta': {'tempo_s': ('menor', 0.1), 'paginas_por_s': ('maior', 0)},
+    'indexacao': {'tempo_s': ('menor', 0.1)},
+    'responder': {'req_por_s': ('maior', 0), 'p50_ms': ('menor', 5.0)},
+    'dashboard': {'carga_s': ('menor', 0.05), 'atualizar_p50_ms': ('menor', 1.0), 'lista_p50_ms': ('menor', 1.0)},
+}
+
+# Parâmetros que não alteram as medidas de um cenário
+PARAMETROS_LIVRES = ('escalas', 'cenarios', 'tolerancia')
+
+# Contagens que não podem mudar entre execuções com os mesmos parâmetros
+CONTAGENS = {
+    'coleta': ('paginas', 'autores', 'citacoes'),
+    'indexacao': ('documentos', 'chunks'),
+}
+
+
+def _ms(segundos: float) -> float:
+    return round(segundos * 1000, 3)
+
+
+def _percentil(valores, fracao: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(fracao * (len(ordenados) - 1))))]
+
+
+def _ambiente(diretorio: str, args) -> None:
+    # Embedder e LLM simulados, com os arquivos da escala em `diretorio`
+    os.environ.update({
+        'GOOGLE_API_KEY': 'benchmark-offline',
+        'ANONYMIZED_TELEMETRY': 'False',
+        'COLETOR_TAXA': str(args.taxa_coleta),
+        'EMBEDDINGS_MODELO': 'falso',
+        'EMBEDDINGS_FALSO_LATENCIA': str(args.latencia_embeddings),
+        'LLM_MODELO': 'falso',
+        'LLM_FALSO_LATENCIA': str(args.latencia_llm),
+        'RESPOSTAS_CACHE': '0',
+        'AUTHOR_CSV': os.path.join(diretorio, 'author.csv'),
+        'INDICE_VETORIAL_DIR': os.path.join(diretorio, 'indice'),
+        'EMBEDDINGS_CACHE_DIR': os.path.join(diretorio, 'cache_embeddings'),
+        'DADOS_CSV': os.path.join(diretorio, 'dados.csv'),
+        'NUVENS_CACHE_DIR': os.path.join(diretorio, 'nuvens'),
+    })
+
+
+def _linhas_csv(caminho: str):
+    with open(caminho, 'r', newline='', encoding='utf-8') as arquivo:
+        return list(csv.DictReader(arquivo))
+
+
+def medir_coleta(diretorio: str, escala: int, args) -> dict:
+    sys.path.insert(0, str(SRC / 'components'))
+    import coletor
+    from benchmarks.servidor_fixture import ServidorFixture
+
+    with ServidorFixture(latencia=args.latencia_http, autores=AUTORES_POR_ESCALA * escala,
+                         citacoes=CITACOES_POR_ESCALA * escala) as servidor:
+        inicio = time.perf_counter()
+        coletor.main(servidor.url, diretorio)
+        tempo = time.perf_counter() - inicio
+
+    with open(os.path.join(diretorio, 'coletor_metricas.json'), 'r', encoding='utf-8') as arquivo:
+        metricas = json.load(arquivo)
+    return {
+        'tempo_s': round(tempo, 4),
+        'paginas': metricas['paginas'],
+        'autores': len(_linhas_csv(os.path.join(diretorio, 'author.csv'))),
+        'citacoes': len(_linhas_csv(os.path.join(diretorio, 'dados.csv'))),
+        'paginas_por_s': round((metricas['paginas'] + metricas['autores']) / tempo, 2),
+        'retries': metricas['retries'],
+        'busca_p95_ms': _ms(metricas['etapas']['busca']['p95']),
+    }
+
+
+def medir_indexacao(diretorio: str, escala: int, args) -> dict:
+    from components import agent
+
+    inicio = time.perf_counter()
+    vectorstore = agent.reconstruir_indice(os.environ['AUTHOR_CSV'], os.environ['INDICE_VETORIAL_DIR'])
+    tempo = time.perf_counter() - inicio
+    return {
+        'tempo_s': round(tempo, 4),
+        'documentos': len(_linhas_csv(os.environ['AUTHOR_CSV'])),
+        'chunks': len(vectorstore.get(include=[])['ids']),
+        'chamadas_embedding': vectorstore.embeddings.base.chamadas,
+    }
+
+
+def medir_responder(diretorio: str, escala: int, args) -> dict:
+    import asyncio
+
+    from benchmarks.carga_responder import executar_carga, iniciar_servidor, porta_livre
+    from benchmarks.servidor_fixture import TAGS
+    import app as api
+    from components.perfil_rag import metricas_rag
+
+    autores = [linha['author'] for linha in _linhas_csv(os.environ['AUTHOR_CSV'])]
+    perguntas = [f'Onde nasceu {autores[i % len(autores)]}?' if i % 2 == 0
+                 else f'Quem escreveu sobre {TAGS[i % len(TAGS)]} em {1800 + i % 200}?'
+                 for i in range(args.requisicoes)]
+
+    porta = porta_livre()
+    servidor = iniciar_servidor(api.app, porta)
+    try:
+        url = f'http://127.0.0.1:{porta}/responder'
+        # Aquecimento: abertura do índice e construção da cadeia ficam fora da medida
+        asyncio.run(executar_carga(url, perguntas[:1], 1, 1))
+        antes = dict(metricas_rag.contadores)
+        latencias, status, duracao = asyncio.run(executar_carga(url, perguntas, args.concorrencia, len(perguntas)))
+    finally:
+        servidor.should_exit = True
+
+    resumo = metricas_rag.resumo()
+    respondidas = resumo['requisicoes'] - antes['requisicoes']
+    return {
+        'requisicoes': sum(status.values()),
+        'concorrencia': args.concorrencia,
+        'status': {str(codigo): total for codigo, total in status.items()},
+        'req_por_s': round(sum(status.values()) / duracao, 2),
+        'p50_ms': _ms(statistics.median(latencias)) if latencias else None,
+        'p99_ms': _ms(_percentil(latencias, 0.99)) if latencias else None,
+        'tokens_prompt_medio': round((resumo['tokens_prompt'] - antes['tokens_prompt']) / max(1, respondidas), 1),
+        'etapas_p50_ms': {etapa: _ms(histograma['p50']) for etapa, histograma in resumo['etapas'].items()
+                          if histograma['contagem']},
+    }
+
+
+def medir_dashboard(diretorio: str, escala: int, args) -> dict:
+    sys.path.insert(0, str(SRC / 'dash'))
+    # Só a leitura e o pré-processamento dos dados entram em `carga_s`
+    import dash  # noqa: F401
+    import dash_mantine_components  # noqa: F401
+    import agregados  # noqa: F401
+    import nuvem_tags  # noqa: F401
+
+    inicio = time.perf_counter()
+    import callbaks
+    carga = time.perf_counter() - inicio
+
+    autores = callbaks.autores_unicos
+    atualizar, lista = [], []
+    for autor in autores:
+        inicio = time.perf_counter()
+        callbaks.update_dashboard(autor)
+        atualizar.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        callbaks.update_lista_citacoes(autor, 1)
+        lista.append(time.perf_counter() - inicio)
+
+    # Nuvem de tags renderizada sem cache, para alguns autores
+    cache = callbaks.cache_nuvens
+    nuvens = [(autor, callbaks.dados_autores[autor]['frequencias']) for autor in autores[:args.nuvens]]
+    nuvens = [(cache.chave(autor, frequencias), autor, frequencias) for autor, frequencias in nuvens if frequencias]
+    inicio = time.perf_counter()
+    for nuvem in nuvens:
+        cache.png(*nuvem)
+    nuvem = (time.perf_counter() - inicio) / max(1, len(nuvens))
+
+    return {
+        'carga_s': round(carga, 4),
+        'autores': len(autores),
+        'atualizar_p50_ms': _ms(statistics.median(atualizar)),
+        'atualizar_p99_ms': _ms(_percentil(atualizar, 0.99)),
+        'lista_p50_ms': _ms(statistics.median(lista)),
+        'lista_p99_ms': _ms(_percentil(lista, 0.99)),
+        'nuvem_ms': _ms(nuvem),
+    }
+
+
+MEDIDORES = {
+    'coleta': medir_coleta,
+    'indexacao': medir_indexacao,
+    'responder': medir_responder,
+    'dashboard': medir_dashboard,
+}
+
+
+def executar_cenario(cenario: str, diretorio: str, escala: int, args) -> dict:
+    '''
+    Roda um cenário em um processo novo; retorna as métricas ou {'erro': ...}.
+    '''
+    comando = [sys.executable, '-m', 'benchmarks.suite', '--cenario', cenario, '--diretorio', diretorio,
+               '--escalas', str(escala), '--latencia-http', str(args.latencia_http), '--taxa-coleta', str(args.taxa_coleta),
+               '--latencia-embeddings', str(args.latencia_embeddings), '--latencia-llm', str(args.latencia_llm),
+               '--requisicoes', str(args.requisicoes), '--concorrencia', str(args.concorrencia),
+               '--nuvens', str(args.nuvens)]
+    processo = subprocess.run(comando, cwd=SRC, capture_output=True, text=True)
+    linhas = processo.stdout.strip().splitlines()
+    if processo.returncode != 0 or not linhas:
+        return {'erro': (processo.stderr.strip().splitlines() or ['sem saída'])[-1]}
+    return json.loads(linhas[-1])
+
+
+def comparar(resultados: list, referencia: dict, tolerancia: float) -> list:
+    '''
+    Regressões de `resultados` em relação aos resultados de `referencia`.
+    '''
+    anteriores = {(item['escala'], item['cenario']): item['metricas'] for item in referencia['resultados']}
+    regressoes = []
+    for item in resultados:
+        anterior = anteriores.get((item['escala'], item['cenario']))
+        metricas = item['metricas']
+        if anterior is None or 'erro' in anterior:
+            continue
+        if 'erro' in metricas:
+            regressoes.append(f'{item["cenario"]} (escala {item["escala"]}): {metricas["erro"]}')
+            continue
+        for chave in CONTAGENS.get(item['cenario'], ()):
+            if metricas.get(chave) != anterior.get(chave):
+                regressoes.append(f'{item["cenario"]} (escala {item["escala"]}): {chave} '
+                                  f'{anterior.get(chave)} -> {metricas.get(chave)}')
+        for chave, (sentido, folga) in COMPARADAS[item['cenario']].items():
+            atual, antes = metricas.get(chave), anterior.get(chave)
+            if not atual or not antes or abs(atual - antes) <= folga:
+                continue
+            piora = atual / antes - 1 if sentido == 'menor' else antes / atual - 1
+            if piora > tolerancia:
+                regressoes.append(f'{item["cenario"]} (escala {item["escala"]}): {chave} '
+                                  f'{antes} -> {atual} ({piora:+.0%})')
+    return regressoes
+
+
+def _comparaveis(parametros: dict) -> dict:
+    return {chave: valor for chave, valor in parametros.items() if chave not in PARAMETROS_LIVRES}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def _resumo(metricas: dict) -> str:
+    if 'erro' in metricas:
+        return f'ERRO: {metricas["erro"]}'
+    return ', '.join(f'{chave}={valor}' for chave, valor in metricas.items() if not isinstance(valor, dict))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks offline: coleta, índice, respostas e dashboard')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10],
+                        help=f'múltiplos do site original ({AUTORES_POR_ESCALA} autores, '
+                             f'{CITACOES_POR_ESCALA} citações)')
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS))
+    parser.add_argument('--saida', default='suite_resultados.json', help='arquivo JSON com os resultados')
+    parser.add_argument('--referencia', help='JSON de uma execução anterior, para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='piora relativa aceita (0.25 = 25%%)')
+    parser.add_argument('--latencia-http', type=float, default=0.005, help='latência do servidor local (s)')
+    parser.add_argument('--taxa-coleta', type=float, default=0.0,
+                        help='requisições/s do coletor (COLETOR_TAXA; 0 = sem limite)')
+    parser.add_argument('--latencia-embeddings', type=float, default=0.01,
+                        help='latência simulada por chamada de embeddings (s)')
+    parser.add_argument('--latencia-llm', type=float, default=0.05, help='latência simulada do LLM (s)')
+    parser.add_argument('--requisicoes', type=int, default=64, help='perguntas enviadas ao /responder')
+    parser.add_argument('--concorrencia', type=int, default=16, help='requisições simultâneas ao /responder')
+    parser.add_argument('--nuvens', type=int, default=3, help='nuvens de tags renderizadas sem cache')
+    parser.add_argument('--cenario', choices=CENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--diretorio', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario:
+        # Processo filho: só a última linha da saída padrão (o JSON) é lida
+        _ambiente(args.diretorio, args)
+        with contextlib.redirect_stdout(sys.stderr):
+            metricas = MEDIDORES[args.cenario](args.diretorio, args.escalas[0], args)
+        print(json.dumps(metricas))
+        return
+
+    parametros = {chave: valor for chave, valor in vars(args).items()
+                  if chave not in ('cenario', 'diretorio', 'saida', 'referencia')}
+    # Os cenários pedidos e os que produzem os arquivos que eles leem
+    cenarios = [cenario for cenario in CENARIOS
+                if cenario in args.cenarios
+                or any(cenario in DEPENDENCIAS.get(pedido, ()) for pedido in args.cenarios)]
+    resultados = []
+    for escala in args.escalas:
+        print(f'escala {escala}: {AUTORES_POR_ESCALA * escala} autores, {CITACOES_POR_ESCALA * escala} citações')
+        with tempfile.TemporaryDirectory() as diretorio:
+            for cenario in cenarios:
+                metricas = executar_cenario(cenario, diretorio, escala, args)
+                resultados.append({'escala': escala, 'cenario': cenario, 'metricas': metricas})
+                print(f'  {cenario:>10}: {_resumo(metricas)}')
+
+    relatorio = {
+        'data': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': parametros,
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f'resultados gravados em {args.saida}')
+
+    falhou = any('erro' in item['metricas'] for item in resultados)
+    if args.referencia:
+        with open(args.referencia, 'r', encoding='utf-8') as arquivo:
+            referencia = json.load(arquivo)
+        if _comparaveis(referencia.get('parametros', {})) != _comparaveis(parametros):
+            print('aviso: a referência foi gerada com outros parâmetros')
+        regressoes = comparar(resultados, referencia, args.tolerancia)
+        for regressao in regressoes:
+            print(f'REGRESSÃO: {regressao}')
+        if not regressoes:
+            print(f'sem regressões em relação a {args.referencia} (tolerância {args.tolerancia:.0%})')
+        falhou = falhou or bool(regressoes)
+
+    if falhou:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+'''
+Mede o tempo de importação de `src/app.py` e confere um orçamento.
+
+Cada medição roda em um processo novo, sem GOOGLE_API_KEY e sem terminal (a
+importação não pode pedir a chave nem abrir o índice). Reporta a mediana e os
+módulos mais lentos segundo `python -X importtime`; termina com código 1 se a
+mediana passar do orçamento:
+
+    $ cd src/
+    $ python -m benchmarks.tempo_importacao --orcamento 1.5
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1]
+
+
+def _ambiente():
+    ambiente = dict(os.environ)
+    ambiente.pop('GOOGLE_API_KEY', None)
+    ambiente['PYTHONPATH'] = os.pathsep.join(filter(None, [str(SRC), ambiente.get('PYTHONPATH')]))
+    ambiente.setdefault('ANONYMIZED_TELEMETRY', 'False')
+    return ambiente
+
+
+def medir(modulo: str, diretorio: str) -> float:
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {modulo}'], cwd=diretorio, env=_ambiente(),
+                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - inicio
+
+
+def modulos_mais_lentos(modulo: str, diretorio: str, quantidade: int = 10):
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'], cwd=diretorio,
+                              env=_ambiente(), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, text=True, check=True)
+    tempos = []
+    for linha in processo.stderr.splitlines():
+        partes = linha.split('|')
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            nome = partes[2].rstrip()
+            nivel = (len(nome) - len(nome.lstrip(' ')) - 1) // 2
+            # Importações diretas do módulo medido (nível 1), pelo tempo acumulado
+            if nivel == 1:
+                tempos.append((int(partes[1]), nome.strip()))
+    return sorted(tempos, reverse=True)[:quantidade]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de importação da API')
+    parser.add_argument('--modulo', default='app')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--orcamento', type=float, default=1.5, help='mediana máxima aceita (s)')
+    args = parser.parse_args()
+
+    # Diretório vazio: a importação não deve criar nem ler nada além do log
+    with tempfile.TemporaryDirectory() as diretorio:
+        medir(args.modulo, diretorio)  # aquece o cache de bytecode
+        tempos = [medir(args.modulo, diretorio) for _ in range(args.repeticoes)]
+        lentos = modulos_mais_lentos(args.modulo, diretorio)
+
+    mediana = statistics.median(tempos)
+    print(f'import {args.modulo}: mediana {mediana:.3f}s (mín {min(tempos):.3f}s, máx {max(tempos):.3f}s), '
+          f'orçamento {args.orcamento:.3f}s')
+    print(f'importações diretas de {args.modulo} mais lentas (tempo acumulado):')
+    for us, nome in lentos:
+        print(f'  {us / 1e6:7.3f}s  {nome}')
+
+    if mediana > args.orcamento:
+        print('ERRO: tempo de importação acima do orçamento')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,29 @@
+import argparse
+import asyncio
 import csv
+import hashlib
+import json
 import logging
 import os
 import getpass
+import sys
+import threading
+import time
 
 # Modelos e Componentes do LangChain
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
+# (langchain_google_genai, langchain_chroma, o text splitter e os modelos de
+# chat são importados sob demanda: não são necessários para importar este módulo)
 from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
+from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
 from langchain.schema.output_parser import StrOutputParser
 from langchain.docstore.document import Document
-from langchain_community.document_loaders import PyPDFLoader
+
+from components.cache_respostas import CacheRespostas
+from components.compressor_contexto import CompressorContexto
+from components.embeddings import CacheEmbeddings, EmbedderFalso, EmbeddingsEmLote
+from components.perfil_rag import configuracao, medir_etapa, perfilar
+from components.recuperador import RecuperadorHibrido
+from components.trava_arquivo import trava_arquivo
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,34 +36,69 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)    
 
-if not os.getenv('GOOGLE_API_KEY'):
-    os.environ['GOOGLE_API_KEY'] = getpass.getpass('Enter your Google API key: ')
+
+def garantir_chave_api():
+    '''
+    Garante a GOOGLE_API_KEY antes de criar os modelos do Google. O prompt
+    interativo só é usado em um terminal; na API a chave deve vir do ambiente (ou .env).
+    '''
+    if not os.getenv('GOOGLE_API_KEY'):
+        if not sys.stdin or not sys.stdin.isatty():
+            raise RuntimeError('GOOGLE_API_KEY não definida.')
+        os.environ['GOOGLE_API_KEY'] = getpass.getpass('Enter your Google API key: ')
+
 
 # --- PROCESSAMENTO E PREPARAÇÃO DOS DADOS CSV ---
+def ler_linhas_autores(caminho):
+    '''
+    Linhas do arquivo de autores como dicionários. Além do CSV, aceita os arquivos
+    Parquet/Arrow gravados pelo coletor (lidos com memory mapping). Colunas como
+    `data_nascimento` (coletor) viram 'data nascimento', como no CSV de autores.
+    '''
+    from components.escritor_colunar import formato_do_arquivo, ler_tabela
+
+    if formato_do_arquivo(caminho) == 'csv':
+        with open(caminho, 'r', newline='', encoding='utf-8') as file_csv:
+            dados_brutos = csv.DictReader(file_csv)
+            dados_brutos.fieldnames = [campo.replace('_', ' ') for campo in dados_brutos.fieldnames or []]
+            yield from dados_brutos
+        return
+
+    tabela = ler_tabela(caminho)
+    tabela = tabela.rename_columns([coluna.replace('_', ' ') for coluna in tabela.column_names])
+    for lote in tabela.to_batches():
+        yield from lote.to_pylist()
+
+
+def conteudo_autor(item):
+    '''
+    Texto do documento de um autor (uma linha do arquivo de autores ou os metadados de um chunk).
+    '''
+    return f'author: {item['author']}\n data nascimento: {item['data nascimento']}\n local nascimento: {item['local nascimento']} \n descricao: {item['descricao']}'
+
+
 def processar_csv_author_preparar_chunks(file_path_csv):
     '''
-    Converte os dados brutos de arquivos csv em Documentos do LangChain e os divide em chunks.
+    Converte os dados brutos do arquivo de autores (CSV, Parquet ou Arrow) em Documentos do LangChain e os divide em chunks.
     '''
     logger.info('Iniciando processamento e chunking dos documentos...')    
     documentos_langchain = []
 
-    with open(file_path_csv, 'r', newline='', encoding='utf-8') as file_csv:
-        dados_brutos = csv.DictReader(file_csv)
-
-        for item in dados_brutos:            
-            # Combinamos pergunta e resposta em um único texto para cada author author,data nascimento,local nascimento,descricao,
-            conteudo = f'author: {item['author']}\n data nascimento: {item['data nascimento']}\n local nascimento: {item['local nascimento']} \n descricao: {item['descricao']}'
-            documento = Document(
-                page_content=conteudo,
-                metadata={
-                    'author': item['author'],
-                    'data nascimento': item['data nascimento'],
-                    'local nascimento': item['local nascimento'],
-                    'descricao': item['descricao'],
-                    }
-            )
-            documentos_langchain.append(documento)
-    
+    for item in ler_linhas_autores(file_path_csv):
+        # Combinamos pergunta e resposta em um único texto para cada author author,data nascimento,local nascimento,descricao,
+        documento = Document(
+            page_content=conteudo_autor(item),
+            metadata={
+                'author': item['author'],
+                'data nascimento': item['data nascimento'],
+                'local nascimento': item['local nascimento'],
+                'descricao': item['descricao'],
+                }
+        )
+        documentos_langchain.append(documento)
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     # Text Splitter: Divide os documentos em pedaços menores (chunks)
     # Ideal para textos longos, garantindo que o contexto não se perca.
     text_splitter = RecursiveCharacterTextSplitter(
@@ -65,35 +112,249 @@ def processar_csv_author_preparar_chunks(file_path_csv):
 
 
 # --- CRIAÇÃO DA BASE DE CONHECIMENTO VETORIAL ---
-def criar_base_vetorial(chunks):
+# Definindo o caminho do arquivo CSV e do índice persistido
+file_author_csv = os.getenv('AUTHOR_CSV', './documents/author_sem_duplicatas.csv')
+diretorio_indice = os.getenv('INDICE_VETORIAL_DIR', './documents/indice_vetorial')
+COLECAO_AUTORES = 'autores'
+
+
+def criar_embeddings():
     '''
-    Cria a base de dados de vetores usando ChromaDB e embeddings do Gemini AI.
+    Modelo de Embeddings: Transforma texto em vetores numéricos.
+    As chamadas passam pela etapa de lotes, concorrência, backoff e cache local.
+    Com EMBEDDINGS_MODELO=falso usa um embedder local determinístico (uso offline).
     '''
-    logger.info('Criando a base de dados vetorial (Vector Store)...')
-    # Modelo de Embeddings: Transforma texto em vetores numéricos
-    embeddings = GoogleGenerativeAIEmbeddings(model='models/text-embedding-004')
+    modelo = os.getenv('EMBEDDINGS_MODELO', 'models/text-embedding-004')
+    if modelo == 'falso':
+        base = EmbedderFalso(
+            latencia=float(os.getenv('EMBEDDINGS_FALSO_LATENCIA', '0')),
+            taxa=float(os.getenv('EMBEDDINGS_FALSO_TAXA', '0'))
+        )
+    else:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        garantir_chave_api()
+        base = GoogleGenerativeAIEmbeddings(model=modelo)
+
+    return EmbeddingsEmLote(
+        base,
+        modelo,
+        cache=CacheEmbeddings(os.getenv('EMBEDDINGS_CACHE_DIR', './documents/cache_embeddings')),
+        tamanho_lote=int(os.getenv('EMBEDDINGS_LOTE', '100')),
+        max_concorrencia=int(os.getenv('EMBEDDINGS_CONCORRENCIA', '4')),
+        max_consultas=int(os.getenv('EMBEDDINGS_CONSULTAS_MAX_ITENS', '10000'))
+    )
 
-    # ChromaDB que roda em memória.
-       
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings
+
+def hash_chunk(chunk):
+    '''
+    Hash do conteúdo de um chunk (texto + metadados), usado como id no índice.
+    Um chunk só é embedado novamente se esse hash mudar.
+    '''
+    conteudo = json.dumps(
+        {'page_content': chunk.page_content, 'metadata': chunk.metadata},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def carregar_base_vetorial(diretorio=diretorio_indice, embeddings=None):
+    '''
+    Abre o índice ChromaDB persistido em disco, sem calcular nenhum embedding.
+    '''
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        collection_name=COLECAO_AUTORES,
+        embedding_function=embeddings or criar_embeddings(),
+        persist_directory=diretorio
+    )
+
+
+def criar_base_vetorial(chunks, diretorio=diretorio_indice, embeddings=None, tamanho_lote=500):
+    '''
+    Cria ou atualiza incrementalmente a base de vetores persistida no ChromaDB.
+    Cada chunk é identificado pelo hash do seu conteúdo: apenas chunks novos ou
+    alterados são embedados e os que não existem mais no CSV são removidos.
+    '''
+    logger.info('Atualizando a base de dados vetorial (Vector Store)...')
+    vectorstore = carregar_base_vetorial(diretorio, embeddings)
+
+    chunks_por_id = {}
+    for chunk in chunks:
+        chunks_por_id.setdefault(hash_chunk(chunk), chunk)
+
+    ids_existentes = set(vectorstore.get(include=[])['ids'])
+    ids_novos = [id_chunk for id_chunk in chunks_por_id if id_chunk not in ids_existentes]
+    ids_removidos = list(ids_existentes - chunks_por_id.keys())
+
+    if ids_removidos:
+        vectorstore.delete(ids=ids_removidos)
+
+    for inicio in range(0, len(ids_novos), tamanho_lote):
+        lote = ids_novos[inicio:inicio + tamanho_lote]
+        vectorstore.add_documents([chunks_por_id[id_chunk] for id_chunk in lote], ids=lote)
+
+    if ids_novos or ids_removidos or not versao_indice(diretorio):
+        gravar_versao_indice(diretorio, chunks_por_id)
+
+    logger.info(
+        f'Base de dados vetorial atualizada: {len(ids_novos)} chunks embedados, '
+        f'{len(ids_removidos)} removidos, {len(chunks_por_id) - len(ids_novos)} reaproveitados.'
     )
-    logger.info('Base de dados vetorial criada com sucesso!')
     return vectorstore
 
 
-# --- LÓGICA PRINCIPAL DE ORQUESTRAÇÃO ---
-# Definindo o caminho do arquivo CSV
-file_author_csv = './documents/author_sem_duplicatas.csv'
-chunks_processados_csv_author = processar_csv_author_preparar_chunks(file_author_csv)
-vectorstore = criar_base_vetorial(chunks_processados_csv_author)
+def gravar_versao_indice(diretorio, ids):
+    '''
+    Grava a versão do índice (hash dos ids dos chunks), usada para invalidar
+    o cache de respostas quando o índice é reconstruído.
+    '''
+    versao = hashlib.sha256('\n'.join(sorted(ids)).encode('utf-8')).hexdigest()
+    caminho = os.path.join(diretorio, 'versao')
+    temporario = os.path.join(diretorio, 'versao.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(versao)
+    os.replace(temporario, caminho)
+    # Uma reconstrução neste processo vale imediatamente, sem esperar o intervalo
+    _versoes_indice[diretorio] = (versao, os.stat(caminho).st_mtime_ns, time.monotonic())
+
+
+# Versão do índice em memória, por diretório: (versão, mtime do arquivo, última verificação)
+_versoes_indice = {}
+_intervalo_versao = float(os.getenv('INDICE_VERSAO_INTERVALO', '2'))
+
+
+def versao_indice(diretorio=diretorio_indice):
+    '''
+    Versão gravada por `gravar_versao_indice` ('' se não houver). Consultada a
+    cada pergunta (recuperador e cache de respostas), fica em memória: o mtime
+    do arquivo é verificado no máximo a cada INDICE_VERSAO_INTERVALO segundos,
+    para notar uma reconstrução feita por outro processo, e o arquivo só é
+    relido quando muda.
+    '''
+    agora = time.monotonic()
+    versao, mtime, verificada = _versoes_indice.get(diretorio, ('', None, None))
+    if verificada is not None and agora - verificada < _intervalo_versao:
+        return versao
+
+    caminho = os.path.join(diretorio, 'versao')
+    try:
+        mtime_atual = os.stat(caminho).st_mtime_ns
+    except FileNotFoundError:
+        mtime_atual, versao = None, ''
+    else:
+        if mtime_atual != mtime:
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                versao = arquivo.read()
+    _versoes_indice[diretorio] = (versao, mtime_atual, agora)
+    return versao
+
+
+def reconstruir_indice(file_path_csv=file_author_csv, diretorio=diretorio_indice):
+    '''
+    (Re)constrói offline o índice persistido a partir do CSV de autores.
+    '''
+    chunks = processar_csv_author_preparar_chunks(file_path_csv)
+    return criar_base_vetorial(chunks, diretorio)
+
+
+_vectorstore = None
+_lock_vectorstore = threading.Lock()
+
+
+def obter_vectorstore():
+    '''
+    Carrega o índice persistido na primeira consulta. Se ainda não houver índice
+    em disco, ele é construído a partir do CSV por um único processo: os demais
+    workers aguardam a trava e abrem o índice já pronto, apenas para leitura.
+    '''
+    global _vectorstore
+    if _vectorstore is None:
+        with _lock_vectorstore:
+            if _vectorstore is None:
+                # A trava também protege a criação do diretório do Chroma
+                with trava_arquivo(os.path.join(diretorio_indice, '.trava')):
+                    vectorstore = carregar_base_vetorial()
+                    if not vectorstore.get(limit=1, include=[])['ids']:
+                        logger.info('Índice vetorial vazio; construindo a partir do CSV...')
+                        vectorstore = reconstruir_indice()
+                _vectorstore = vectorstore
+    return _vectorstore
+
+
+_recuperador = None
+_lock_recuperador = threading.Lock()
+
+
+def obter_recuperador():
+    '''
+    Retriever usado pela cadeia. Com RECUPERADOR=hibrido (padrão) é o
+    `RecuperadorHibrido`, reconstruído quando a versão do índice muda;
+    com RECUPERADOR=vetorial é a busca densa pura.
+    '''
+    global _recuperador
+    vectorstore = obter_vectorstore()
+    # 'k' é o número de documentos a retornar
+    if os.getenv('RECUPERADOR', 'hibrido') == 'vetorial':
+        return vectorstore.as_retriever(search_kwargs={'k': 3})
+
+    versao = versao_indice()
+    if _recuperador is None or _recuperador.versao != versao:
+        with _lock_recuperador:
+            if _recuperador is None or _recuperador.versao != versao:
+                _recuperador = RecuperadorHibrido.do_vectorstore(vectorstore, k=3, versao=versao)
+    return _recuperador
+
+
+def recuperar_documentos(pergunta):
+    return obter_recuperador().invoke(pergunta)
+
+
+async def arecuperar_documentos(pergunta):
+    # A abertura do índice e a construção dos índices em memória são bloqueantes; rodam fora do event loop
+    recuperador = await asyncio.to_thread(obter_recuperador)
+    return await recuperador.ainvoke(pergunta)
+
+
+def criar_llm():
+    '''
+    LLM que gera a resposta final. Com LLM_MODELO=falso usa um modelo local
+    determinístico, com latência simulada em LLM_FALSO_LATENCIA (segundos),
+    mais LLM_FALSO_LATENCIA_TOKEN segundos por token do prompt.
+    '''
+    modelo = os.getenv('LLM_MODELO', 'gemini-2.0-flash-001')
+    if modelo == 'falso':
+        from components.llm_falso import ChatFalso
+
+        return ChatFalso(
+            latencia=float(os.getenv('LLM_FALSO_LATENCIA', '0')),
+            latencia_por_token=float(os.getenv('LLM_FALSO_LATENCIA_TOKEN', '0'))
+        )
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    garantir_chave_api()
+    return ChatGoogleGenerativeAI(model=modelo, temperature=0.7)
+
 
 # --- CONSTRUÇÃO DO PIPELINE DE RAG ---
-logger.info('Configurando o pipeline de RAG...')
+# O Retriever é responsável por buscar os chunks relevantes na base vetorial.
+# O índice persistido só é aberto na primeira pergunta.
+retriever = RunnableLambda(recuperar_documentos, afunc=arecuperar_documentos)
+
+
+def criar_compressor():
+    '''
+    Etapa entre o retriever e o prompt: mescla os chunks de cada autor e
+    limita o contexto a CONTEXTO_MAX_TOKENS tokens (estimados).
+    Desativada com CONTEXTO_COMPRESSAO=0 (a lista de documentos vai direto ao prompt).
+    '''
+    if os.getenv('CONTEXTO_COMPRESSAO', '1') == '0':
+        return None
+    # Os metadados de cada chunk guardam a linha inteira: o compressor localiza o chunk no documento original
+    return CompressorContexto(max_tokens=int(os.getenv('CONTEXTO_MAX_TOKENS', '1000')), texto_original=conteudo_autor)
 
-# O Retriever é responsável por buscar os chunks relevantes na base vetorial
-retriever = vectorstore.as_retriever(search_kwargs={'k': 3}) # 'k' é o número de documentos a retornar
 
 # O Prompt Template formata a pergunta do usuário e os documentos recuperados
 # para enviar ao modelo de linguagem.
@@ -120,16 +381,280 @@ Se a resposta não estiver no contexto, diga que a informação não está dispo
 
 prompt = ChatPromptTemplate.from_template(template)
 
-# O LLM (Large Language Model) que irá gerar a resposta final.
-llm = ChatGoogleGenerativeAI(model='gemini-2.0-flash-001', temperature=0.7)
+_llm = None
+_cadeia_rag = None
+_lock_cadeia = threading.Lock()
 
-# Construção da Cadeia (Chain) RAG com LangChain Expression Language (LCEL)
-# Este é o 'cérebro' da aplicação
-cadeia_rag = (
-    {'contexto_recuperado': retriever, 'pergunta_do_usuario': RunnablePassthrough()}
-    | prompt
-    | llm
-    | StrOutputParser()
-)
 
-logger.info('Pipeline de RAG pronto!')
+def obter_cadeia():
+    '''
+    Constrói a cadeia RAG no primeiro uso (o LLM exige a chave da API).
+    '''
+    global _llm, _cadeia_rag
+    if _cadeia_rag is None:
+        with _lock_cadeia:
+            if _cadeia_rag is None:
+                logger.info('Configurando o pipeline de RAG...')
+                # O LLM (Large Language Model) que irá gerar a resposta final.
+                _llm = criar_llm()
+
+                # Os chunks recuperados passam pelo compressor antes de chegar ao prompt
+                contexto = retriever.with_config(run_name='recuperacao')
+                compressor = criar_compressor()
+                if compressor is not None:
+                    contexto = contexto | RunnableLambda(compressor).with_config(run_name='compressao')
+
+                # Construção da Cadeia (Chain) RAG com LangChain Expression Language (LCEL)
+                # Este é o 'cérebro' da aplicação. Os nomes das etapas identificam
+                # cada uma no `RastreadorRag` (perfil por pergunta).
+                _cadeia_rag = (
+                    {
+                        'contexto_recuperado': contexto,
+                        'pergunta_do_usuario': RunnablePassthrough()
+                    }
+                    | prompt.with_config(run_name='prompt')
+                    | _llm
+                    | StrOutputParser().with_config(run_name='parser')
+                )
+                logger.info('Pipeline de RAG pronto!')
+    return _cadeia_rag
+
+
+def __getattr__(nome):
+    # `agent.cadeia_rag` e `agent.llm` continuam disponíveis, construídos sob demanda
+    if nome == 'cadeia_rag':
+        return obter_cadeia()
+    if nome == 'llm':
+        obter_cadeia()
+        return _llm
+    raise AttributeError(f'module {__name__!r} has no attribute {nome!r}')
+
+
+
+def criar_cache_respostas():
+    '''
+    Cache de respostas (exato + semântico) na frente da cadeia RAG.
+    Desativado com RESPOSTAS_CACHE=0.
+    '''
+    if os.getenv('RESPOSTAS_CACHE', '1') == '0':
+        return None
+    return CacheRespostas(
+        embeddings=obter_vectorstore().embeddings,
+        limiar=float(os.getenv('RESPOSTAS_CACHE_LIMIAR', '0.95')),
+        ttl=float(os.getenv('RESPOSTAS_CACHE_TTL', '3600')),
+        max_itens=int(os.getenv('RESPOSTAS_CACHE_MAX_ITENS', '1000')),
+        versao=versao_indice,
+        dispensa_semantico=_cita_autor
+    )
+
+
+_cache_respostas = None
+_cache_respostas_criado = False
+_lock_cache_respostas = threading.Lock()
+
+
+def obter_cache_respostas():
+    global _cache_respostas, _cache_respostas_criado
+    if not _cache_respostas_criado:
+        with _lock_cache_respostas:
+            if not _cache_respostas_criado:
+                _cache_respostas = criar_cache_respostas()
+                _cache_respostas_criado = True
+    return _cache_respostas
+
+
+def responder(pergunta, perfil=None):
+    '''
+    Responde à pergunta consultando antes o cache de respostas. Com `perfil`
+    (`PerfilRequisicao`), registra o tempo de cada etapa, os documentos
+    recuperados e os tokens usados.
+    '''
+    with perfilar(perfil):
+        cache = obter_cache_respostas()
+        if cache is None:
+            return obter_cadeia().invoke(pergunta, config=configuracao(perfil))
+
+        with medir_etapa('cache'):
+            resposta, vetor = cache.obter(pergunta)
+        if resposta is not None:
+            _marcar_cache(perfil, 'exato' if vetor is None else 'semantico')
+        else:
+            resposta = obter_cadeia().invoke(pergunta, config=configuracao(perfil))
+            cache.gravar(pergunta, resposta, vetor)
+        return resposta
+
+
+def _marcar_cache(perfil, nivel):
+    if perfil is not None:
+        perfil.cache = nivel
+
+
+async def _aconsultar_cache(cache, pergunta, perfil):
+    # Nível exato direto no event loop; o semântico (que calcula o embedding) em uma thread
+    with medir_etapa('cache'):
+        resposta = cache.obter_exato(pergunta)
+        if resposta is not None:
+            _marcar_cache(perfil, 'exato')
+            return resposta, None
+        resposta, vetor = await asyncio.to_thread(cache.obter_semantico, pergunta)
+    if resposta is not None:
+        _marcar_cache(perfil, 'semantico')
+    return resposta, vetor
+
+
+async def aresponder(pergunta, perfil=None):
+    '''
+    Versão assíncrona de `responder`. O nível exato é consultado direto no
+    event loop; o semântico (que calcula o embedding) roda em uma thread.
+    '''
+    with perfilar(perfil):
+        cache = _cache_respostas if _cache_respostas_criado else await asyncio.to_thread(obter_cache_respostas)
+        if cache is None:
+            return await obter_cadeia().ainvoke(pergunta, config=configuracao(perfil))
+
+        resposta, vetor = await _aconsultar_cache(cache, pergunta, perfil)
+        if resposta is None:
+            resposta = await obter_cadeia().ainvoke(pergunta, config=configuracao(perfil))
+            cache.gravar(pergunta, resposta, vetor)
+        return resposta
+
+
+async def aresponder_stream(pergunta, perfil=None):
+    '''
+    Gera a resposta em pedaços, à medida que o LLM produz os tokens.
+    Um acerto no cache de respostas é entregue em um único pedaço; nas falhas
+    a resposta completa é gravada no cache ao final do streaming.
+    '''
+    cache = _cache_respostas if _cache_respostas_criado else await asyncio.to_thread(obter_cache_respostas)
+    vetor = None
+    if cache is not None:
+        with perfilar(perfil):
+            resposta, vetor = await _aconsultar_cache(cache, pergunta, perfil)
+        if resposta is not None:
+            yield resposta
+            return
+
+    pedacos = []
+    # O contexto do perfil não atravessa os `yield`: o embedding da recuperação
+    # é medido pela etapa `recuperacao`
+    async for pedaco in obter_cadeia().astream(pergunta, config=configuracao(perfil)):
+        pedacos.append(pedaco)
+        yield pedaco
+
+    if cache is not None:
+        cache.gravar(pergunta, ''.join(pedacos), vetor)
+
+
+def _cita_autor(pergunta):
+    # O recuperador híbrido responde a essas perguntas pelo índice de autores,
+    # sem calcular o embedding da consulta; o nível semântico do cache também
+    # as dispensa, para que não paguem um embedding que só ele usaria
+    recuperador = obter_recuperador()
+    return isinstance(recuperador, RecuperadorHibrido) and bool(recuperador.autores.buscar_exato(pergunta))
+
+
+def _preparar_lote(perguntas, perfis):
+    '''
+    Parte síncrona de `aresponder_lote`: consulta o cache de respostas e calcula
+    em uma única chamada os embeddings de todas as perguntas que precisam dele.
+    Retorna (respostas já conhecidas, embeddings das perguntas). O tempo desta
+    etapa, compartilhada pelo lote, entra no perfil de cada pergunta.
+    '''
+    with perfilar(*perfis), medir_etapa('cache'):
+        return _consultar_lote(perguntas, perfis)
+
+
+def _consultar_lote(perguntas, perfis):
+    cache = obter_cache_respostas()
+    conhecidas = {}
+    niveis = {}
+    if cache is not None:
+        for pergunta in perguntas:
+            resposta = cache.obter_exato(pergunta)
+            if resposta is not None:
+                conhecidas[pergunta] = resposta
+                niveis[pergunta] = 'exato'
+
+    pendentes = list(dict.fromkeys(p for p in perguntas if p not in conhecidas and not _cita_autor(p)))
+    embeddings = obter_vectorstore().embeddings
+    if pendentes and hasattr(embeddings, 'embed_queries'):
+        # Os vetores ficam no LRU de consultas; o retriever e o nível
+        # semântico do cache de respostas não chamam mais a API para elas
+        embeddings.embed_queries(pendentes)
+
+    vetores = {}
+    if cache is not None:
+        for pergunta in perguntas:
+            if pergunta not in conhecidas:
+                resposta, vetores[pergunta] = cache.obter_semantico(pergunta)
+                if resposta is not None:
+                    conhecidas[pergunta] = resposta
+                    niveis[pergunta] = 'semantico'
+
+    for pergunta, perfil in zip(perguntas, perfis):
+        _marcar_cache(perfil, niveis.get(pergunta))
+    return conhecidas, vetores
+
+
+async def aresponder_lote(perguntas, perfis=None):
+    '''
+    Responde a um lote de perguntas: um único cálculo de embeddings para as
+    consultas e a cadeia executada pelo caminho de lote (`abatch_as_completed`)
+    para as perguntas distintas que não estão no cache. Gera pares
+    (índice da pergunta, resposta ou exceção) à medida que ficam prontos.
+    `perfis`, se informado, traz um `PerfilRequisicao` (ou None) por pergunta.
+    '''
+    perfis = list(perfis) if perfis is not None else [None] * len(perguntas)
+    conhecidas, vetores = await asyncio.to_thread(_preparar_lote, perguntas, perfis)
+
+    posicoes = {}
+    for indice, pergunta in enumerate(perguntas):
+        if pergunta in conhecidas:
+            yield indice, conhecidas[pergunta]
+        else:
+            posicoes.setdefault(pergunta, []).append(indice)
+
+    if posicoes:
+        faltantes = list(posicoes)
+        cache = obter_cache_respostas()
+        # Perguntas repetidas no lote compartilham a execução e o perfil dela
+        configuracoes = [configuracao(*(perfis[posicao] for posicao in posicoes[pergunta])) or {}
+                         for pergunta in faltantes]
+        async for indice, resposta in obter_cadeia().abatch_as_completed(
+            faltantes, config=configuracoes, return_exceptions=True
+        ):
+            pergunta = faltantes[indice]
+            if cache is not None and not isinstance(resposta, Exception):
+                cache.gravar(pergunta, resposta, vetores.get(pergunta))
+            for posicao in posicoes[pergunta]:
+                yield posicao, resposta
+
+
+def inicializar():
+    '''
+    Prepara tudo o que a API usa: índice vetorial, recuperador, cache de
+    respostas e cadeia RAG. Chamado no lifespan de cada worker, depois do fork,
+    para que nenhum cliente ou thread seja herdado do processo pai.
+    '''
+    obter_vectorstore()
+    obter_recuperador()
+    obter_cache_respostas()
+    obter_cadeia()
+
+
+def pronto():
+    return _vectorstore is not None and _cadeia_rag is not None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Índice vetorial de autores')
+    parser.add_argument('--reindexar', action='store_true', help='(re)constrói o índice a partir do CSV')
+    parser.add_argument('--csv', default=file_author_csv, help='arquivo de autores (CSV, Parquet ou Arrow)')
+    parser.add_argument('--diretorio', default=diretorio_indice, help='diretório do índice persistido')
+    args = parser.parse_args()
+
+    if args.reindexar:
+        with trava_arquivo(os.path.join(args.diretorio, '.trava')):
+            reconstruir_indice(args.csv, args.diretorio)
+    else:
+        parser.print_help()
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AgrupadorPerguntas:
+    '''
+    Agrupa perguntas que chegam ao mesmo tempo em lotes (micro-batching).
+
+    A primeira pergunta de um lote abre uma janela de `janela` segundos; as que
+    chegarem nesse intervalo (até `max_lote`) são processadas juntas por
+    `processar_lote`, um gerador assíncrono que recebe a lista de perguntas (e
+    a dos perfis, um por pergunta) e produz pares (índice da pergunta, resposta
+    ou exceção). Cada resposta é entregue a quem perguntou assim que fica
+    pronta, sem esperar o lote inteiro.
+
+    As tarefas dos lotes em andamento ficam em `_tarefas` (o event loop guarda
+    apenas referências fracas a elas) até terminarem; `encerrar` espera por
+    elas no desligamento.
+    '''
+
+    def __init__(self, processar_lote, janela=0.01, max_lote=16):
+        self.processar_lote = processar_lote
+        self.janela = janela
+        self.max_lote = max_lote
+        self.estatisticas = {'perguntas': 0, 'lotes': 0, 'maior_lote': 0}
+        self._pendentes = []
+        self._temporizador = None
+        self._tarefas = set()
+
+    async def submeter(self, pergunta, perfil=None):
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes.append((pergunta, futuro, perfil))
+
+        if len(self._pendentes) >= self.max_lote:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = asyncio.get_running_loop().call_later(self.janela, self._despachar)
+
+        return await futuro
+
+    def _despachar(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            tarefa = asyncio.ensure_future(self._processar(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def encerrar(self, espera=10.0):
+        '''
+        Despacha as perguntas pendentes e espera até `espera` segundos pelos
+        lotes em andamento; os que não terminarem são cancelados.
+        '''
+        self._despachar()
+        if not self._tarefas:
+            return
+        _, restantes = await asyncio.wait(set(self._tarefas), timeout=espera)
+        for tarefa in restantes:
+            tarefa.cancel()
+        await asyncio.gather(*restantes, return_exceptions=True)
+
+    async def _processar(self, lote):
+        self.estatisticas['perguntas'] += len(lote)
+        self.estatisticas['lotes'] += 1
+        self.estatisticas['maior_lote'] = max(self.estatisticas['maior_lote'], len(lote))
+
+        try:
+            perguntas = [pergunta for pergunta, _, _ in lote]
+            perfis = [perfil for _, _, perfil in lote]
+            async for indice, resposta in self.processar_lote(perguntas, perfis):
+                futuro = lote[indice][1]
+                if futuro.done():
+                    continue
+                if isinstance(resposta, Exception):
+                    futuro.set_exception(resposta)
+                else:
+                    futuro.set_result(resposta)
+        except Exception as erro:
+            logger.error(f'Erro ao processar lote de {len(lote)} perguntas: {erro}')
+            for _, futuro, _ in lote:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        except asyncio.CancelledError:
+            for _, futuro, _ in lote:
+                futuro.cancel()
+            raise
+
+        for _, futuro, _ in lote:
+            if not futuro.done():
+                futuro.set_exception(RuntimeError('Lote encerrado sem resposta para a pergunta.'))
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import requests
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CacheHttp:
+    '''
+    Cache persistente (SQLite) das páginas baixadas pelo coletor.
+
+    Para cada URL guarda o corpo, os cabeçalhos ETag/Last-Modified, o hash do
+    conteúdo e o resultado já extraído da página (JSON). Nas execuções seguintes
+    as requisições são condicionais (If-None-Match / If-Modified-Since) e páginas
+    que não mudaram (304 ou mesmo hash) reaproveitam o resultado extraído, sem
+    novo parse do HTML.
+    '''
+
+    def __init__(self, caminho: str = 'coletor_cache.sqlite'):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                hash TEXT NOT NULL,
+                corpo BLOB NOT NULL,
+                extraido TEXT,
+                atualizado_em REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+        self.estatisticas = {'nao_modificadas': 0, 'mesmo_conteudo': 0, 'alteradas': 0, 'novas': 0}
+
+    def _contar(self, chave: str) -> None:
+        with self._lock:
+            self.estatisticas[chave] += 1
+
+    def _ler(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            linha = self._conn.execute(
+                'SELECT etag, last_modified, hash, extraido FROM paginas WHERE url = ?', (url,)
+            ).fetchone()
+        if linha is None:
+            return None
+        etag, last_modified, hash_conteudo, extraido = linha
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'hash': hash_conteudo,
+            'extraido': json.loads(extraido) if extraido is not None else None,
+        }
+
+    def _gravar(self, url: str, resp: requests.Response, hash_conteudo: str, extraido: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, resp.headers.get('ETag'), resp.headers.get('Last-Modified'), hash_conteudo,
+                 resp.content, json.dumps(extraido, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def obter(self, url: str, requisitar: Callable[[str, Dict[str, str]], requests.Response],
+              extrator: Callable[[str], Any]) -> Tuple[Any, bool]:
+        '''
+        Baixa `url` com `requisitar(url, headers)` e aplica `extrator` ao HTML.
+        Retorna (dados extraídos, alterada). Quando a página não mudou desde a
+        última execução, o extrator não é chamado e `alterada` é False.
+        '''
+        entrada = self._ler(url)
+        headers: Dict[str, str] = {}
+        if entrada is not None and entrada['extraido'] is not None:
+            if entrada['etag']:
+                headers['If-None-Match'] = entrada['etag']
+            if entrada['last_modified']:
+                headers['If-Modified-Since'] = entrada['last_modified']
+
+        resp = requisitar(url, headers)
+
+        if resp.status_code == 304 and entrada is not None and entrada['extraido'] is not None:
+            self._contar('nao_modificadas')
+            return entrada['extraido'], False
+
+        hash_conteudo = hashlib.sha256(resp.content).hexdigest()
+        if entrada is not None and entrada['hash'] == hash_conteudo and entrada['extraido'] is not None:
+            # Servidor sem suporte a requisições condicionais, mas o conteúdo é o mesmo
+            self._contar('mesmo_conteudo')
+            self._gravar(url, resp, hash_conteudo, entrada['extraido'])
+            return entrada['extraido'], False
+
+        extraido = extrator(resp.text)
+        self._contar('alteradas' if entrada is not None else 'novas')
+        self._gravar(url, resp, hash_conteudo, extraido)
+        return extraido, True
+
+    def fechar(self) -> None:
+        logger.info(f'Cache HTTP: {self.estatisticas}')
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,157 @@
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_pergunta(pergunta):
+    '''
+    Forma canônica da pergunta para o nível exato do cache: sem diferença de
+    maiúsculas, espaços repetidos e pontuação final.
+    '''
+    texto = unicodedata.normalize('NFKC', pergunta).casefold()
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    return texto.rstrip(' ?!.;')
+
+
+class _Entrada:
+    __slots__ = ('resposta', 'vetor', 'criada_em')
+
+    def __init__(self, resposta, vetor, criada_em):
+        self.resposta = resposta
+        self.vetor = vetor
+        self.criada_em = criada_em
+
+
+class CacheRespostas:
+    '''
+    Cache de respostas em dois níveis na frente da cadeia RAG.
+
+    1. Exato: pergunta normalizada -> resposta.
+    2. Semântico: maior similaridade de cosseno entre o embedding da pergunta e
+       os das perguntas já respondidas, se acima de `limiar`.
+
+    As entradas expiram após `ttl` segundos e, acima de `max_itens`, as menos
+    usadas recentemente são descartadas (LRU). `versao` é uma função que retorna
+    a versão atual do índice de autores; quando ela muda o cache é esvaziado.
+    `dispensa_semantico(pergunta)`, se informado, marca as perguntas que não
+    passam pelo nível semântico (não calculam embedding e contam como falha).
+    '''
+
+    def __init__(self, embeddings=None, limiar=0.95, ttl=3600.0, max_itens=1000, versao=None,
+                 dispensa_semantico=None):
+        self.embeddings = embeddings
+        self.limiar = limiar
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.versao = versao
+        self.dispensa_semantico = dispensa_semantico
+        self.estatisticas = {'exatos': 0, 'semanticos': 0, 'falhas': 0, 'expirados': 0, 'invalidacoes': 0}
+        self._entradas = OrderedDict()
+        self._versao_atual = versao() if versao else None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _contar(self, chave):
+        self.estatisticas[chave] += 1
+
+    def _validar_versao(self):
+        if self.versao is None:
+            return
+        versao = self.versao()
+        if versao != self._versao_atual:
+            if self._entradas:
+                logger.info('Índice de autores alterado; cache de respostas invalidado.')
+            self._entradas.clear()
+            self._versao_atual = versao
+            self._contar('invalidacoes')
+
+    def _vigente(self, chave, entrada, agora):
+        if agora - entrada.criada_em <= self.ttl:
+            return True
+        del self._entradas[chave]
+        self._contar('expirados')
+        return False
+
+    def obter_exato(self, pergunta):
+        '''
+        Nível exato; não calcula embeddings. Retorna a resposta ou None.
+        '''
+        chave = normalizar_pergunta(pergunta)
+        with self._lock:
+            self._validar_versao()
+            entrada = self._entradas.get(chave)
+            if entrada is None or not self._vigente(chave, entrada, time.monotonic()):
+                return None
+            self._entradas.move_to_end(chave)
+            self._contar('exatos')
+            return entrada.resposta
+
+    def obter_semantico(self, pergunta):
+        '''
+        Nível semântico. Retorna (resposta ou None, embedding da pergunta); o
+        embedding deve ser repassado a `gravar` para não ser calculado de novo.
+        '''
+        if self.embeddings is None or (self.dispensa_semantico and self.dispensa_semantico(pergunta)):
+            with self._lock:
+                self._contar('falhas')
+            return None, None
+
+        vetor = np.asarray(self.embeddings.embed_query(pergunta), dtype=np.float32)
+        vetor /= np.linalg.norm(vetor) or 1.0
+
+        with self._lock:
+            self._validar_versao()
+            agora = time.monotonic()
+            candidatos = [(chave, entrada) for chave, entrada in list(self._entradas.items())
+                          if entrada.vetor is not None and self._vigente(chave, entrada, agora)]
+            if candidatos:
+                similaridades = np.stack([entrada.vetor for _, entrada in candidatos]) @ vetor
+                melhor = int(np.argmax(similaridades))
+                if similaridades[melhor] >= self.limiar:
+                    chave, entrada = candidatos[melhor]
+                    self._entradas.move_to_end(chave)
+                    self._contar('semanticos')
+                    return entrada.resposta, vetor
+            self._contar('falhas')
+            return None, vetor
+
+    def obter(self, pergunta):
+        '''
+        Consulta os dois níveis. Retorna (resposta ou None, embedding da pergunta ou None).
+        '''
+        resposta = self.obter_exato(pergunta)
+        if resposta is not None:
+            return resposta, None
+        return self.obter_semantico(pergunta)
+
+    def gravar(self, pergunta, resposta, vetor=None):
+        chave = normalizar_pergunta(pergunta)
+        with self._lock:
+            self._entradas[chave] = _Entrada(resposta, vetor, time.monotonic())
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_itens:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def metricas(self):
+        with self._lock:
+            consultas = self.estatisticas['exatos'] + self.estatisticas['semanticos'] + self.estatisticas['falhas']
+            acertos = consultas - self.estatisticas['falhas']
+            return {
+                **self.estatisticas,
+                'itens': len(self._entradas),
+                'taxa_acerto': acertos / consultas if consultas else 0.0
+            }
@@ -0,0 +1,251 @@
+import logging
+import random
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from metricas_coleta import MetricasColeta
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (compatible; my-scraper/1.0)'
+
+# Status que indicam uma falha temporária do servidor
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+# Falhas sem resposta completa que valem uma nova tentativa
+ERROS_RETENTAVEIS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class LimitadorTaxa:
+    '''
+    Token bucket: libera até `taxa` requisições por segundo, permitindo
+    rajadas de até `capacidade` requisições. Substitui o `time.sleep(delay)` fixo.
+    '''
+
+    def __init__(self, taxa: float, capacidade: Optional[int] = None):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1, int(taxa))
+        self._tokens = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> None:
+        if self.taxa <= 0:
+            return
+
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+class AtrasoAdaptativo:
+    '''
+    Intervalo mínimo entre o início de duas requisições a um host, ajustado
+    pelas respostas: diminui 10% a cada resposta rápida (abaixo de
+    `latencia_lenta`) até `minimo` e dobra em respostas lentas, erros 5xx,
+    timeouts e 429, até `maximo`. Um `Retry-After` suspende o host pelo tempo pedido.
+    '''
+
+    def __init__(self, inicial: float = 0.0, minimo: float = 0.0, maximo: float = 30.0,
+                 latencia_lenta: float = 2.0, passo: float = 0.1):
+        self.intervalo = inicial
+        self.minimo = minimo
+        self.maximo = maximo
+        self.latencia_lenta = latencia_lenta
+        self.passo = passo
+        self._proxima = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> None:
+        with self._lock:
+            agora = time.monotonic()
+            espera = max(0.0, self._proxima - agora)
+            self._proxima = max(agora, self._proxima) + self.intervalo
+        if espera:
+            time.sleep(espera)
+
+    def registrar(self, latencia: float, sucesso: bool) -> None:
+        with self._lock:
+            if sucesso and latencia < self.latencia_lenta:
+                self.intervalo = max(self.minimo, self.intervalo * 0.9)
+            else:
+                self.intervalo = min(self.maximo, max(self.intervalo * 2, self.passo))
+
+    def suspender(self, segundos: float) -> None:
+        with self._lock:
+            self._proxima = max(self._proxima, time.monotonic() + segundos)
+
+
+class _PorHost:
+    '''
+    Um objeto por host (semáforo de conexões simultâneas, atraso adaptativo).
+    '''
+
+    def __init__(self, criar):
+        self._criar = criar
+        self._objetos: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._objetos:
+                self._objetos[host] = self._criar()
+            return self._objetos[host]
+
+
+def tempo_retry_after(resp: requests.Response) -> Optional[float]:
+    '''
+    Segundos pedidos pelo cabeçalho Retry-After (número ou data HTTP), se houver.
+    '''
+    valor = resp.headers.get('Retry-After')
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClienteHttp:
+    '''
+    Camada única de acesso HTTP dos scrapers:
+
+    * uma `requests.Session` com pool de conexões (keep-alive) de até
+      `max_por_host` conexões, e no máximo `max_por_host` requisições
+      simultâneas por host;
+    * ritmo total limitado por um token bucket de `taxa` requisições/segundo
+      (0 = sem limite) e intervalo por host adaptativo (`AtrasoAdaptativo`);
+    * até `tentativas` tentativas em timeouts, falhas de conexão, 5xx e 429,
+      com backoff exponencial e jitter; o `Retry-After` do servidor tem
+      prioridade sobre o backoff (limitado a `espera_maxima`).
+
+    Esgotadas as tentativas, a última exceção (`requests.RequestException`,
+    inclusive `HTTPError`) é levantada, com o número de requisições feitas em
+    `tentativas`. Outros status 4xx não são repetidos.
+    Latências, esperas, status e retries são registrados em `metricas`.
+    '''
+
+    def __init__(self, max_por_host: int = 4, taxa: float = 0.0, timeout: float = 10,
+                 tentativas: int = 4, espera_inicial: float = 0.5, espera_maxima: float = 30.0,
+                 atraso_inicial: float = 0.0, atraso_minimo: float = 0.0,
+                 metricas: Optional[MetricasColeta] = None, user_agent: str = USER_AGENT):
+        self.timeout = timeout
+        self.tentativas = max(1, tentativas)
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.metricas = metricas or MetricasColeta()
+        self.limitador = LimitadorTaxa(taxa)
+        self._semaforos = _PorHost(lambda: threading.BoundedSemaphore(max_por_host))
+        self._atrasos = _PorHost(lambda: AtrasoAdaptativo(atraso_inicial, atraso_minimo))
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': user_agent})
+        # As novas tentativas são feitas aqui, não pelo urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_por_host, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def atraso(self, url: str) -> AtrasoAdaptativo:
+        return self._atrasos.obter(url)
+
+    def _backoff(self, tentativa: int) -> float:
+        espera = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+        return espera * random.uniform(0.5, 1.0)
+
+    def _esperar(self, segundos: float) -> None:
+        with self.metricas.medir('espera'):
+            time.sleep(segundos)
+
+    def _tentar(self, url: str, headers: Optional[Dict[str, str]]) -> requests.Response:
+        semaforo = self._semaforos.obter(url)
+        # Tempo parado no token bucket, no intervalo do host e no limite de conexões
+        with self.metricas.medir('espera'):
+            self.limitador.aguardar()
+            self.atraso(url).aguardar()
+            semaforo.acquire()
+        try:
+            with self.metricas.medir('busca'):
+                return self.session.get(url, headers=headers, timeout=self.timeout)
+        finally:
+            semaforo.release()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        '''
+        GET com as novas tentativas. A `requests.RequestException` levantada
+        leva em `tentativas` quantas requisições foram feitas nesta chamada
+        (1 para status 4xx e erros que não são repetidos).
+        '''
+        atraso = self.atraso(url)
+        tentativa = 0
+        try:
+            for tentativa in range(self.tentativas):
+                ultima = tentativa == self.tentativas - 1
+                inicio = time.perf_counter()
+                try:
+                    resp = self._tentar(url, headers)
+                except requests.RequestException as e:
+                    self.metricas.registrar_falha(e)
+                    if not isinstance(e, ERROS_RETENTAVEIS):
+                        raise
+                    atraso.registrar(time.perf_counter() - inicio, sucesso=False)
+                    if ultima:
+                        raise
+                    espera = self._backoff(tentativa)
+                    logger.warning(f'{type(e).__name__} em {url}; nova tentativa em {espera:.2f}s')
+                else:
+                    self.metricas.registrar_resposta(resp)
+                    if resp.status_code not in STATUS_RETENTAVEIS:
+                        atraso.registrar(resp.elapsed.total_seconds(), sucesso=resp.ok or resp.status_code == 304)
+                        resp.raise_for_status()
+                        return resp
+
+                    atraso.registrar(resp.elapsed.total_seconds(), sucesso=False)
+                    if ultima:
+                        resp.raise_for_status()
+                    retry_after = tempo_retry_after(resp)
+                    espera = (min(self.espera_maxima, retry_after) if retry_after is not None
+                              else self._backoff(tentativa))
+                    if resp.status_code == 429 or retry_after is not None:
+                        # As demais threads também esperam antes de voltar ao host
+                        atraso.suspender(espera)
+                    logger.warning(f'HTTP {resp.status_code} em {url}; nova tentativa em {espera:.2f}s')
+
+                self.metricas.contar('retries')
+                self._esperar(espera)
+        except requests.RequestException as e:
+            e.tentativas = tentativa + 1
+            raise
+
+    def requisitar(self, url: str, condicionais: Dict[str, str]) -> requests.Response:
+        '''
+        Assinatura usada por `_baixar` e pelo `CacheHttp`.
+        '''
+        return self.get(url, headers=condicionais)
+
+    def fechar(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'ClienteHttp':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
@@ -1,13 +1,21 @@
-import csv
-import re
+import os
 import requests
-import time
 import logging
 
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from collections import deque
+from contextlib import contextmanager
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
 from urllib.request import urlopen
-from urllib.parse import urljoin 
+from urllib.parse import urljoin
+
+from cache_http import CacheHttp
+from cliente_http import ClienteHttp
+from escritor_colunar import FORMATOS, converter_csv
+from escritor_csv import CAMPOS_AUTOR, CAMPOS_CITACAO, Checkpoint, EscritorCsv
+from extratores import BACKEND_PADRAO, obter_extrator
+from metricas_coleta import MetricasColeta
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,149 +29,446 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)    
 
 
-def raspagem_quotes_toscrape(url: str) -> list[dict]:
-    
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; ScraperBot/1.0)'}
+def extrair_pagina_listagem(html: str, full_url: str, url: str, backend: str = BACKEND_PADRAO) -> Dict[str, Any]:
+    '''
+    Faz um único parse de uma página de listagem e devolve as citações,
+    as URLs (about) dos autores, na ordem em que aparecem, e o link da próxima página.
+    '''
+    return obter_extrator(backend).pagina_listagem(html, full_url, url)
+
+
+def extrair_dados_autor(html: str, backend: str = BACKEND_PADRAO) -> Dict[str, str]:
+    '''
+    Extrai nome, nascimento e descrição de uma página (about) de autor.
+    '''
+    return obter_extrator(backend).autor(html)
+
+
+def _baixar(requisitar: Callable[[str, Dict[str, str]], requests.Response], url: str,
+            extrator: Callable[[str], Any], cache: Optional[CacheHttp] = None,
+            metricas: Optional[MetricasColeta] = None) -> Tuple[Any, bool]:
+    '''
+    Baixa e extrai uma página, passando pelo cache HTTP quando informado.
+    Com `metricas`, o tempo do extrator é registrado na etapa 'parse'.
+    Retorna (dados extraídos, alterada).
+    '''
+    if metricas is not None:
+        extrator = metricas.cronometrar('parse', extrator)
+    if cache is None:
+        return extrator(requisitar(url, {}).text), True
+    return cache.obter(url, requisitar, extrator)
+
+
+@contextmanager
+def _abrir_cliente(cliente: Optional[ClienteHttp], metricas: Optional[MetricasColeta],
+                   **kwargs) -> Iterator[ClienteHttp]:
+    # O cliente do chamador (que continua aberto) ou um novo, fechado ao final
+    if cliente is not None:
+        yield cliente
+        return
+    with ClienteHttp(metricas=metricas, **kwargs) as novo:
+        yield novo
+
+
+def _apos_tentativas(erro: requests.RequestException) -> str:
+    # Requisições realmente feitas (um 404 não é repetido)
+    tentativas = getattr(erro, 'tentativas', 1)
+    return f'após {tentativas} tentativa' + ('s' if tentativas > 1 else '')
+
+
+def _baixar_listagem(cliente: ClienteHttp, page_url: str, url: str, cache: Optional[CacheHttp],
+                     backend: str) -> Tuple[Dict[str, Any], bool]:
+    # Esgotadas as novas tentativas, a falha é propagada: parar a paginação
+    # em silêncio entregaria um resultado truncado
+    try:
+        return _baixar(cliente.requisitar, page_url,
+                       lambda html: extrair_pagina_listagem(html, page_url, url, backend), cache, cliente.metricas)
+    except requests.RequestException as e:
+        logger.error(f'Falha ao acessar {page_url} {_apos_tentativas(e)}: {e}')
+        cliente.metricas.contar('paginas_com_erro')
+        raise
+
+
+def iterar_quotes_toscrape(url: str, cache: Optional[CacheHttp] = None,
+                           backend: str = BACKEND_PADRAO,
+                           metricas: Optional[MetricasColeta] = None,
+                           cliente: Optional[ClienteHttp] = None) -> Iterator[dict]:
+    '''
+    Gerador de citações: produz cada citação assim que sua página é processada.
+    O tempo que o consumidor leva com cada citação conta como etapa 'escrita'.
+    As requisições passam pelo `ClienteHttp` (informado ou criado aqui, com as
+    mesmas `metricas`); uma página de listagem que falha mesmo após as novas
+    tentativas levanta a `requests.RequestException`.
+    '''
     page_url = '/'
-    resultados: list[dict] = []
 
     logger.info('Iniciando a raspagem de dados das citações...')
 
-    while page_url:
-        full_url = urljoin(url, page_url)
-        logger.info('Raspando a página: %s', full_url)
+    with _abrir_cliente(cliente, metricas, max_por_host=1) as cliente:
+        metricas = cliente.metricas
+        while page_url:
+            full_url = urljoin(url, page_url)
+            logger.info('Raspando a página: %s', full_url)
 
-        try:
-            resp = requests.get(full_url, headers=headers, timeout=10)
-            resp.raise_for_status()
-        except requests.RequestException as e:
-            logger.error('Falha ao acessar %s: %s', full_url, e)
-            break
+            pagina, _ = _baixar_listagem(cliente, full_url, url, cache, backend)
 
-        soup = BeautifulSoup(resp.text, 'html.parser')
+            metricas.contar('paginas')
+            for citacao in pagina['citacoes']:
+                with metricas.medir('escrita'):
+                    yield citacao
+            page_url = pagina['proxima']
 
-        for q in soup.find_all('div', class_='quote'):
-            tags = [a.get_text(strip=True) for a in q.find_all('a', class_='tag')]
-            resultados.append({
-                'autor':   q.find('small', class_='author').get_text(strip=True),
-                'citacao': q.find('span', class_='text').get_text(strip=True),
-                'tags':    tags,
-                'pagina':  full_url
-            })
+        metricas.finalizar()
 
-        next_a = soup.select_one('li.next a')
-        page_url = next_a['href'] if next_a else None
 
-    return resultados
+def raspagem_quotes_toscrape(url: str, cache: Optional[CacheHttp] = None,
+                             backend: str = BACKEND_PADRAO,
+                             metricas: Optional[MetricasColeta] = None,
+                             cliente: Optional[ClienteHttp] = None) -> list[dict]:
+    return list(iterar_quotes_toscrape(url, cache=cache, backend=backend, metricas=metricas, cliente=cliente))
 
 
-def raspagem_page_author(url: str, delay: float = 0.8, timeout: int = 10) -> List[Dict[str, str]]:
+def iterar_page_author(url: str, delay: float = 0.8, timeout: int = 10,
+                       cache: Optional[CacheHttp] = None, backend: str = BACKEND_PADRAO,
+                       metricas: Optional[MetricasColeta] = None,
+                       cliente: Optional[ClienteHttp] = None) -> Iterator[Dict[str, str]]:
     '''
-    Raspagem de autores a partir de um site paginado.
-    Retorna lista de dicionários com chaves: 'author', 'data_nascimento', 'local_nascimento', 'descricao'.
+    Gerador de autores a partir de um site paginado.
+    Produz dicionários com chaves: 'author', 'data_nascimento', 'local_nascimento', 'descricao'.
+    O intervalo entre requisições começa em `delay` e é adaptativo: cai até
+    `delay / 4` enquanto o servidor responde rápido e cresce em respostas
+    lentas, erros e 429. As esperas são registradas na etapa 'espera'.
+    Falhas em uma página de listagem são propagadas; um autor que falha mesmo
+    após as novas tentativas é pulado (contado em 'paginas_com_erro').
     '''
-    session = requests.Session()
-    session.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; my-scraper/1.0)'})
-    author_data: List[Dict[str, str]] = []
     visited_author_urls = set()
-    
     next_path: Optional[str] = '/'
 
-    while next_path:
-        page_url = urljoin(url, next_path)
-        logger.info(f'Raspando página: {page_url}')
-        try:
-            resp = session.get(page_url, timeout=timeout)
-            resp.raise_for_status()
-        except requests.RequestException as e:
-            logger.exception(f'Falha ao acessar {page_url}: {e}')
-            break
-
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        about_anchors = soup.find_all('a', string='(about)')
-                
-        for ah in about_anchors:            
-            href = ah.get('href')
-            if not href:
-                continue
-            author_url = urljoin(url, href)
-            if author_url in visited_author_urls:
-                continue
-            visited_author_urls.add(author_url)
+    with _abrir_cliente(cliente, metricas, max_por_host=1, timeout=timeout,
+                        atraso_inicial=delay, atraso_minimo=delay / 4) as cliente:
+        metricas = cliente.metricas
+        while next_path:
+            page_url = urljoin(url, next_path)
+            logger.info(f'Raspando página: {page_url}')
+            pagina, _ = _baixar_listagem(cliente, page_url, url, cache, backend)
 
-            logger.info(f'Raspando autor: {author_url}')
-            try:
-                r2 = session.get(author_url, timeout=timeout)
-                r2.raise_for_status()
-            except requests.RequestException as e:
-                logger.warning(f'Erro ao acessar página do autor {author_url}: {e}')
-                continue
+            metricas.contar('paginas')
+            for author_url in pagina['autores']:
+                if author_url in visited_author_urls:
+                    continue
+                visited_author_urls.add(author_url)
+
+                resultado = _raspar_autor(cliente, author_url, cache, backend)
+                if resultado is None:
+                    continue
+
+                metricas.contar('autores')
+                with metricas.medir('escrita'):
+                    yield resultado[0]
 
-            soup_a = BeautifulSoup(r2.text, 'html.parser')
-            # uso de get_text(strip=True) e checagem de None
-            name_tag = soup_a.find('h3', class_='author-title')
-            date_tag = soup_a.find('span', class_='author-born-date')
-            place_tag = soup_a.find('span', class_='author-born-location')
-            desc_tag = soup_a.find('div', class_='author-description')
-
-            name = name_tag.get_text(strip=True) if name_tag else ''
-            born_date = date_tag.get_text(strip=True) if date_tag else ''
-            born_location = place_tag.get_text(strip=True) if place_tag else ''
-            descricao = desc_tag.get_text(' ', strip=True) if desc_tag else ''
-            # limpeza controlada (remove quebras de linha e aspas extras)
-            descricao = re.sub(r'["\u201c\u201d]', '', descricao)
-
-            author_data.append({
-                'author': name,
-                'data_nascimento': born_date,
-                'local_nascimento': born_location,
-                'descricao': descricao
-            })
-
-            time.sleep(delay)  # respeitar servidor
-
-        # Pegar link 'next'
-        next_li = soup.select_one('li.next a')
-        if next_li and next_li.get('href'):
-            next_path = next_li['href']
-        else:
-            next_path = None
-
-        time.sleep(delay)
+            # Pegar link 'next'
+            next_path = pagina['proxima']
 
+        metricas.finalizar()
+
+
+def raspagem_page_author(url: str, delay: float = 0.8, timeout: int = 10,
+                         cache: Optional[CacheHttp] = None, backend: str = BACKEND_PADRAO,
+                         metricas: Optional[MetricasColeta] = None,
+                         cliente: Optional[ClienteHttp] = None) -> List[Dict[str, str]]:
+    '''
+    Raspagem de autores a partir de um site paginado.
+    Retorna lista de dicionários com chaves: 'author', 'data_nascimento', 'local_nascimento', 'descricao'.
+    '''
+    return list(iterar_page_author(url, delay=delay, timeout=timeout, cache=cache, backend=backend,
+                                   metricas=metricas, cliente=cliente))
+
+
+def _raspar_autor(cliente: ClienteHttp, author_url: str, cache: Optional[CacheHttp] = None,
+                  backend: str = BACKEND_PADRAO) -> Optional[Tuple[Dict[str, str], bool]]:
+    logger.info(f'Raspando autor: {author_url}')
+    try:
+        return _baixar(cliente.requisitar, author_url, lambda html: extrair_dados_autor(html, backend), cache,
+                       cliente.metricas)
+    except requests.RequestException as e:
+        logger.warning(f'Erro ao acessar página do autor {author_url} {_apos_tentativas(e)}: {e}')
+        cliente.metricas.contar('paginas_com_erro')
+        return None
+
+
+def raspagem_unificada(url: str,
+                       destino_citacoes: Optional[Callable[[dict], None]],
+                       destino_autores: Optional[Callable[[Dict[str, str]], None]],
+                       max_por_host: int = 4, taxa: float = 5.0, timeout: int = 10,
+                       cache: Optional[CacheHttp] = None, backend: str = BACKEND_PADRAO,
+                       inicio: str = '/', visitados: Optional[Set[str]] = None,
+                       ao_concluir_pagina: Optional[Callable[[Optional[str], Set[str]], None]] = None,
+                       metricas: Optional[MetricasColeta] = None,
+                       cliente: Optional[ClienteHttp] = None) -> Dict[str, int]:
+    '''
+    Percorre a paginação uma única vez, fazendo um único parse de cada página de listagem.
+    As citações de cada página são enviadas para `destino_citacoes` e cada link (about)
+    ainda não visitado vira um job de autor, baixado pelo pool de threads e entregue,
+    na ordem de descoberta, para `destino_autores`. Qualquer destino pode ser `None`.
+    Com `cache`, páginas que não mudaram desde a última execução não são reprocessadas.
+    `backend` escolhe o extrator de HTML registrado em `extratores.EXTRATORES`.
+    Para retomar uma raspagem interrompida, `inicio` é a página de listagem inicial e
+    `visitados` as URLs de autores já processadas. Se `ao_concluir_pagina` for
+    informado, ele é chamado após cada página de listagem, com a próxima página e
+    os autores visitados, assim que todas as linhas da página foram entregues.
+    Retorna os contadores por etapa, incluindo as requisições e parses economizados
+    em relação a percorrer a paginação duas vezes. Latências por etapa, bytes,
+    status HTTP e taxas são registrados em `metricas` (`MetricasColeta`).
+    As requisições passam pelo `cliente` (`ClienteHttp`) informado ou por um
+    criado com `max_por_host`, `taxa` e `timeout`, com novas tentativas em 5xx,
+    429 e timeouts. Uma página de listagem que falha mesmo assim interrompe a
+    paginação e é contada em 'listagens_com_erro', para que a raspagem seja retomada.
+    '''
+    metricas = cliente.metricas if cliente is not None else (metricas or MetricasColeta())
+    visited_author_urls = set(visitados or ())
+    pendentes: deque = deque()
+    contadores = {
+        'paginas_listagem': 0,
+        'listagens_com_erro': 0,
+        'citacoes': 0,
+        'paginas_autor': 0,
+        'autores': 0,
+        'autores_com_erro': 0,
+        'listagens_alteradas': 0,
+        'autores_alterados': 0,
+        'paginas_inalteradas': 0,
+        'fetches_economizados': 0,
+        'parses_economizados': 0,
+    }
+
+    def contar_alteracao(chave: str, alterada: bool) -> None:
+        contadores[chave if alterada else 'paginas_inalteradas'] += 1
+
+    def entregar_autores(esperar: bool) -> None:
+        # Entrega em ordem: só avança enquanto o primeiro job pendente estiver pronto
+        while pendentes and (esperar or pendentes[0].done()):
+            resultado = pendentes.popleft().result()
+            if resultado is None:
+                contadores['autores_com_erro'] += 1
+                continue
+            autor, alterada = resultado
+            contar_alteracao('autores_alterados', alterada)
+            contadores['autores'] += 1
+            metricas.contar('autores')
+            if destino_autores is not None:
+                with metricas.medir('escrita'):
+                    destino_autores(autor)
+
+    next_path: Optional[str] = inicio
+
+    with _abrir_cliente(cliente, metricas, max_por_host=max_por_host, taxa=taxa, timeout=timeout) as cliente, \
+            ThreadPoolExecutor(max_workers=max_por_host) as executor:
+        while next_path:
+            page_url = urljoin(url, next_path)
+            logger.info(f'Raspando página: {page_url}')
+            try:
+                pagina, alterada = _baixar_listagem(cliente, page_url, url, cache, backend)
+            except requests.RequestException:
+                contadores['listagens_com_erro'] += 1
+                break
+
+            contadores['paginas_listagem'] += 1
+            metricas.contar('paginas')
+            contar_alteracao('listagens_alteradas', alterada)
+
+            if destino_citacoes is not None:
+                for citacao in pagina['citacoes']:
+                    contadores['citacoes'] += 1
+                    with metricas.medir('escrita'):
+                        destino_citacoes(citacao)
+
+            if destino_autores is not None:
+                for author_url in pagina['autores']:
+                    if author_url in visited_author_urls:
+                        continue
+                    visited_author_urls.add(author_url)
+
+                    contadores['paginas_autor'] += 1
+                    pendentes.append(executor.submit(_raspar_autor, cliente, author_url, cache, backend))
+
+            next_path = pagina['proxima']
+
+            if ao_concluir_pagina is not None:
+                entregar_autores(esperar=True)
+                with metricas.medir('escrita'):
+                    ao_concluir_pagina(next_path, visited_author_urls)
+            else:
+                entregar_autores(esperar=False)
+
+        entregar_autores(esperar=True)
+
+    # Percorrer a paginação separadamente para citações e autores repetiria
+    # o download e o parse de cada página de listagem.
+    if destino_citacoes is not None and destino_autores is not None:
+        contadores['fetches_economizados'] = contadores['paginas_listagem']
+        contadores['parses_economizados'] = contadores['paginas_listagem']
+
+    metricas.finalizar()
+    logger.info(f'Contadores da raspagem: {contadores}')
+    return contadores
+
+
+def raspagem_page_author_concorrente(url: str, max_por_host: int = 4, taxa: float = 5.0,
+                                     timeout: int = 10, backend: str = BACKEND_PADRAO,
+                                     metricas: Optional[MetricasColeta] = None) -> List[Dict[str, str]]:
+    '''
+    Versão concorrente de `raspagem_page_author`.
+    As páginas de listagem são percorridas na thread principal enquanto as páginas
+    (about) dos autores são baixadas por um pool de threads. O número de conexões
+    simultâneas por host é limitado por `max_por_host` e o ritmo total de requisições
+    por um token bucket de `taxa` requisições/segundo.
+    Retorna as mesmas linhas, na mesma ordem, que `raspagem_page_author`; como
+    ela, levanta `requests.RequestException` se uma página de listagem falhar
+    mesmo após as novas tentativas, em vez de devolver uma lista truncada.
+    '''
+    author_data: List[Dict[str, str]] = []
+    contadores = raspagem_unificada(url, None, author_data.append, max_por_host=max_por_host, taxa=taxa,
+                                    timeout=timeout, backend=backend, metricas=metricas)
+    if contadores['listagens_com_erro']:
+        raise requests.RequestException(
+            f'Raspagem de autores interrompida em uma página de listagem de {url} '
+            f'({len(author_data)} autores raspados antes da falha)'
+        )
     return author_data
 
 
-def cria_file_csv(dados, nome_file):
-  
-    # Obter os nomes dos campos (chaves dos dicionários)
-    chaves = dados[0].keys()
+def cria_file_csv(dados: Iterable[Dict[str, Any]], nome_file: str, campos: Optional[List[str]] = None):
+    '''
+    Grava `dados` (lista ou gerador) em `nome_file` em streaming.
+    Sem `campos`, o cabeçalho vem das chaves do primeiro registro; um resultado
+    vazio gera um arquivo com apenas o cabeçalho (ou vazio, se não houver esquema).
+    '''
+    dados = iter(dados)
+
+    if campos is None:
+        # Obter os nomes dos campos (chaves do primeiro dicionário)
+        primeiro = next(dados, None)
+        if primeiro is None:
+            logger.warning(f'Nenhum registro para gravar em {nome_file}.')
+            open(nome_file, 'w').close()
+            return
+        campos = list(primeiro.keys())
+        dados = chain([primeiro], dados)
 
-    with open(nome_file, 'w', newline='') as file_csv:
-        escritor = csv.DictWriter(file_csv, fieldnames=chaves)
+    with EscritorCsv(nome_file, campos) as escritor:
+        escritor.escrever_varias(dados)
 
-        # Escrever o cabeçalho
-        escritor.writeheader()
 
-        # Escrever os dados
-        escritor.writerows(dados)
+def _finalizar_csv(parcial: str, final: str, alterado: bool) -> None:
+    # O arquivo parcial só substitui o final se alguma página que o alimenta mudou
+    if alterado or not os.path.exists(final):
+        os.replace(parcial, final)
+    else:
+        os.remove(parcial)
+        logger.info(f'Nenhuma página que alimenta {final} mudou; arquivo mantido.')
 
 
-def main():
+def _gravar_colunar(file_csv: str, formato: str) -> None:
+    # Versão Parquet/Arrow do CSV final, regravada apenas quando o CSV é mais novo
+    destino = os.path.splitext(file_csv)[0] + FORMATOS[formato]
+    if not os.path.exists(destino) or os.path.getmtime(destino) < os.path.getmtime(file_csv):
+        converter_csv(file_csv, destino, formato)
+
+
+def main(url: str = 'http://quotes.toscrape.com', diretorio: str = '../documents', formato: Optional[str] = None,
+         arquivo_metricas: Optional[str] = None):
+    '''
+    Raspa o site e grava `dados.csv` e `author.csv` em `diretorio`. Com `formato`
+    'parquet' ou 'arrow' (ou COLETOR_FORMATO), grava também `dados.parquet`/`.arrow`
+    e `author.parquet`/`.arrow`, com tags em list<string> e autor dictionary-encoded.
+    As métricas da raspagem são gravadas em `arquivo_metricas` (ou COLETOR_METRICAS,
+    padrão `coletor_metricas.json` em `diretorio`): JSON, ou texto do Prometheus
+    para arquivos `.prom`. COLETOR_TAXA muda o limite de requisições/segundo
+    (padrão 5; 0 = sem limite, apenas contra servidores locais).
+    '''
+    formato = formato or os.getenv('COLETOR_FORMATO', 'csv')
+    taxa = float(os.getenv('COLETOR_TAXA', '5'))
+    arquivo_metricas = arquivo_metricas or os.getenv('COLETOR_METRICAS') or os.path.join(diretorio, 'coletor_metricas.json')
+    metricas = MetricasColeta()
     try:
-        url = 'http://quotes.toscrape.com'
+        if formato != 'csv' and formato not in FORMATOS:
+            raise ValueError(f'Formato desconhecido: {formato} (use csv, parquet ou arrow)')
+
+        file_author = os.path.join(diretorio, 'author.csv')
+        file = os.path.join(diretorio, 'dados.csv')
+        parcial_author = f'{file_author}.parcial'
+        parcial = f'{file}.parcial'
+
+        checkpoint = Checkpoint(os.path.join(diretorio, 'coletor_checkpoint.json'))
+        estado = checkpoint.carregar()
+        posicoes = estado['posicoes'] if estado else {}
 
-        file_author = '../documents/author.csv'
-        cria_file_csv(raspagem_page_author(url=url), file_author)
+        # Uma única passada pela paginação alimenta os dois arquivos, gravados em streaming
+        cache = CacheHttp(os.path.join(diretorio, 'coletor_cache.sqlite'))
+        with EscritorCsv(parcial_author, CAMPOS_AUTOR, posicao=posicoes.get('autores')) as escritor_autores, \
+                EscritorCsv(parcial, CAMPOS_CITACAO, posicao=posicoes.get('citacoes')) as escritor_citacoes:
 
-        file = '../documents/dados.csv'
-        cria_file_csv(raspagem_quotes_toscrape(url=url), file)
+            def salvar_checkpoint(proxima: Optional[str], visitados: Set[str]) -> None:
+                checkpoint.salvar(proxima, visitados, {
+                    'autores': escritor_autores.posicao(),
+                    'citacoes': escritor_citacoes.posicao(),
+                })
+
+            try:
+                contadores = raspagem_unificada(
+                    url, escritor_citacoes.escrever, escritor_autores.escrever, cache=cache,
+                    inicio=estado['proxima'] if estado else '/',
+                    visitados=set(estado['visitados']) if estado else None,
+                    ao_concluir_pagina=salvar_checkpoint,
+                    metricas=metricas,
+                    taxa=taxa
+                )
+            finally:
+                cache.fechar()
+
+        if contadores['listagens_com_erro']:
+            print('Raspagem interrompida; execute novamente para continuar do último checkpoint.')
+            return
+
+        # Cada arquivo só é regravado se alguma página que o alimenta mudou.
+        # Uma raspagem retomada sempre substitui os arquivos.
+        listagens_alteradas = contadores['listagens_alteradas'] > 0 or estado is not None
+        _finalizar_csv(parcial_author, file_author, listagens_alteradas or contadores['autores_alterados'] > 0)
+        _finalizar_csv(parcial, file, listagens_alteradas)
+        checkpoint.remover()
+
+        # Os CSVs continuam sendo o registro retomável da raspagem; o formato
+        # colunar é gerado a partir deles, com as tags convertidas uma única vez
+        if formato != 'csv':
+            _gravar_colunar(file_author, formato)
+            _gravar_colunar(file, formato)
 
         print('-' * 30)
         print(f'Raspagem concluída!')    
+        for etapa, total in contadores.items():
+            print(f'{etapa}: {total}')
     except Exception as e:
         print(f'Erro: {e}')
+    finally:
+        _exportar_metricas(metricas, arquivo_metricas)
+
+
+def _exportar_metricas(metricas: MetricasColeta, arquivo_metricas: str) -> None:
+    # Também ao final de uma raspagem interrompida: mostra onde o tempo foi gasto
+    metricas.finalizar()
+    resumo = metricas.resumo()
+    print('-' * 30)
+    print(f'Métricas ({resumo["duracao"]:.1f}s): {resumo["paginas_por_segundo"]:.2f} páginas/s, '
+          f'{resumo["autores_por_segundo"]:.2f} autores/s, {resumo["bytes"]} bytes, '
+          f'{resumo["retries"]} retries, {resumo["paginas_com_erro"]} páginas com erro, status {resumo["status"]}')
+    for etapa, histograma in resumo['etapas'].items():
+        print(f'{etapa}: {histograma["contagem"]} x, total {histograma["soma"]:.3f}s, '
+              f'p50 {histograma["p50"] * 1000:.1f} ms, p99 {histograma["p99"] * 1000:.1f} ms')
+    try:
+        metricas.exportar(arquivo_metricas)
+        print(f'Métricas gravadas em {arquivo_metricas}')
+    except OSError as e:
+        logger.error(f'Não foi possível gravar as métricas em {arquivo_metricas}: {e}')
 
 
 if __name__ == '__main__':
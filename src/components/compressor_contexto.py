@@ -0,0 +1,231 @@
+from components.perfil_rag import estimar_tokens
+
+# Sobreposição máxima procurada entre dois chunks (o splitter usa chunk_overlap=100)
+MAX_SOBREPOSICAO = 400
+
+# Sobreposições menores que isso podem ser coincidência (o nome do autor se repete na descrição)
+MIN_SOBREPOSICAO = 50
+
+# Abaixo disso não vale a pena incluir um pedaço truncado de mais um autor
+MIN_TOKENS_TRECHO = 32
+
+MARCADOR_CORTE = ' [...]'
+
+
+class Contexto(str):
+    '''
+    Texto do contexto entregue ao prompt, com as estatísticas da compressão:
+    documentos recebidos, autores mantidos e tokens antes (a lista de
+    documentos como era formatada no prompt) e depois da compressão.
+    '''
+
+    documentos = 0
+    autores = 0
+    tokens_originais = 0
+    tokens = 0
+
+    @property
+    def tokens_economizados(self):
+        return max(0, self.tokens_originais - self.tokens)
+
+
+def _sobreposicao(anterior, seguinte):
+    # Maior sufixo de `anterior` que também é prefixo de `seguinte`
+    limite = min(len(anterior), len(seguinte), MAX_SOBREPOSICAO)
+    for tamanho in range(limite, MIN_SOBREPOSICAO - 1, -1):
+        if anterior.endswith(seguinte[:tamanho]):
+            return tamanho
+    return 0
+
+
+def _unir(primeiro, segundo):
+    '''
+    Junta dois trechos do mesmo documento, se um contém o outro ou se eles se
+    sobrepõem (em qualquer ordem); retorna None se não forem contíguos.
+    '''
+    if segundo in primeiro:
+        return primeiro
+    if primeiro in segundo:
+        return segundo
+    tamanho = _sobreposicao(primeiro, segundo)
+    if tamanho:
+        return primeiro + segundo[tamanho:]
+    tamanho = _sobreposicao(segundo, primeiro)
+    if tamanho:
+        return segundo + primeiro[tamanho:]
+    return None
+
+
+def mesclar_trechos(trechos):
+    '''
+    Mescla chunks de um mesmo documento sem conhecer o texto original:
+    remove duplicatas e o texto repetido pelo `chunk_overlap`, procurando o
+    sufixo de um chunk no início do outro. Trechos que não se tocam
+    continuam separados, na ordem em que chegaram.
+    '''
+    fragmentos = []
+    for trecho in trechos:
+        trecho = trecho.strip()
+        if not trecho:
+            continue
+        fragmentos.append(trecho)
+        # Um chunk novo pode ligar dois fragmentos que antes estavam separados
+        unidos = True
+        while unidos and len(fragmentos) > 1:
+            unidos = False
+            for i in range(len(fragmentos)):
+                for j in range(i + 1, len(fragmentos)):
+                    texto = _unir(fragmentos[i], fragmentos[j])
+                    if texto is not None:
+                        fragmentos[i] = texto
+                        del fragmentos[j]
+                        unidos = True
+                        break
+                if unidos:
+                    break
+    return fragmentos
+
+
+def fragmentos_do_original(original, trechos):
+    '''
+    Localiza cada chunk no texto original do documento e une os intervalos
+    que se sobrepõem ou que são separados apenas por espaços. O cabeçalho
+    (tudo antes de 'descricao:') é sempre incluído. Retorna os fragmentos
+    na ordem do documento, ou None se algum chunk não for encontrado.
+    '''
+    intervalos = []
+    for trecho in trechos:
+        trecho = trecho.strip()
+        inicio = original.find(trecho)
+        if inicio < 0:
+            return None
+        intervalos.append((inicio, inicio + len(trecho)))
+    fim_cabecalho = original.find('descricao:')
+    if fim_cabecalho > 0:
+        intervalos.append((0, fim_cabecalho))
+    if not intervalos:
+        return []
+
+    intervalos.sort()
+    unidos = [list(intervalos[0])]
+    for inicio, fim in intervalos[1:]:
+        if not original[unidos[-1][1]:inicio].strip():
+            unidos[-1][1] = max(unidos[-1][1], fim)
+        else:
+            unidos.append([inicio, fim])
+    return [original[inicio:fim].strip() for inicio, fim in unidos]
+
+
+def _cabecalho(metadata):
+    return (f'author: {metadata.get("author", "")}\n data nascimento: {metadata.get("data nascimento", "")}\n'
+            f' local nascimento: {metadata.get("local nascimento", "")}')
+
+
+def _juntar(fragmentos):
+    # O splitter separa o cabeçalho da descrição na quebra de linha: os dois são contíguos
+    texto = fragmentos[0]
+    for fragmento in fragmentos[1:]:
+        if fragmento.startswith('descricao:'):
+            texto += f'\n {fragmento}'
+        elif texto.startswith('author:') and '\n descricao:' not in texto:
+            texto += f'\n descricao: [...] {fragmento}'
+        else:
+            texto += f'\n[...]\n{fragmento}'
+    return texto
+
+
+def _truncar(texto, max_tokens, contar_tokens):
+    # Maior prefixo que cabe no orçamento (busca binária), cortado no fim de uma frase ou palavra
+    baixo, alto = 0, len(texto)
+    while baixo < alto:
+        meio = (baixo + alto + 1) // 2
+        if contar_tokens(texto[:meio] + MARCADOR_CORTE) <= max_tokens:
+            baixo = meio
+        else:
+            alto = meio - 1
+    trecho = texto[:baixo]
+    fim = max(trecho.rfind('. '), trecho.rfind('.\n'))
+    if fim > len(trecho) // 2:
+        return trecho[:fim + 1] + MARCADOR_CORTE
+    espaco = trecho.rfind(' ')
+    return (trecho[:espaco] if espaco > 0 else trecho).rstrip() + MARCADOR_CORTE
+
+
+class CompressorContexto:
+    '''
+    Etapa entre o retriever e o prompt. Agrupa os chunks recuperados por
+    autor (na ordem do ranking), mescla os chunks de cada autor sem o texto
+    duplicado pela sobreposição do splitter e monta um bloco de texto por
+    autor, sempre com o cabeçalho (nome, data e local de nascimento) e sem a
+    cópia dos metadados que o `repr` dos documentos levava ao prompt. Os
+    blocos entram até `max_tokens`; o bloco que não couber inteiro é cortado
+    no fim de uma frase e os demais ficam de fora.
+
+    `texto_original(metadata)` reconstrói o documento de onde os chunks
+    saíram, para localizar cada chunk nele; sem ela (ou se um chunk não for
+    encontrado) a sobreposição é procurada entre os próprios chunks.
+    Os tokens são estimados por `contar_tokens` (por padrão, a mesma
+    aproximação de 4 caracteres por token do perfil das perguntas).
+    '''
+
+    def __init__(self, max_tokens=1000, texto_original=None, contar_tokens=estimar_tokens):
+        self.max_tokens = max_tokens
+        self.texto_original = texto_original
+        self.contar_tokens = contar_tokens
+
+    def _fragmentos(self, documentos):
+        trechos = [documento.page_content for documento in documentos]
+        metadata = documentos[0].metadata
+        if self.texto_original is not None and metadata.get('author'):
+            try:
+                fragmentos = fragmentos_do_original(self.texto_original(metadata), trechos)
+            except KeyError:
+                fragmentos = None
+            if fragmentos is not None:
+                return fragmentos
+
+        fragmentos = mesclar_trechos(trechos)
+        # O chunk inicial (com o nome e a data de nascimento) abre o bloco;
+        # sem ele, esses dados só estariam nos metadados
+        fragmentos.sort(key=lambda fragmento: not fragmento.startswith('author:'))
+        if fragmentos and metadata.get('author') and not fragmentos[0].startswith('author:'):
+            fragmentos.insert(0, _cabecalho(metadata))
+        return fragmentos
+
+    def blocos(self, documentos):
+        grupos = {}
+        for indice, documento in enumerate(documentos):
+            # Documentos sem autor não são mesclados com nenhum outro
+            chave = documento.metadata.get('author') or f'#{indice}'
+            grupos.setdefault(chave, []).append(documento)
+
+        blocos = []
+        for documentos_autor in grupos.values():
+            fragmentos = self._fragmentos(documentos_autor)
+            if fragmentos:
+                blocos.append(_juntar(fragmentos))
+        return blocos
+
+    def comprimir(self, documentos):
+        documentos = list(documentos)
+        incluidos = []
+        restante = self.max_tokens
+        for bloco in self.blocos(documentos):
+            tokens = self.contar_tokens(bloco)
+            if tokens <= restante:
+                incluidos.append(bloco)
+                restante -= tokens
+                continue
+            if restante >= MIN_TOKENS_TRECHO or not incluidos:
+                incluidos.append(_truncar(bloco, restante, self.contar_tokens))
+            break
+
+        contexto = Contexto('\n\n'.join(incluidos))
+        contexto.documentos = len(documentos)
+        contexto.autores = len(incluidos)
+        # Antes, a lista de documentos ia ao prompt formatada com str()
+        contexto.tokens_originais = self.contar_tokens(str(documentos))
+        contexto.tokens = self.contar_tokens(contexto)
+        return contexto
+
+    __call__ = comprimir
@@ -0,0 +1,313 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+from components.perfil_rag import medir_etapa
+from components.trava_arquivo import trava_arquivo
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEmbeddings:
+    '''
+    Cache local de embeddings indexado por (modelo, tipo, hash do texto).
+
+    Os vetores ficam em uma matriz float32 contígua (`vetores.f32`), lida via
+    memória mapeada (`np.memmap`), e o índice chave -> linha em `indice.json`.
+    Novos vetores são sempre acrescentados ao final do arquivo. As gravações
+    são serializadas entre processos, então vários workers podem compartilhar
+    o mesmo diretório.
+    '''
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._arquivo_vetores = os.path.join(diretorio, 'vetores.f32')
+        self._arquivo_indice = os.path.join(diretorio, 'indice.json')
+        self._arquivo_trava = os.path.join(diretorio, '.trava')
+        self._lock = threading.Lock()
+        self._matriz = None
+        self.dimensao = None
+        self._indice = {}
+        self._assinatura = None
+        self._recarregar()
+
+    def _assinatura_indice(self):
+        try:
+            estado = os.stat(self._arquivo_indice)
+        except FileNotFoundError:
+            return None
+        return (estado.st_mtime_ns, estado.st_size)
+
+    def _recarregar(self):
+        # Outro processo pode ter acrescentado vetores desde a última leitura
+        assinatura = self._assinatura_indice()
+        if assinatura is None or assinatura == self._assinatura:
+            return
+        with open(self._arquivo_indice, 'r', encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        self.dimensao = dados['dimensao']
+        self._indice = dados['indice']
+        self._assinatura = assinatura
+
+    def _linhas_gravadas(self):
+        if self.dimensao is None or not os.path.exists(self._arquivo_vetores):
+            return 0
+        return os.path.getsize(self._arquivo_vetores) // (4 * self.dimensao)
+
+    @staticmethod
+    def chave(modelo, tipo, texto):
+        return hashlib.sha256(f'{modelo}\0{tipo}\0{texto}'.encode('utf-8')).hexdigest()
+
+    def __len__(self):
+        return len(self._indice)
+
+    def _matriz_mapeada(self):
+        # Reabre o memmap apenas quando novas linhas foram acrescentadas
+        linhas = self._linhas_gravadas()
+        if self._matriz is None or self._matriz.shape[0] != linhas:
+            self._matriz = np.memmap(
+                self._arquivo_vetores, dtype=np.float32, mode='r', shape=(linhas, self.dimensao)
+            )
+        return self._matriz
+
+    def obter(self, chaves):
+        '''
+        Retorna {chave: vetor} para as chaves presentes no cache.
+        '''
+        with self._lock:
+            linhas = {chave: self._indice[chave] for chave in chaves if chave in self._indice}
+            if not linhas:
+                return {}
+            matriz = self._matriz_mapeada()
+            return {chave: matriz[linha].tolist() for chave, linha in linhas.items()}
+
+    def gravar(self, chaves, vetores):
+        novos = np.asarray(vetores, dtype=np.float32)
+        if novos.size == 0:
+            return
+
+        with self._lock, trava_arquivo(self._arquivo_trava):
+            self._recarregar()
+            if self.dimensao is None:
+                self.dimensao = int(novos.shape[1])
+
+            # As linhas são numeradas pelo tamanho real do arquivo, que pode ter
+            # vetores de uma gravação interrompida antes de atualizar o índice
+            proxima = self._linhas_gravadas()
+            pendentes = []
+            for chave, vetor in zip(chaves, novos):
+                if chave not in self._indice:
+                    self._indice[chave] = proxima + len(pendentes)
+                    pendentes.append(vetor)
+            if not pendentes:
+                return
+
+            with open(self._arquivo_vetores, 'ab') as arquivo:
+                arquivo.write(np.stack(pendentes).tobytes())
+
+            temporario = f'{self._arquivo_indice}.tmp'
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                json.dump({'dimensao': self.dimensao, 'indice': self._indice}, arquivo)
+            os.replace(temporario, self._arquivo_indice)
+            self._assinatura = self._assinatura_indice()
+
+
+# task_type das consultas no modelo do Google; faz parte da chave das consultas,
+# para que vetores gerados com outro task_type nunca sejam reaproveitados
+TASK_TYPE_CONSULTA = 'RETRIEVAL_QUERY'
+TIPO_CONSULTA = f'consulta:{TASK_TYPE_CONSULTA}'
+
+
+def _eh_limite_de_taxa(erro):
+    # google.api_core.exceptions.ResourceExhausted (HTTP 429) e equivalentes
+    texto = f'{type(erro).__name__} {erro}'.lower()
+    return any(marca in texto for marca in ('resourceexhausted', '429', 'rate limit', 'quota'))
+
+
+class EmbeddingsEmLote(Embeddings):
+    '''
+    Etapa de embedding com lotes de tamanho configurável, um pool limitado de
+    requisições concorrentes, backoff exponencial (com jitter) em erros de
+    limite de taxa e cache local por (modelo, hash do texto).
+
+    Só os vetores de documentos vão para o `CacheEmbeddings` em disco. Os das
+    consultas (cada pergunta distinta dos usuários) ficam em um LRU em memória
+    de até `max_consultas` itens, para que o disco não cresça sem limite e uma
+    pergunta nova não pague uma gravação do índice no caminho do /responder.
+    '''
+
+    def __init__(self, base, modelo, cache=None, tamanho_lote=100, max_concorrencia=4,
+                 tentativas=5, espera_inicial=1.0, espera_maxima=60.0, max_consultas=10000):
+        self.base = base
+        self.modelo = modelo
+        self.cache = cache
+        self.tamanho_lote = tamanho_lote
+        self.max_concorrencia = max_concorrencia
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.max_consultas = max_consultas
+        self.estatisticas = {'textos': 0, 'cache_hits': 0, 'lotes': 0, 'retentativas': 0}
+        self._lock = threading.Lock()
+        self._consultas = OrderedDict()
+
+    def _contar(self, chave, quantidade=1):
+        with self._lock:
+            self.estatisticas[chave] += quantidade
+
+    def _com_backoff(self, funcao, *args):
+        for tentativa in range(self.tentativas):
+            try:
+                return funcao(*args)
+            except Exception as erro:
+                if not _eh_limite_de_taxa(erro) or tentativa == self.tentativas - 1:
+                    raise
+                espera = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+                espera *= random.uniform(0.5, 1.0)
+                logger.warning(f'Limite de taxa ao gerar embeddings; nova tentativa em {espera:.1f}s ({erro})')
+                self._contar('retentativas')
+                time.sleep(espera)
+
+    def _embed_lote(self, textos):
+        self._contar('lotes')
+        return self._com_backoff(self.base.embed_documents, textos)
+
+    def embed_documents(self, texts):
+        self._contar('textos', len(texts))
+        chaves = [CacheEmbeddings.chave(self.modelo, 'documento', texto) for texto in texts]
+        encontrados = self.cache.obter(chaves) if self.cache is not None else {}
+        self._contar('cache_hits', sum(1 for chave in chaves if chave in encontrados))
+
+        # Textos repetidos na mesma chamada são embedados uma única vez
+        faltantes = {}
+        for chave, texto in zip(chaves, texts):
+            if chave not in encontrados and chave not in faltantes:
+                faltantes[chave] = texto
+
+        if faltantes:
+            chaves_faltantes = list(faltantes)
+            lotes = [chaves_faltantes[i:i + self.tamanho_lote]
+                     for i in range(0, len(chaves_faltantes), self.tamanho_lote)]
+
+            with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+                resultados = executor.map(lambda lote: self._embed_lote([faltantes[c] for c in lote]), lotes)
+                for lote, vetores in zip(lotes, resultados):
+                    encontrados.update(zip(lote, vetores))
+                    if self.cache is not None:
+                        self.cache.gravar(lote, vetores)
+
+        return [list(encontrados[chave]) for chave in chaves]
+
+    def _embed_consultas_base(self, textos):
+        # Único caminho até a API para consultas, com o task_type explícito: o
+        # `embed_query` do Google envia task_type=None, que vira RETRIEVAL_DOCUMENT
+        if 'task_type' in inspect.signature(self.base.embed_documents).parameters:
+            return self.base.embed_documents(textos, task_type=TASK_TYPE_CONSULTA)
+        return self.base.embed_documents(textos)
+
+    def embed_queries(self, texts):
+        '''
+        Embeddings de várias consultas em uma única chamada (por lote) à API.
+        `embed_query` passa pelo mesmo caminho (`_embed_consultas_base`), então
+        uma pergunta tem o mesmo vetor em um lote ou sozinha, e os vetores
+        guardados no LRU de consultas servem às chamadas seguintes a `embed_query`.
+        '''
+        with medir_etapa('embedding'):
+            return self._embed_queries(texts)
+
+    def _embed_queries(self, texts):
+        chaves = [CacheEmbeddings.chave(self.modelo, TIPO_CONSULTA, texto) for texto in texts]
+        encontrados = self._obter_consultas(chaves)
+        self._contar('cache_hits', sum(1 for chave in chaves if chave in encontrados))
+
+        faltantes = {}
+        for chave, texto in zip(chaves, texts):
+            if chave not in encontrados and chave not in faltantes:
+                faltantes[chave] = texto
+
+        chaves_faltantes = list(faltantes)
+        for inicio in range(0, len(chaves_faltantes), self.tamanho_lote):
+            lote = chaves_faltantes[inicio:inicio + self.tamanho_lote]
+            self._contar('lotes')
+            vetores = self._com_backoff(self._embed_consultas_base, [faltantes[c] for c in lote])
+            encontrados.update(zip(lote, vetores))
+            self._gravar_consultas(lote, vetores)
+
+        return [list(encontrados[chave]) for chave in chaves]
+
+    def _obter_consultas(self, chaves):
+        with self._lock:
+            encontrados = {}
+            for chave in chaves:
+                if chave in self._consultas:
+                    self._consultas.move_to_end(chave)
+                    encontrados[chave] = self._consultas[chave]
+            return encontrados
+
+    def _gravar_consultas(self, chaves, vetores):
+        with self._lock:
+            for chave, vetor in zip(chaves, vetores):
+                self._consultas[chave] = list(vetor)
+                self._consultas.move_to_end(chave)
+            while len(self._consultas) > self.max_consultas:
+                self._consultas.popitem(last=False)
+
+    def embed_query(self, text):
+        with medir_etapa('embedding'):
+            return self._embed_query(text)
+
+    def _embed_query(self, text):
+        return self._embed_queries([text])[0]
+
+
+class EmbedderFalso(Embeddings):
+    '''
+    Embedder local e determinístico para testes e benchmarks offline.
+    O vetor de cada texto é derivado do seu hash; `latencia` simula o tempo
+    de ida e volta de cada chamada à API e `taxa` (chamadas/segundo) a cota
+    de requisições do provedor.
+    '''
+
+    def __init__(self, dimensao=768, latencia=0.0, taxa=0.0):
+        self.dimensao = dimensao
+        self.latencia = latencia
+        self.taxa = taxa
+        self.chamadas = 0
+        self._proxima = 0.0
+        self._lock = threading.Lock()
+
+    def _vetor(self, texto):
+        semente = int.from_bytes(hashlib.sha256(texto.encode('utf-8')).digest()[:8], 'little')
+        vetor = np.random.default_rng(semente).standard_normal(self.dimensao).astype(np.float32)
+        return (vetor / np.linalg.norm(vetor)).tolist()
+
+    def _chamar(self):
+        with self._lock:
+            self.chamadas += 1
+            espera = 0.0
+            if self.taxa:
+                agora = time.monotonic()
+                espera = max(0.0, self._proxima - agora)
+                self._proxima = max(agora, self._proxima) + 1.0 / self.taxa
+        if espera + self.latencia:
+            time.sleep(espera + self.latencia)
+
+    def embed_documents(self, texts):
+        self._chamar()
+        return [self._vetor(texto) for texto in texts]
+
+    def embed_query(self, text):
+        self._chamar()
+        return self._vetor(text)
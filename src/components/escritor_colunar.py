@@ -0,0 +1,170 @@
+import argparse
+import ast
+import csv
+import logging
+import os
+
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele o coletor grava apenas CSV
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Extensão de cada formato colunar
+FORMATOS = {'parquet': '.parquet', 'arrow': '.arrow'}
+EXTENSOES = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+
+def _exigir_pyarrow() -> None:
+    if pa is None:
+        raise ImportError('Os formatos Parquet e Arrow requerem o pacote pyarrow instalado.')
+
+
+def formato_do_arquivo(caminho: str) -> str:
+    '''
+    'parquet', 'arrow' ou 'csv', de acordo com a extensão de `caminho`.
+    '''
+    return EXTENSOES.get(os.path.splitext(caminho)[1].lower(), 'csv')
+
+
+def esquema(campos: List[str]) -> 'pa.Schema':
+    '''
+    Esquema Arrow dos arquivos do coletor: `tags` é list<string> e `autor`
+    (repetido em muitas citações) é dictionary-encoded; os demais são string.
+    '''
+    _exigir_pyarrow()
+    tipos = {
+        'tags': pa.list_(pa.string()),
+        'autor': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(campo, tipos.get(campo, pa.string())) for campo in campos])
+
+
+def converter_tags(valor: Any) -> List[str]:
+    '''
+    Tags como lista: aceita listas e a representação gravada no CSV ("['a', 'b']").
+    '''
+    if isinstance(valor, (list, tuple)):
+        return list(valor)
+    if not valor:
+        return []
+    return list(ast.literal_eval(valor))
+
+
+class EscritorColunar:
+    '''
+    Escritor em streaming para Parquet ou Arrow IPC (formato de arquivo), com a
+    mesma interface do `EscritorCsv`: as linhas são acumuladas em lotes de
+    `tamanho_lote` e cada lote vira um row group (Parquet) ou record batch (Arrow).
+    '''
+
+    def __init__(self, nome_file: str, campos: List[str], formato: Optional[str] = None,
+                 tamanho_lote: int = 1000):
+        _exigir_pyarrow()
+        self.nome_file = nome_file
+        self.campos = campos
+        self.formato = formato or formato_do_arquivo(nome_file)
+        self.tamanho_lote = tamanho_lote
+        self.esquema = esquema(campos)
+        self.linhas = 0
+        self._lote: List[Dict[str, Any]] = []
+        # Dicionário único por coluna, que só cresce: cada lote grava apenas os
+        # valores novos (delta), como exige o formato de arquivo Arrow IPC
+        self._dicionarios: Dict[str, Dict[str, int]] = {
+            campo.name: {} for campo in self.esquema if pa.types.is_dictionary(campo.type)
+        }
+
+        if self.formato == 'parquet':
+            self._escritor = pq.ParquetWriter(nome_file, self.esquema, compression='zstd')
+        elif self.formato == 'arrow':
+            opcoes = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._escritor = pa.ipc.new_file(nome_file, self.esquema, options=opcoes)
+        else:
+            raise ValueError(f'Formato colunar desconhecido: {self.formato}')
+
+    def escrever(self, linha: Dict[str, Any]) -> None:
+        self._lote.append(linha)
+        self.linhas += 1
+        if len(self._lote) >= self.tamanho_lote:
+            self.descarregar()
+
+    def escrever_varias(self, linhas: Iterable[Dict[str, Any]]) -> None:
+        for linha in linhas:
+            self.escrever(linha)
+
+    def _coluna_dicionario(self, campo: str, valores: List[Optional[str]]) -> 'pa.DictionaryArray':
+        dicionario = self._dicionarios[campo]
+        indices = [None if valor is None else dicionario.setdefault(valor, len(dicionario)) for valor in valores]
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(dicionario), pa.string()))
+
+    def descarregar(self) -> None:
+        if not self._lote:
+            return
+        colunas = []
+        for campo in self.esquema:
+            valores = [linha.get(campo.name) for linha in self._lote]
+            if campo.name in self._dicionarios:
+                colunas.append(self._coluna_dicionario(campo.name, valores))
+            elif campo.name == 'tags':
+                colunas.append(pa.array([converter_tags(tags) for tags in valores], campo.type))
+            else:
+                colunas.append(pa.array(valores, campo.type))
+        self._escritor.write_batch(pa.RecordBatch.from_arrays(colunas, schema=self.esquema))
+        self._lote.clear()
+
+    def fechar(self) -> None:
+        if self._escritor is not None:
+            self.descarregar()
+            self._escritor.close()
+            self._escritor = None
+
+    def __enter__(self) -> 'EscritorColunar':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+def converter_csv(origem: str, destino: str, formato: Optional[str] = None, tamanho_lote: int = 1000) -> int:
+    '''
+    Converte um CSV do coletor para Parquet/Arrow em streaming (as tags são
+    convertidas aqui, uma única vez). A gravação é atômica. Retorna o número de linhas.
+    '''
+    temporario = f'{destino}.tmp'
+    with open(origem, 'r', newline='', encoding='utf-8') as arquivo:
+        leitor = csv.DictReader(arquivo)
+        with EscritorColunar(temporario, leitor.fieldnames or [], formato or formato_do_arquivo(destino),
+                             tamanho_lote) as escritor:
+            escritor.escrever_varias(leitor)
+    os.replace(temporario, destino)
+    logger.info(f'{escritor.linhas} linhas de {origem} gravadas em {destino}.')
+    return escritor.linhas
+
+
+def ler_tabela(caminho: str) -> 'pa.Table':
+    '''
+    Lê um arquivo Parquet ou Arrow IPC com memory mapping. No Arrow IPC as
+    colunas apontam diretamente para o arquivo mapeado (sem cópia).
+    '''
+    _exigir_pyarrow()
+    if formato_do_arquivo(caminho) == 'arrow':
+        return pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+    return pq.read_table(caminho, memory_map=True)
+
+
+# Converte um CSV já gravado pelo coletor:
+#
+#   $ cd src/components/
+#   $ python escritor_colunar.py ../documents/dados.csv ../documents/dados.parquet
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Converte um CSV do coletor para Parquet ou Arrow IPC')
+    parser.add_argument('origem')
+    parser.add_argument('destino', help='arquivo .parquet ou .arrow')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    converter_csv(args.origem, args.destino)
@@ -0,0 +1,107 @@
+import csv
+import json
+import logging
+import os
+
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_CITACAO = ['autor', 'citacao', 'tags', 'pagina']
+CAMPOS_AUTOR = ['author', 'data_nascimento', 'local_nascimento', 'descricao']
+
+
+class EscritorCsv:
+    '''
+    Escritor CSV em streaming com esquema fixo.
+
+    As linhas são acumuladas em lotes de `tamanho_lote` e gravadas em disco a
+    cada lote, de modo que a memória usada não depende do tamanho da raspagem.
+    Com `posicao`, o arquivo existente é truncado nessa posição (em bytes) e
+    as novas linhas são acrescentadas, sem repetir o cabeçalho.
+    '''
+
+    def __init__(self, nome_file: str, campos: List[str], tamanho_lote: int = 100,
+                 posicao: Optional[int] = None):
+        self.nome_file = nome_file
+        self.campos = campos
+        self.tamanho_lote = tamanho_lote
+        self.linhas = 0
+        self._lote: List[Dict[str, Any]] = []
+
+        if posicao is not None and os.path.exists(nome_file):
+            self._arquivo = open(nome_file, 'r+', newline='', encoding='utf-8')
+            self._arquivo.seek(posicao)
+            self._arquivo.truncate()
+            self._escritor = csv.DictWriter(self._arquivo, fieldnames=campos, extrasaction='ignore')
+        else:
+            self._arquivo = open(nome_file, 'w', newline='', encoding='utf-8')
+            self._escritor = csv.DictWriter(self._arquivo, fieldnames=campos, extrasaction='ignore')
+            self._escritor.writeheader()
+
+    def escrever(self, linha: Dict[str, Any]) -> None:
+        self._lote.append(linha)
+        self.linhas += 1
+        if len(self._lote) >= self.tamanho_lote:
+            self.descarregar()
+
+    def escrever_varias(self, linhas: Iterable[Dict[str, Any]]) -> None:
+        for linha in linhas:
+            self.escrever(linha)
+
+    def descarregar(self) -> None:
+        '''
+        Grava o lote pendente e força a escrita em disco.
+        '''
+        if self._lote:
+            self._escritor.writerows(self._lote)
+            self._lote.clear()
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def posicao(self) -> int:
+        '''
+        Posição (em bytes) do final do arquivo após gravar o lote pendente.
+        '''
+        self.descarregar()
+        return self._arquivo.tell()
+
+    def fechar(self) -> None:
+        if not self._arquivo.closed:
+            self.descarregar()
+            self._arquivo.close()
+
+    def __enter__(self) -> 'EscritorCsv':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+class Checkpoint:
+    '''
+    Ponto de retomada da raspagem: próxima página de listagem, URLs de autores
+    já visitadas e posição de cada arquivo CSV parcial. Gravado de forma atômica.
+    '''
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+
+    def carregar(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.caminho):
+            return None
+        with open(self.caminho, 'r', encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+        logger.info(f'Retomando raspagem a partir de {estado["proxima"]} '
+                    f'({len(estado["visitados"])} autores já visitados)')
+        return estado
+
+    def salvar(self, proxima: Optional[str], visitados: Iterable[str], posicoes: Dict[str, int]) -> None:
+        temporario = f'{self.caminho}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'proxima': proxima, 'visitados': sorted(visitados), 'posicoes': posicoes}, arquivo)
+        os.replace(temporario, self.caminho)
+
+    def remover(self) -> None:
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
@@ -0,0 +1,178 @@
+import re
+import threading
+
+from bs4 import BeautifulSoup
+from typing import Any, Dict, List
+from urllib.parse import urljoin
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml é opcional; sem ele apenas o backend 'bs4' fica disponível
+    etree = None
+    lxml_html = None
+
+
+def _limpar_descricao(descricao: str) -> str:
+    # limpeza controlada (remove quebras de linha e aspas extras)
+    return re.sub(r'["\u201c\u201d]', '', descricao)
+
+
+class ExtratorBeautifulSoup:
+    '''
+    Extrator original: árvore completa do BeautifulSoup com `html.parser`.
+    '''
+    nome = 'bs4'
+
+    def __init__(self, parser: str = 'html.parser'):
+        self.parser = parser
+
+    def citacoes(self, soup: BeautifulSoup, full_url: str) -> List[Dict[str, Any]]:
+        resultados: List[Dict[str, Any]] = []
+        for q in soup.find_all('div', class_='quote'):
+            tags = [a.get_text(strip=True) for a in q.find_all('a', class_='tag')]
+            resultados.append({
+                'autor':   q.find('small', class_='author').get_text(strip=True),
+                'citacao': q.find('span', class_='text').get_text(strip=True),
+                'tags':    tags,
+                'pagina':  full_url
+            })
+        return resultados
+
+    def pagina_listagem(self, html: str, full_url: str, url: str) -> Dict[str, Any]:
+        soup = BeautifulSoup(html, self.parser)
+
+        autores = []
+        for ah in soup.find_all('a', string='(about)'):
+            href = ah.get('href')
+            if href:
+                autores.append(urljoin(url, href))
+
+        next_li = soup.select_one('li.next a')
+
+        return {
+            'citacoes': self.citacoes(soup, full_url),
+            'autores': autores,
+            'proxima': next_li['href'] if next_li and next_li.get('href') else None
+        }
+
+    def autor(self, html: str) -> Dict[str, str]:
+        soup_a = BeautifulSoup(html, self.parser)
+        # uso de get_text(strip=True) e checagem de None
+        name_tag = soup_a.find('h3', class_='author-title')
+        date_tag = soup_a.find('span', class_='author-born-date')
+        place_tag = soup_a.find('span', class_='author-born-location')
+        desc_tag = soup_a.find('div', class_='author-description')
+
+        return {
+            'author': name_tag.get_text(strip=True) if name_tag else '',
+            'data_nascimento': date_tag.get_text(strip=True) if date_tag else '',
+            'local_nascimento': place_tag.get_text(strip=True) if place_tag else '',
+            'descricao': _limpar_descricao(desc_tag.get_text(' ', strip=True) if desc_tag else '')
+        }
+
+
+def _classe(nome: str) -> str:
+    # Equivalente XPath de `class_=nome` do BeautifulSoup (classe contida na lista de classes)
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nome} ')"
+
+
+def _texto(elemento, separador: str = '') -> str:
+    # Mesma semântica de `get_text(separador, strip=True)` do BeautifulSoup
+    return separador.join(t.strip() for t in elemento.itertext() if t.strip())
+
+
+def _raiz(html: str):
+    # Sem conteúdo (vazio, só espaços ou comentários) o lxml levanta ParserError,
+    # enquanto o BeautifulSoup devolve uma árvore vazia: aqui também
+    if html.strip():
+        try:
+            return lxml_html.fromstring(html)
+        except etree.ParserError:
+            pass
+    return lxml_html.Element('html')
+
+
+class ExtratorLxml:
+    '''
+    Extrator rápido: parser em C do lxml e seletores XPath pré-compilados,
+    aplicados em uma única passada por página. Produz os mesmos dicionários
+    que `ExtratorBeautifulSoup`.
+    As expressões XPath compiladas não devem ser compartilhadas entre threads;
+    use `obter_extrator`, que mantém uma instância por thread.
+    '''
+    nome = 'lxml'
+
+    def __init__(self):
+        if etree is None:
+            raise ImportError('O backend lxml requer o pacote lxml instalado.')
+
+        self._CITACOES = etree.XPath(f".//div[{_classe('quote')}]")
+        self._AUTOR_CITACAO = etree.XPath(f".//small[{_classe('author')}]")
+        self._TEXTO_CITACAO = etree.XPath(f".//span[{_classe('text')}]")
+        self._TAGS = etree.XPath(f".//a[{_classe('tag')}]")
+        self._ABOUT = etree.XPath(".//a[count(node()) = 1 and text() = '(about)']/@href")
+        self._PROXIMA = etree.XPath(f"(.//li[{_classe('next')}]//a)[1]")
+        self._NOME = etree.XPath(f"(.//h3[{_classe('author-title')}])[1]")
+        self._DATA = etree.XPath(f"(.//span[{_classe('author-born-date')}])[1]")
+        self._LOCAL = etree.XPath(f"(.//span[{_classe('author-born-location')}])[1]")
+        self._DESCRICAO = etree.XPath(f"(.//div[{_classe('author-description')}])[1]")
+
+    def pagina_listagem(self, html: str, full_url: str, url: str) -> Dict[str, Any]:
+        raiz = _raiz(html)
+
+        citacoes = []
+        for q in self._CITACOES(raiz):
+            citacoes.append({
+                'autor':   _texto(self._AUTOR_CITACAO(q)[0]),
+                'citacao': _texto(self._TEXTO_CITACAO(q)[0]),
+                'tags':    [_texto(a) for a in self._TAGS(q)],
+                'pagina':  full_url
+            })
+
+        proxima = self._PROXIMA(raiz)
+
+        return {
+            'citacoes': citacoes,
+            'autores': [urljoin(url, href) for href in self._ABOUT(raiz) if href],
+            'proxima': (proxima[0].get('href') or None) if proxima else None
+        }
+
+    def autor(self, html: str) -> Dict[str, str]:
+        raiz = _raiz(html)
+
+        def primeiro(xpath, separador: str = '') -> str:
+            encontrados = xpath(raiz)
+            return _texto(encontrados[0], separador) if encontrados else ''
+
+        return {
+            'author': primeiro(self._NOME),
+            'data_nascimento': primeiro(self._DATA),
+            'local_nascimento': primeiro(self._LOCAL),
+            'descricao': _limpar_descricao(primeiro(self._DESCRICAO, ' '))
+        }
+
+
+EXTRATORES = {
+    ExtratorBeautifulSoup.nome: ExtratorBeautifulSoup,
+    ExtratorLxml.nome: ExtratorLxml,
+}
+
+BACKEND_PADRAO = ExtratorLxml.nome if etree is not None else ExtratorBeautifulSoup.nome
+
+_local = threading.local()
+
+
+def obter_extrator(backend: str = BACKEND_PADRAO):
+    '''
+    Retorna o extrator registrado em `EXTRATORES` para o backend informado.
+    Cada thread recebe sua própria instância.
+    '''
+    if backend not in EXTRATORES:
+        raise ValueError(f'Backend de extração desconhecido: {backend}. Opções: {", ".join(EXTRATORES)}')
+
+    instancias = getattr(_local, 'instancias', None)
+    if instancias is None:
+        instancias = _local.instancias = {}
+    if backend not in instancias:
+        instancias[backend] = EXTRATORES[backend]()
+    return instancias[backend]
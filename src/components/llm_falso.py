@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ChatFalso(BaseChatModel):
+    '''
+    Modelo de chat local e determinístico para testes de carga e benchmarks offline.
+    Responde com um texto fixo após `latencia` segundos, sem bloquear o event loop
+    no caminho assíncrono. No streaming, a latência é distribuída entre os tokens
+    (uma palavra por token). O uso de tokens é informado como nos modelos reais
+    (`usage_metadata`), contando uma palavra por token. `latencia_por_token`
+    simula o processamento do prompt: soma esse tempo por token de entrada
+    antes da resposta (ou do primeiro token, no streaming).
+    '''
+
+    latencia: float = 0.0
+    latencia_por_token: float = 0.0
+    chamadas: int = 0
+    resposta: str = 'Resposta simulada com base no contexto fornecido sobre o autor.'
+
+    @property
+    def _llm_type(self):
+        return 'falso'
+
+    def _uso(self, messages):
+        entrada = sum(len(str(mensagem.content).split()) for mensagem in messages)
+        saida = len(self.resposta.split())
+        return {'input_tokens': entrada, 'output_tokens': saida, 'total_tokens': entrada + saida}
+
+    def _tempo_prompt(self, messages):
+        return self.latencia_por_token * self._uso(messages)['input_tokens']
+
+    def _resultado(self, messages):
+        mensagem = AIMessage(content=self.resposta, usage_metadata=self._uso(messages))
+        return ChatResult(generations=[ChatGeneration(message=mensagem)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.chamadas += 1
+        if self.latencia or self.latencia_por_token:
+            time.sleep(self.latencia + self._tempo_prompt(messages))
+        return self._resultado(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.chamadas += 1
+        if self.latencia or self.latencia_por_token:
+            await asyncio.sleep(self.latencia + self._tempo_prompt(messages))
+        return self._resultado(messages)
+
+    def _tokens(self):
+        palavras = self.resposta.split(' ')
+        return [palavra if i == 0 else f' {palavra}' for i, palavra in enumerate(palavras)]
+
+    def _pedaco(self, token, messages, ultimo):
+        # O uso de tokens vai no último pedaço; o LangChain soma os pedaços
+        uso = self._uso(messages) if ultimo else None
+        return ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=uso))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.chamadas += 1
+        if self.latencia_por_token:
+            time.sleep(self._tempo_prompt(messages))
+        tokens = self._tokens()
+        for indice, token in enumerate(tokens):
+            if self.latencia:
+                time.sleep(self.latencia / len(tokens))
+            pedaco = self._pedaco(token, messages, ultimo=indice == len(tokens) - 1)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=pedaco)
+            yield pedaco
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.chamadas += 1
+        if self.latencia_por_token:
+            await asyncio.sleep(self._tempo_prompt(messages))
+        tokens = self._tokens()
+        for indice, token in enumerate(tokens):
+            if self.latencia:
+                await asyncio.sleep(self.latencia / len(tokens))
+            pedaco = self._pedaco(token, messages, ultimo=indice == len(tokens) - 1)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=pedaco)
+            yield pedaco
@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import requests
+
+# Limites (segundos) dos buckets dos histogramas, como os padrões do Prometheus
+LIMITES_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ETAPAS = ('busca', 'parse', 'escrita', 'espera')
+
+
+class Histograma:
+    '''
+    Histograma cumulativo de latências com buckets fixos (memória constante,
+    independente do tamanho da raspagem). Os percentis são estimados por
+    interpolação dentro do bucket.
+    '''
+
+    def __init__(self, limites: Sequence[float] = LIMITES_PADRAO):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)  # último bucket: +Inf
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def percentil(self, fracao: float) -> float:
+        if not self.total:
+            return 0.0
+        alvo = fracao * self.total
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = self.limites[indice - 1] if indice > 0 else 0.0
+                superior = self.limites[indice] if indice < len(self.limites) else self.maximo
+                return min(inferior + (superior - inferior) * (alvo - acumulado) / contagem, self.maximo)
+            acumulado += contagem
+        return self.maximo
+
+    def resumo(self) -> Dict[str, float]:
+        return {
+            'contagem': self.total,
+            'soma': round(self.soma, 6),
+            'media': round(self.soma / self.total, 6) if self.total else 0.0,
+            'p50': round(self.percentil(0.50), 6),
+            'p95': round(self.percentil(0.95), 6),
+            'p99': round(self.percentil(0.99), 6),
+            'maximo': round(self.maximo, 6),
+        }
+
+
+def linhas_histogramas(nome: str, ajuda: str, histogramas: Dict[str, Histograma]) -> List[str]:
+    '''
+    Histogramas por etapa no formato de exposição de texto do Prometheus.
+    '''
+    linhas = [f'# HELP {nome} {ajuda}', f'# TYPE {nome} histogram']
+    for etapa, histograma in histogramas.items():
+        acumulado = 0
+        for limite, contagem in zip(histograma.limites + (float('inf'),), histograma.contagens):
+            acumulado += contagem
+            le = '+Inf' if limite == float('inf') else repr(limite)
+            linhas.append(f'{nome}_bucket{{etapa="{etapa}",le="{le}"}} {acumulado}')
+        linhas.append(f'{nome}_sum{{etapa="{etapa}"}} {histograma.soma}')
+        linhas.append(f'{nome}_count{{etapa="{etapa}"}} {histograma.total}')
+    return linhas
+
+
+class MetricasColeta:
+    '''
+    Métricas da raspagem, compartilhadas entre as threads do coletor:
+
+    * histogramas de latência por etapa: `busca` (requisição HTTP, incluindo o
+      corpo), `parse` (extrator de HTML), `escrita` (destino das linhas) e
+      `espera` (sleep fixo, token bucket e limite por host);
+    * bytes recebidos, novas tentativas do `ClienteHttp`, respostas por status HTTP
+      (falhas de conexão/timeout contam como 'erro');
+    * páginas de listagem e autores processados, e as taxas por segundo;
+    * páginas abandonadas após todas as tentativas (`paginas_com_erro`).
+
+    Exporta um resumo em JSON (`resumo`) ou no formato de texto do Prometheus
+    (`prometheus`).
+    '''
+
+    def __init__(self, limites: Sequence[float] = LIMITES_PADRAO):
+        self.histogramas = {etapa: Histograma(limites) for etapa in ETAPAS}
+        self.status: Counter = Counter()
+        self.contadores = {'bytes': 0, 'retries': 0, 'paginas': 0, 'autores': 0, 'paginas_com_erro': 0}
+        self._inicio = time.monotonic()
+        self._fim: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observar(self, etapa: str, segundos: float) -> None:
+        with self._lock:
+            self.histogramas[etapa].observar(segundos)
+
+    @contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio)
+
+    def cronometrar(self, etapa: str, funcao: Callable[..., Any]) -> Callable[..., Any]:
+        '''
+        Envolve `funcao` para que cada chamada seja observada em `etapa`.
+        '''
+        def medida(*args, **kwargs):
+            with self.medir(etapa):
+                return funcao(*args, **kwargs)
+        return medida
+
+    def contar(self, chave: str, quantidade: int = 1) -> None:
+        with self._lock:
+            self.contadores[chave] += quantidade
+
+    def registrar_resposta(self, resp: requests.Response) -> None:
+        with self._lock:
+            self.status[str(resp.status_code)] += 1
+            self.contadores['bytes'] += len(resp.content)
+
+    def registrar_falha(self, erro: Exception) -> None:
+        # Sem resposta HTTP (conexão recusada, timeout, ...)
+        with self._lock:
+            self.status['erro'] += 1
+
+    def finalizar(self) -> None:
+        '''
+        Congela a duração usada nas taxas por segundo.
+        '''
+        self._fim = time.monotonic()
+
+    def duracao(self) -> float:
+        return (self._fim or time.monotonic()) - self._inicio
+
+    def resumo(self) -> Dict[str, Any]:
+        duracao = self.duracao()
+        with self._lock:
+            return {
+                'duracao': round(duracao, 3),
+                'paginas_por_segundo': round(self.contadores['paginas'] / duracao, 3) if duracao else 0.0,
+                'autores_por_segundo': round(self.contadores['autores'] / duracao, 3) if duracao else 0.0,
+                **self.contadores,
+                'status': dict(self.status),
+                'etapas': {etapa: histograma.resumo() for etapa, histograma in self.histogramas.items()},
+            }
+
+    def json(self) -> str:
+        return json.dumps(self.resumo(), ensure_ascii=False, indent=2)
+
+    def prometheus(self, prefixo: str = 'coletor') -> str:
+        '''
+        Métricas no formato de exposição de texto do Prometheus.
+        '''
+        resumo = self.resumo()
+        with self._lock:
+            linhas = linhas_histogramas(f'{prefixo}_etapa_segundos', 'Latência de cada etapa da raspagem.',
+                                        self.histogramas)
+
+        contadores = [
+            ('bytes_total', 'Bytes recebidos nas respostas HTTP.', resumo['bytes']),
+            ('retries_total', 'Novas tentativas do cliente HTTP.', resumo['retries']),
+            ('paginas_total', 'Páginas de listagem processadas.', resumo['paginas']),
+            ('autores_total', 'Autores processados.', resumo['autores']),
+            ('paginas_com_erro_total', 'Páginas abandonadas após todas as tentativas.', resumo['paginas_com_erro']),
+        ]
+        for nome, ajuda, valor in contadores:
+            linhas += [f'# HELP {prefixo}_{nome} {ajuda}', f'# TYPE {prefixo}_{nome} counter',
+                       f'{prefixo}_{nome} {valor}']
+
+        linhas += [f'# HELP {prefixo}_respostas_total Respostas por status HTTP.',
+                   f'# TYPE {prefixo}_respostas_total counter']
+        linhas += [f'{prefixo}_respostas_total{{status="{status}"}} {total}'
+                   for status, total in sorted(resumo['status'].items())]
+
+        for nome, ajuda in [('paginas_por_segundo', 'Páginas de listagem por segundo.'),
+                            ('autores_por_segundo', 'Autores por segundo.'),
+                            ('duracao_segundos', 'Duração da raspagem.')]:
+            valor = resumo['duracao'] if nome == 'duracao_segundos' else resumo[nome]
+            linhas += [f'# HELP {prefixo}_{nome} {ajuda}', f'# TYPE {prefixo}_{nome} gauge',
+                       f'{prefixo}_{nome} {valor}']
+        return '\n'.join(linhas) + '\n'
+
+    def exportar(self, caminho: str) -> None:
+        '''
+        Grava as métricas em `caminho`: texto do Prometheus para `.prom`, JSON nos demais.
+        '''
+        conteudo = self.prometheus() if caminho.endswith('.prom') else self.json()
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
@@ -0,0 +1,284 @@
+import contextvars
+import threading
+import time
+
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+from components.metricas_coleta import LIMITES_PADRAO, Histograma, linhas_histogramas
+
+# A chamada ao LLM pode passar de 10 s
+LIMITES_RAG = LIMITES_PADRAO + (30.0, 60.0)
+
+# `embedding` acontece dentro de `cache` (nível semântico) e de `recuperacao`
+ETAPAS_RAG = ('fila', 'cache', 'embedding', 'recuperacao', 'compressao', 'prompt', 'llm', 'parser', 'total')
+
+# Etapas da cadeia, identificadas pelo `run_name` dado em `agent.obter_cadeia`
+ETAPAS_CADEIA = ('recuperacao', 'compressao', 'prompt', 'parser')
+
+
+class PerfilRequisicao:
+    '''
+    Perfil de uma pergunta: tempo gasto em cada etapa (acumulado, em segundos),
+    documentos recuperados, tokens do contexto (antes e depois do
+    `CompressorContexto`), tokens do prompt e da resposta e o nível do cache
+    de respostas que respondeu ('exato' ou 'semantico'), se algum.
+    '''
+
+    def __init__(self):
+        self.etapas = {}
+        self.documentos = None
+        self.tokens_contexto = None
+        self.tokens_contexto_original = None
+        self.tokens_prompt = 0
+        self.tokens_resposta = 0
+        self.tokens_estimados = False
+        self.cache = None
+        self.total = None
+        self._inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def adicionar(self, etapa, segundos):
+        with self._lock:
+            self.etapas[etapa] = self.etapas.get(etapa, 0.0) + segundos
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.adicionar(etapa, time.perf_counter() - inicio)
+
+    @property
+    def tokens_economizados(self):
+        if self.tokens_contexto is None:
+            return 0
+        return max(0, self.tokens_contexto_original - self.tokens_contexto)
+
+    def finalizar(self):
+        if self.total is None:
+            self.total = time.perf_counter() - self._inicio
+
+    def resumo(self):
+        self.finalizar()
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'etapas_ms': {etapa: round(segundos * 1000, 2) for etapa, segundos in self.etapas.items()},
+            'documentos': self.documentos,
+            'tokens_contexto': self.tokens_contexto,
+            'tokens_economizados': self.tokens_economizados,
+            'tokens_prompt': self.tokens_prompt,
+            'tokens_resposta': self.tokens_resposta,
+            'tokens_estimados': self.tokens_estimados,
+            'cache': self.cache,
+        }
+
+    def server_timing(self):
+        '''
+        Valor do cabeçalho `Server-Timing` (exibido nas ferramentas do navegador).
+        '''
+        self.finalizar()
+        etapas = [*self.etapas.items(), ('total', self.total)]
+        return ', '.join(f'{etapa};dur={segundos * 1000:.1f}' for etapa, segundos in etapas)
+
+    def cabecalhos(self):
+        cabecalhos = {'Server-Timing': self.server_timing()}
+        if self.documentos is not None:
+            cabecalhos['X-RAG-Documentos'] = str(self.documentos)
+        if self.tokens_contexto is not None:
+            cabecalhos['X-RAG-Tokens-Contexto'] = str(self.tokens_contexto)
+            cabecalhos['X-RAG-Tokens-Economizados'] = str(self.tokens_economizados)
+        if self.tokens_prompt or self.tokens_resposta:
+            cabecalhos['X-RAG-Tokens-Prompt'] = str(self.tokens_prompt)
+            cabecalhos['X-RAG-Tokens-Resposta'] = str(self.tokens_resposta)
+        if self.cache:
+            cabecalhos['X-RAG-Cache'] = self.cache
+        return cabecalhos
+
+
+# Perfis da execução corrente; propagado para as threads de `asyncio.to_thread`,
+# onde os embeddings das consultas são calculados
+_perfis_atuais = contextvars.ContextVar('perfis_rag', default=())
+
+
+@contextmanager
+def perfilar(*perfis):
+    '''
+    Etapas medidas com `medir_etapa` dentro do bloco são somadas a `perfis`
+    (várias perguntas iguais de um lote compartilham a mesma execução).
+    '''
+    perfis = tuple(perfil for perfil in perfis if perfil is not None)
+    token = _perfis_atuais.set(perfis)
+    try:
+        yield
+    finally:
+        _perfis_atuais.reset(token)
+
+
+@contextmanager
+def medir_etapa(etapa):
+    perfis = _perfis_atuais.get()
+    if not perfis:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        for perfil in perfis:
+            perfil.adicionar(etapa, segundos)
+
+
+def estimar_tokens(texto):
+    # Aproximação usada apenas quando o provedor não informa o uso de tokens
+    return max(1, len(texto) // 4) if texto else 0
+
+
+class RastreadorRag(BaseCallbackHandler):
+    '''
+    Callback do LangChain que mede as etapas da cadeia RAG (recuperação,
+    compressão do contexto, formatação do prompt, chamada ao LLM e parse da
+    saída), conta os documentos recuperados, os tokens do contexto e os
+    tokens do prompt e da resposta.
+    '''
+
+    # Roda no próprio event loop, sem passar por um executor
+    run_inline = True
+
+    def __init__(self, *perfis):
+        self.perfis = perfis
+        self._inicios = {}
+        self._textos_prompt = {}
+
+    def _iniciar(self, run_id, etapa):
+        self._inicios[run_id] = (etapa, time.perf_counter())
+
+    def _encerrar(self, run_id):
+        etapa, inicio = self._inicios.pop(run_id, (None, None))
+        if etapa is not None:
+            segundos = time.perf_counter() - inicio
+            for perfil in self.perfis:
+                perfil.adicionar(etapa, segundos)
+        return etapa
+
+    def on_chain_start(self, serialized, inputs, *, run_id, name=None, **kwargs):
+        if name in ETAPAS_CADEIA:
+            self._iniciar(run_id, name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        etapa = self._encerrar(run_id)
+        if etapa == 'recuperacao' and isinstance(outputs, list):
+            for perfil in self.perfis:
+                perfil.documentos = len(outputs)
+        elif etapa == 'compressao' and hasattr(outputs, 'tokens_originais'):
+            for perfil in self.perfis:
+                perfil.tokens_contexto = outputs.tokens
+                perfil.tokens_contexto_original = outputs.tokens_originais
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._encerrar(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._iniciar(run_id, 'llm')
+        self._textos_prompt[run_id] = ''.join(str(mensagem.content) for lista in messages for mensagem in lista)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._iniciar(run_id, 'llm')
+        self._textos_prompt[run_id] = ''.join(prompts)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._encerrar(run_id)
+        texto_prompt = self._textos_prompt.pop(run_id, '')
+        geracao = response.generations[0][0] if response.generations and response.generations[0] else None
+        uso = getattr(getattr(geracao, 'message', None), 'usage_metadata', None)
+        if uso:
+            prompt, resposta, estimados = uso.get('input_tokens', 0), uso.get('output_tokens', 0), False
+        else:
+            prompt = estimar_tokens(texto_prompt)
+            resposta = estimar_tokens(geracao.text if geracao is not None else '')
+            estimados = True
+        for perfil in self.perfis:
+            perfil.tokens_prompt += prompt
+            perfil.tokens_resposta += resposta
+            perfil.tokens_estimados = perfil.tokens_estimados or estimados
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._encerrar(run_id)
+        self._textos_prompt.pop(run_id, None)
+
+
+def configuracao(*perfis):
+    '''
+    `config` para `invoke`/`ainvoke`/`astream` com o rastreador dos perfis.
+    '''
+    perfis = [perfil for perfil in perfis if perfil is not None]
+    return {'callbacks': [RastreadorRag(*perfis)]} if perfis else None
+
+
+class MetricasRag:
+    '''
+    Agregado dos perfis de todas as perguntas do worker: histogramas de
+    latência por etapa, acertos do cache de respostas, documentos e tokens
+    (inclusive os economizados pela compressão do contexto).
+    Exposto em `/metrics` no formato de texto do Prometheus.
+    '''
+
+    def __init__(self, limites=LIMITES_RAG):
+        self.histogramas = {etapa: Histograma(limites) for etapa in ETAPAS_RAG}
+        self.contadores = {
+            'requisicoes': 0, 'erros': 0, 'cache_exato': 0, 'cache_semantico': 0,
+            'documentos': 0, 'tokens_contexto': 0, 'tokens_economizados': 0,
+            'tokens_prompt': 0, 'tokens_resposta': 0,
+        }
+        self._lock = threading.Lock()
+
+    def registrar(self, perfil, erro=False):
+        perfil.finalizar()
+        with self._lock:
+            for etapa, segundos in perfil.etapas.items():
+                self.histogramas[etapa].observar(segundos)
+            self.histogramas['total'].observar(perfil.total)
+            self.contadores['requisicoes'] += 1
+            self.contadores['erros'] += int(erro)
+            if perfil.cache:
+                self.contadores[f'cache_{perfil.cache}'] += 1
+            self.contadores['documentos'] += perfil.documentos or 0
+            self.contadores['tokens_contexto'] += perfil.tokens_contexto or 0
+            self.contadores['tokens_economizados'] += perfil.tokens_economizados
+            self.contadores['tokens_prompt'] += perfil.tokens_prompt
+            self.contadores['tokens_resposta'] += perfil.tokens_resposta
+
+    def resumo(self):
+        with self._lock:
+            return {
+                **self.contadores,
+                'etapas': {etapa: histograma.resumo() for etapa, histograma in self.histogramas.items()},
+            }
+
+    def prometheus(self, prefixo='rag'):
+        with self._lock:
+            linhas = linhas_histogramas(f'{prefixo}_etapa_segundos', 'Latência de cada etapa da pergunta.',
+                                        self.histogramas)
+            contadores = dict(self.contadores)
+
+        ajudas = {
+            'requisicoes': 'Perguntas respondidas.',
+            'erros': 'Perguntas que terminaram em erro.',
+            'cache_exato': 'Respostas do nível exato do cache.',
+            'cache_semantico': 'Respostas do nível semântico do cache.',
+            'documentos': 'Documentos recuperados.',
+            'tokens_contexto': 'Tokens estimados do contexto enviado ao prompt.',
+            'tokens_economizados': 'Tokens estimados removidos do contexto pela compressão.',
+            'tokens_prompt': 'Tokens enviados ao LLM.',
+            'tokens_resposta': 'Tokens gerados pelo LLM.',
+        }
+        for nome, valor in contadores.items():
+            linhas += [f'# HELP {prefixo}_{nome}_total {ajudas[nome]}', f'# TYPE {prefixo}_{nome}_total counter',
+                       f'{prefixo}_{nome}_total {valor}']
+        return '\n'.join(linhas) + '\n'
+
+
+# Métricas do worker (cada processo do uvicorn/gunicorn tem as suas)
+metricas_rag = MetricasRag()
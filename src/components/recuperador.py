@@ -0,0 +1,226 @@
+import asyncio
+import difflib
+import logging
+import math
+import re
+import unicodedata
+
+from collections import Counter, defaultdict
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+def tokenizar(texto):
+    '''
+    Tokens em minúsculas e sem acentos, usados pelos índices de autores e BM25.
+    '''
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return re.findall(r'\w+', texto)
+
+
+# Últimos tokens de nomes que não identificam um autor sozinhos (sufixos e partículas)
+SUFIXOS_NOME = {'jr', 'junior', 'sr', 'filho', 'neto', 'sobrinho', 'fils', 'pere', 'ii', 'iii', 'iv',
+                'de', 'da', 'do', 'das', 'dos', 'di', 'del', 'della', 'du', 'la', 'le', 'van', 'von', 'der'}
+
+# Sobrenomes menores que isso (iniciais, "Li", "Wu") não bastam para identificar o autor
+MIN_TAMANHO_SOBRENOME = 3
+
+
+def sobrenome(nome):
+    '''
+    Último token do nome normalizado que não é sufixo nem partícula e tem
+    pelo menos `MIN_TAMANHO_SOBRENOME` caracteres ("martin luther king jr" ->
+    "king"), ou None.
+    '''
+    for token in reversed(nome.split(' ')):
+        if token in SUFIXOS_NOME:
+            continue
+        return token if len(token) >= MIN_TAMANHO_SOBRENOME else None
+    return None
+
+
+def _chave(documento):
+    return (documento.metadata.get('author', ''), documento.page_content)
+
+
+class IndiceAutores:
+    '''
+    Índice em memória sobre o metadado `author` dos chunks.
+
+    A busca exata procura o nome completo do autor (normalizado) na pergunta,
+    ou apenas o sobrenome quando ele identifica um único autor (sem sufixos
+    como "Jr." e com pelo menos 3 letras, ver `sobrenome`). A busca
+    aproximada (difflib) cobre erros de digitação no nome.
+    '''
+
+    def __init__(self, documentos, limiar_aproximado=0.85):
+        self.limiar_aproximado = limiar_aproximado
+        self.documentos = defaultdict(list)
+        self.nomes = {}
+        sobrenomes = defaultdict(set)
+
+        for documento in documentos:
+            autor = documento.metadata.get('author', '')
+            if not autor:
+                continue
+            nome = ' '.join(tokenizar(autor))
+            self.nomes[nome] = autor
+            self.documentos[autor].append(documento)
+            chave = sobrenome(nome)
+            if chave:
+                sobrenomes[chave].add(autor)
+
+        self.sobrenomes = {sobrenome: autores.pop() for sobrenome, autores in sobrenomes.items() if len(autores) == 1}
+        self.tamanhos = sorted({len(nome.split(' ')) for nome in self.nomes}, reverse=True)
+
+    def _janelas(self, tokens, tamanho):
+        return (' '.join(tokens[i:i + tamanho]) for i in range(len(tokens) - tamanho + 1))
+
+    def buscar_exato(self, pergunta):
+        tokens = tokenizar(pergunta)
+        encontrados = []
+        for tamanho in self.tamanhos:
+            for janela in self._janelas(tokens, tamanho):
+                autor = self.nomes.get(janela)
+                if autor and autor not in encontrados:
+                    encontrados.append(autor)
+        if not encontrados:
+            encontrados = list(dict.fromkeys(self.sobrenomes[t] for t in tokens if t in self.sobrenomes))
+        return encontrados
+
+    def buscar_aproximado(self, pergunta):
+        tokens = tokenizar(pergunta)
+        encontrados = []
+        for tamanho in self.tamanhos:
+            for janela in self._janelas(tokens, tamanho):
+                for nome in difflib.get_close_matches(janela, self.nomes, n=1, cutoff=self.limiar_aproximado):
+                    if self.nomes[nome] not in encontrados:
+                        encontrados.append(self.nomes[nome])
+        return encontrados
+
+
+class BM25:
+    '''
+    Índice de palavras-chave Okapi BM25 sobre o texto dos chunks.
+    '''
+
+    def __init__(self, documentos, k1=1.5, b=0.75):
+        self.documentos = list(documentos)
+        self.k1 = k1
+        self.b = b
+        self.frequencias = [Counter(tokenizar(documento.page_content)) for documento in self.documentos]
+        self.tamanhos = [sum(frequencia.values()) for frequencia in self.frequencias]
+        self.tamanho_medio = sum(self.tamanhos) / len(self.tamanhos) if self.tamanhos else 0.0
+
+        self.postings = defaultdict(list)
+        for indice, frequencia in enumerate(self.frequencias):
+            for termo, quantidade in frequencia.items():
+                self.postings[termo].append((indice, quantidade))
+
+        total = len(self.documentos)
+        self.idf = {termo: math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5))
+                    for termo, lista in self.postings.items()}
+
+    def pontuar(self, pergunta, candidatos=None):
+        '''
+        Retorna {índice do documento: pontuação}, opcionalmente restrito a `candidatos`.
+        '''
+        pontuacoes = defaultdict(float)
+        for termo in set(tokenizar(pergunta)):
+            idf = self.idf.get(termo)
+            if idf is None:
+                continue
+            for indice, quantidade in self.postings[termo]:
+                if candidatos is not None and indice not in candidatos:
+                    continue
+                normalizacao = self.k1 * (1 - self.b + self.b * self.tamanhos[indice] / self.tamanho_medio)
+                pontuacoes[indice] += idf * quantidade * (self.k1 + 1) / (quantidade + normalizacao)
+        return pontuacoes
+
+    def buscar(self, pergunta, k=10, candidatos=None):
+        pontuacoes = self.pontuar(pergunta, candidatos)
+        melhores = sorted(pontuacoes, key=pontuacoes.get, reverse=True)[:k]
+        return [self.documentos[indice] for indice in melhores]
+
+
+def fundir_rrf(rankings, k=3, constante=60):
+    '''
+    Reciprocal Rank Fusion: soma 1 / (constante + posição) de cada lista.
+    '''
+    pontuacoes = defaultdict(float)
+    documentos = {}
+    for ranking in rankings:
+        for posicao, documento in enumerate(ranking):
+            chave = _chave(documento)
+            pontuacoes[chave] += 1.0 / (constante + posicao + 1)
+            documentos.setdefault(chave, documento)
+    melhores = sorted(pontuacoes, key=pontuacoes.get, reverse=True)[:k]
+    return [documentos[chave] for chave in melhores]
+
+
+class RecuperadorHibrido:
+    '''
+    Recuperação em três etapas:
+
+    1. Nome do autor encontrado de forma exata na pergunta: retorna os chunks
+       desse autor, ordenados por BM25, sem calcular o embedding da consulta.
+    2. Caso contrário, combina por RRF os autores encontrados de forma
+       aproximada, o BM25 sobre todos os chunks e a busca vetorial.
+    '''
+
+    def __init__(self, documentos, vectorstore, k=3, candidatos=10, versao=None):
+        self.vectorstore = vectorstore
+        self.k = k
+        self.candidatos = candidatos
+        self.versao = versao
+        self.autores = IndiceAutores(documentos)
+        self.bm25 = BM25(documentos)
+        self._posicoes = {_chave(documento): indice for indice, documento in enumerate(self.bm25.documentos)}
+        self.estatisticas = {'exatos': 0, 'hibridos': 0}
+
+    @classmethod
+    def do_vectorstore(cls, vectorstore, **kwargs):
+        '''
+        Constrói os índices em memória a partir dos chunks já gravados no índice vetorial.
+        '''
+        dados = vectorstore.get(include=['documents', 'metadatas'])
+        documentos = [Document(page_content=texto, metadata=metadados or {})
+                      for texto, metadados in zip(dados['documents'], dados['metadatas'])]
+        logger.info(f'Índices de autores e BM25 construídos com {len(documentos)} chunks.')
+        return cls(documentos, vectorstore, **kwargs)
+
+    def _por_autor(self, pergunta, autores):
+        posicoes = {self._posicoes[_chave(documento)] for autor in autores for documento in self.autores.documentos[autor]}
+        ordenados = self.bm25.buscar(pergunta, k=self.k, candidatos=posicoes)
+        # Chunks do autor sem nenhum termo da pergunta completam a lista
+        restantes = [self.bm25.documentos[i] for i in sorted(posicoes) if self.bm25.documentos[i] not in ordenados]
+        return (ordenados + restantes)[:self.k]
+
+    def _rankings_lexicos(self, pergunta):
+        aproximados = self.autores.buscar_aproximado(pergunta)
+        rankings = [self.bm25.buscar(pergunta, k=self.candidatos)]
+        if aproximados:
+            rankings.insert(0, self._por_autor(pergunta, aproximados))
+        return rankings
+
+    def invoke(self, pergunta):
+        exatos = self.autores.buscar_exato(pergunta)
+        if exatos:
+            self.estatisticas['exatos'] += 1
+            return self._por_autor(pergunta, exatos)
+
+        self.estatisticas['hibridos'] += 1
+        vetoriais = self.vectorstore.similarity_search(pergunta, k=self.candidatos)
+        return fundir_rrf(self._rankings_lexicos(pergunta) + [vetoriais], k=self.k)
+
+    async def ainvoke(self, pergunta):
+        exatos = self.autores.buscar_exato(pergunta)
+        if exatos:
+            self.estatisticas['exatos'] += 1
+            return self._por_autor(pergunta, exatos)
+
+        self.estatisticas['hibridos'] += 1
+        vetoriais = await asyncio.to_thread(self.vectorstore.similarity_search, pergunta, self.candidatos)
+        return fundir_rrf(self._rankings_lexicos(pergunta) + [vetoriais], k=self.k)
@@ -0,0 +1,25 @@
+import os
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, apenas um processo por diretório
+    fcntl = None
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    '''
+    Trava exclusiva entre processos (flock) sobre `caminho`, usada para que
+    vários workers da API não gravem o mesmo índice ou cache ao mesmo tempo.
+    '''
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho, 'a') as arquivo:
+        if fcntl is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
@@ -0,0 +1,147 @@
+import ast
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional; sem ele apenas o dados.csv pode ser lido
+    pa = None
+
+# Os arquivos colunares são lidos com o mesmo código que os grava (coletor).
+# O src/ entra no fim do caminho para não encobrir o pacote `dash`.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from components.escritor_colunar import FORMATOS, formato_do_arquivo, ler_tabela  # noqa: E402
+
+
+def _converter_tags(valor, cache):
+    '''
+    Converte a string de tags gravada pelo coletor ("['a', 'b']") em tupla,
+    reaproveitando o resultado de strings repetidas.
+    '''
+    if isinstance(valor, (list, tuple)):
+        return tuple(valor)
+    if not isinstance(valor, str):
+        return ()
+    tags = cache.get(valor)
+    if tags is None:
+        try:
+            tags = tuple(tag.strip() for tag in ast.literal_eval(valor) if tag and tag.strip())
+        except (ValueError, SyntaxError):
+            tags = tuple(tag.strip() for tag in valor.strip('[]').replace("'", '').split(',') if tag.strip())
+        cache[valor] = tags
+    return tags
+
+
+def agrupar_por_autor(df):
+    '''
+    Pré-processa o DataFrame de citações uma única vez.
+
+    Retorna {autor: dados}, na ordem em que os autores aparecem no CSV, onde
+    `dados` guarda colunas compactas (tuplas) apenas com as linhas do autor:
+    'citacoes', 'tags' (tupla de tags por citação, já convertidas), 'paginas'
+    e 'frequencias' (contagem de cada tag do autor, da mais frequente para a
+    menos frequente). Assim o callback só percorre as citações do autor.
+    '''
+    cache_tags = {}
+    citacoes = df['citacao'].tolist()
+    tags = [_converter_tags(valor, cache_tags) for valor in df['tags'].tolist()] if 'tags' in df else [()] * len(df)
+    if 'pagina' in df:
+        paginas = [pagina if pd.notna(pagina) else None for pagina in df['pagina'].tolist()]
+    else:
+        paginas = [None] * len(df)
+
+    return _agrupar(df.groupby('autor', sort=False).indices.items(), citacoes, tags, paginas)
+
+
+def _agrupar(grupos, citacoes, tags, paginas):
+    autores = {}
+    for autor, posicoes in grupos:
+        tags_autor = tuple(tags[i] for i in posicoes)
+        frequencias = Counter(tag for tags_citacao in tags_autor for tag in tags_citacao)
+        autores[autor] = {
+            'citacoes': tuple(citacoes[i] for i in posicoes),
+            'tags': tags_autor,
+            'paginas': tuple(paginas[i] for i in posicoes),
+            'frequencias': dict(frequencias.most_common()),
+        }
+    return autores
+
+
+def agrupar_tabela_por_autor(tabela):
+    '''
+    Mesmo resultado de `agrupar_por_autor`, a partir de uma tabela Arrow
+    gravada pelo coletor (Parquet ou Arrow IPC). As tags já são listas e o
+    autor é dictionary-encoded: o agrupamento usa os índices do dicionário,
+    sem comparar strings.
+    '''
+    autores = tabela.column('autor').combine_chunks()
+    if not pa.types.is_dictionary(autores.type):
+        autores = autores.dictionary_encode()
+    nomes = autores.dictionary.to_pylist()
+    indices = autores.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+
+    # Posições de cada autor, com os autores na ordem da primeira citação
+    ordem = np.argsort(indices, kind='stable')
+    valores, inicios = np.unique(indices[ordem], return_index=True)
+    blocos = np.split(ordem, inicios[1:])
+    grupos = sorted(
+        ((nomes[valor], bloco.tolist()) for valor, bloco in zip(valores, blocos) if valor >= 0),
+        key=lambda grupo: grupo[1][0]
+    )
+
+    citacoes = tabela.column('citacao').to_pylist()
+    tags = _tags_compartilhadas(tabela.column('tags').combine_chunks())
+    if 'pagina' in tabela.column_names:
+        paginas = _valores_compartilhados(tabela.column('pagina').combine_chunks())
+    else:
+        paginas = [None] * tabela.num_rows
+    return _agrupar(grupos, citacoes, tags, paginas)
+
+
+def _valores_compartilhados(coluna):
+    # Valores repetidos (páginas, tags) viram um único objeto Python cada
+    if not pa.types.is_dictionary(coluna.type):
+        coluna = coluna.dictionary_encode()
+    valores = coluna.dictionary.to_pylist() + [None]
+    return [valores[i] for i in coluna.indices.fill_null(-1).to_numpy(zero_copy_only=False)]
+
+
+def _tags_compartilhadas(coluna):
+    tags = _valores_compartilhados(coluna.flatten())
+    offsets = (coluna.offsets.to_numpy() - coluna.offsets[0].as_py()).tolist()
+    cache = {}
+    return [cache.setdefault(chave, chave)
+            for chave in (tuple(tags[inicio:fim]) for inicio, fim in zip(offsets, offsets[1:]))]
+
+
+def carregar_dados_autores(caminho):
+    '''
+    Lê o arquivo de citações (CSV, Parquet ou Arrow IPC, pela extensão) e
+    retorna o resultado de `agrupar_por_autor`.
+    '''
+    if formato_do_arquivo(caminho) != 'csv':
+        return agrupar_tabela_por_autor(ler_tabela(caminho))
+    return agrupar_por_autor(pd.read_csv(caminho))
+
+
+def caminho_dados(diretorio='../documents'):
+    '''
+    DADOS_ARQUIVO (ou DADOS_CSV), se definido; senão o arquivo mais recente de
+    `diretorio` entre dados.arrow, dados.parquet e dados.csv, nessa ordem de
+    preferência em caso de empate.
+    '''
+    caminho = os.getenv('DADOS_ARQUIVO') or os.getenv('DADOS_CSV')
+    if caminho:
+        return caminho
+    # O coletor gera o formato colunar a partir do CSV final, logo depois dele.
+    # Um dados.parquet de uma execução antiga não pode esconder um CSV mais novo
+    candidatos = [os.path.join(diretorio, f'dados{FORMATOS[formato]}') for formato in ('arrow', 'parquet')]
+    candidatos.append(os.path.join(diretorio, 'dados.csv'))
+    existentes = [caminho for caminho in candidatos if os.path.exists(caminho)]
+    if not existentes:
+        return candidatos[-1]
+    return max(existentes, key=os.path.getmtime)
@@ -11,6 +11,9 @@ app = dash.Dash(__name__, external_stylesheets=[
     "https://unpkg.com/@mantine/core@7.10.1/styles.css",
 ])
 
+# Imagens da nuvem de tags (ver callbaks.servir_nuvem)
+app.server.add_url_rule('/nuvem-tags/<chave>.png', view_func=servir_nuvem)
+
 # --- Layout do Dashboard ---
 app.layout = dmc.MantineProvider(
     theme={"colorScheme": "light"},
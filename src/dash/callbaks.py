@@ -1,106 +1,139 @@
-import ast
+import os
+from urllib.parse import urlencode
+
 from dash import callback
 import dash_mantine_components as dmc
-import pandas as pd
 from dash.dependencies import Input, Output
-from wordcloud import WordCloud
-import base64
-from io import BytesIO
+from flask import Response, abort, request
+
+from agregados import caminho_dados, carregar_dados_autores
+from nuvem_tags import criar_cache_nuvens
 
-# Carrega os dados do arquivo CSV
+# Carrega os dados (dados.arrow, dados.parquet ou dados.csv) e faz, uma única
+# vez, o pré-processamento: citações, tags já convertidas e frequência das
+# tags agrupadas por autor
+caminho_dados_citacoes = caminho_dados()
 try:
-    df = pd.read_csv('../documents/dados.csv')
+    dados_autores = carregar_dados_autores(caminho_dados_citacoes)
 except FileNotFoundError:
-    print("Erro: O arquivo 'dados.csv' não foi encontrado. Verifique o caminho.")
+    print(f"Erro: O arquivo '{caminho_dados_citacoes}' não foi encontrado. Verifique o caminho.")
     exit()
 
 # Obtém a lista de autores únicos para o seletor
-autores_unicos = df['autor'].unique()
+autores_unicos = list(dados_autores)
+
+# Imagens da nuvem de tags, servidas por URL (/nuvem-tags/<chave>.png?autor=<autor>)
+cache_nuvens = criar_cache_nuvens()
+
+# Número de citações enviadas ao navegador por página da lista
+CITACOES_POR_PAGINA = int(os.getenv('CITACOES_POR_PAGINA', '10'))
 
 # --- Callbacks para interatividade ---
 @callback(
     Output('total-citacoes', 'children'),
     Output('wordcloud-img', 'src'),
-    Output('lista-citacoes', 'children'),
+    Output('paginacao-citacoes', 'total'),
+    Output('paginacao-citacoes', 'value'),
     Input('dropdown-autor', 'value')
 )
 def update_dashboard(selected_autor):
     if not selected_autor:
         return (
             dmc.Text("Nenhum autor selecionado."),
-            {},
-            []
+            "",
+            1,
+            1
         )
 
-    # Filtra o DataFrame pelo autor selecionado
-    df_autor = df[df['autor'] == selected_autor]    
-    
-    # Convertendo a coluna 'tags' de lista para string
-    df_autor['tags'] = df_autor['tags'].apply(ast.literal_eval)
-    df_autor['tags'] = df_autor['tags'].apply(lambda x: ', '.join(x))    
+    dados_autor = dados_autores.get(selected_autor)
+    if dados_autor is None:
+        return (
+            dmc.Text(f"Nenhuma citação encontrada para {selected_autor}."),
+            "",
+            1,
+            1
+        )
 
-    # 1. Total de Citações
-    total_citacoes = len(df_autor)
+    # 1. Total de Citações, a partir dos dados pré-processados
+    total_citacoes = len(dados_autor['citacoes'])
     total_citacoes_text = f"Total de citações de {selected_autor}: {total_citacoes}"
 
-    # 2. Análise de Tags
-    all_tags = ' '.join(df_autor['tags'].dropna().str.replace(',', ' '))
-    #print(all_tags, type(all_tags))
-    tags_count = pd.Series(all_tags).str.strip().value_counts().reset_index()
-    tags_count.columns = ['tag', 'count']
-        
-    if all_tags:
-        wordcloud = WordCloud(
-            width=600,
-            height=150,
-            background_color='white',
-            colormap='viridis',
-            min_font_size=10
-        ).generate(all_tags)
-
-        # Converte a nuvem de palavras em uma imagem codificada em base64
-        img_buffer = BytesIO()
-        wordcloud.to_image().save(img_buffer, format='PNG')
-        encoded_image = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-        image_src = f"data:image/png;base64,{encoded_image}"
-    else:
+    # 2. Nuvem de Tags: apenas a URL; a imagem vem do cache de nuvens
+    image_src = url_nuvem_tags(selected_autor, dados_autor['frequencias'])
+
+    # 3. Paginação da lista: volta para a primeira página a cada troca de autor
+    total_paginas = max(1, -(-total_citacoes // CITACOES_POR_PAGINA))
+
+    return total_citacoes_text, image_src, total_paginas, 1
+
+
+@callback(
+    Output('lista-citacoes', 'children'),
+    Input('dropdown-autor', 'value'),
+    Input('paginacao-citacoes', 'value')
+)
+def update_lista_citacoes(selected_autor, pagina_atual):
+    dados_autor = dados_autores.get(selected_autor) if selected_autor else None
+    if dados_autor is None:
+        return []
+
+    # Lista de Citações e Tags: apenas os componentes da página visível
+    inicio = (max(pagina_atual or 1, 1) - 1) * CITACOES_POR_PAGINA
+    fim = inicio + CITACOES_POR_PAGINA
+    return [
+        card_citacao(citacao, tags, pagina)
+        for citacao, tags, pagina in zip(
+            dados_autor['citacoes'][inicio:fim],
+            dados_autor['tags'][inicio:fim],
+            dados_autor['paginas'][inicio:fim]
+        )
+    ]
+
+
+def url_nuvem_tags(autor, frequencias):
+    if not frequencias:
         # Se não houver tags, retorna uma imagem vazia
-        image_src = ""
-
-    # 3. Lista de Citações e Tags
-    lista_citacoes_ui = []
-    for _, row in df_autor.iterrows():
-        # Transforma a string de tags em uma lista de badges
-        if pd.isna(row['tags']):
-            badges_tags = []
-        else:
-            badges_tags = [
-                dmc.Badge(tag.strip(), variant="light", color="blue", radius="xl")
-                for tag in row['tags'].split(',')
-            ]
-        
-        # Adicionar o link à citação
-        citacao_text_component = dmc.Text(f"“{row['citacao']}”", style={'fontStyle': 'italic'}, size="md", fw=500)
-        
-        # Verifica se o link existe e adiciona o componente de link
-        if 'pagina' in row and pd.notna(row['pagina']):
-            citacao_component = dmc.Anchor(
-                citacao_text_component,
-                href=row['pagina'],
-                target="_blank",  # Abre o link em uma nova aba
-                underline=False # Remove o sublinhado do link
-            )
-        else:
-            citacao_component = citacao_text_component
-        
-        lista_citacoes_ui.append(
-            dmc.Card(
-                children=[
-                    citacao_component,
-                    dmc.Group(badges_tags, gap="xs", mt="sm"),
-                ],
-                withBorder=True, shadow="sm", radius="md", p="sm", style={'marginBottom': '10px'}
-            )
+        return ""
+    return f"/nuvem-tags/{cache_nuvens.chave(autor, frequencias)}.png?{urlencode({'autor': autor})}"
+
+
+def servir_nuvem(chave):
+    # Rota do Flask registrada em app.py. As frequências vêm de dados_autores,
+    # então a URL funciona em qualquer worker, mesmo que outro a tenha gerado
+    autor = request.args.get('autor', '')
+    dados_autor = dados_autores.get(autor)
+    png = cache_nuvens.png(chave, autor, dados_autor['frequencias'] if dados_autor else None)
+    if png is None:
+        abort(404)
+    # A chave muda junto com as tags do autor, então a imagem nunca fica desatualizada
+    return Response(png, mimetype='image/png', headers={'Cache-Control': 'public, max-age=31536000, immutable'})
+
+
+def card_citacao(citacao, tags, pagina):
+    # Transforma as tags da citação em uma lista de badges
+    badges_tags = [
+        dmc.Badge(tag, variant="light", color="blue", radius="xl")
+        for tag in tags
+    ]
+
+    # Adicionar o link à citação
+    citacao_text_component = dmc.Text(f"“{citacao}”", style={'fontStyle': 'italic'}, size="md", fw=500)
+
+    # Verifica se o link existe e adiciona o componente de link
+    if pagina:
+        citacao_component = dmc.Anchor(
+            citacao_text_component,
+            href=pagina,
+            target="_blank",  # Abre o link em uma nova aba
+            underline=False # Remove o sublinhado do link
         )
+    else:
+        citacao_component = citacao_text_component
 
-    return total_citacoes_text, image_src, lista_citacoes_ui
\ No newline at end of file
+    return dmc.Card(
+        children=[
+            citacao_component,
+            dmc.Group(badges_tags, gap="xs", mt="sm"),
+        ],
+        withBorder=True, shadow="sm", radius="md", p="sm", style={'marginBottom': '10px'}
+    )
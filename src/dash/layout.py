@@ -74,6 +74,14 @@ def layout_children():
                                                     dmc.SimpleGrid(
                                                         id='lista-citacoes',
                                                         cols=1, spacing="lg"
+                                                    ),
+                                                    # Paginação no servidor: só a página visível é enviada
+                                                    dmc.Pagination(
+                                                        id='paginacao-citacoes',
+                                                        total=1,
+                                                        value=1,
+                                                        withEdges=True,
+                                                        style={'alignSelf': 'center'}
                                                     )
                                                 ]
                                             )
@@ -0,0 +1,148 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from wordcloud import WordCloud
+
+LARGURA = 600
+ALTURA = 150
+COLORMAP = 'viridis'
+
+
+def renderizar_nuvem(frequencias, largura=LARGURA, altura=ALTURA, colormap=COLORMAP):
+    '''
+    Gera a nuvem de tags a partir de {tag: frequência} e retorna o PNG em bytes.
+    '''
+    wordcloud = WordCloud(
+        width=largura,
+        height=altura,
+        background_color='white',
+        colormap=colormap,
+        min_font_size=10
+    ).generate_from_frequencies(frequencias)
+
+    img_buffer = BytesIO()
+    wordcloud.to_image().save(img_buffer, format='PNG')
+    return img_buffer.getvalue()
+
+
+class CacheNuvens:
+    '''
+    Cache das imagens da nuvem de tags, em memória (LRU com `max_itens`) e,
+    opcionalmente, em disco (`diretorio`, um PNG por chave).
+
+    A chave é o hash de (autor, frequências das tags, tamanho, colormap): se as
+    tags do autor mudarem, a chave (e a URL da imagem) também muda. O callback
+    só calcula a chave; a imagem é renderizada quando o navegador a pede, a
+    partir das frequências que a rota obtém dos dados do autor. Nada depende
+    de estado guardado por quem gerou a URL, então qualquer worker (ou o mesmo,
+    depois de reiniciar) serve a imagem.
+    '''
+
+    def __init__(self, diretorio=None, max_itens=256, largura=LARGURA, altura=ALTURA, colormap=COLORMAP):
+        self.diretorio = diretorio
+        self.max_itens = max_itens
+        self.largura = largura
+        self.altura = altura
+        self.colormap = colormap
+        self.estatisticas = {'memoria': 0, 'disco': 0, 'renderizadas': 0}
+        self._imagens = OrderedDict()
+        self._trava = threading.Lock()
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def chave(self, autor, frequencias):
+        conteudo = json.dumps([autor, sorted(frequencias.items()), self.largura, self.altura, self.colormap])
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f'{chave}.png')
+
+    def _guardar(self, chave, png):
+        with self._trava:
+            self._imagens[chave] = png
+            self._imagens.move_to_end(chave)
+            while len(self._imagens) > self.max_itens:
+                self._imagens.popitem(last=False)
+
+    def png(self, chave, autor=None, frequencias=None):
+        '''
+        PNG da chave: memória, depois disco, depois renderização a partir das
+        frequências do autor. Retorna None se a chave não estiver em cache e
+        não corresponder a (autor, frequências), por exemplo quando as tags
+        do autor mudaram depois que a URL foi gerada.
+        '''
+        with self._trava:
+            png = self._imagens.get(chave)
+            if png is not None:
+                self._imagens.move_to_end(chave)
+                self.estatisticas['memoria'] += 1
+                return png
+
+        if self.diretorio and os.path.exists(self._caminho(chave)):
+            with open(self._caminho(chave), 'rb') as arquivo:
+                png = arquivo.read()
+            with self._trava:
+                self.estatisticas['disco'] += 1
+            self._guardar(chave, png)
+            return png
+
+        if not frequencias or self.chave(autor, frequencias) != chave:
+            return None
+
+        png = renderizar_nuvem(frequencias, self.largura, self.altura, self.colormap)
+        with self._trava:
+            self.estatisticas['renderizadas'] += 1
+        self._guardar(chave, png)
+        if self.diretorio:
+            # Gravação atômica: outro processo nunca lê um PNG pela metade
+            temporario = f'{self._caminho(chave)}.{os.getpid()}.tmp'
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(png)
+            os.replace(temporario, self._caminho(chave))
+        return png
+
+
+def criar_cache_nuvens():
+    return CacheNuvens(
+        diretorio=os.getenv('NUVENS_CACHE_DIR', '../documents/cache_nuvens') or None,
+        max_itens=int(os.getenv('NUVENS_CACHE_MAX_ITENS', '256')),
+    )
+
+
+def aquecer(cache, dados_autores, autores):
+    '''
+    Renderiza (ou confirma em disco) a nuvem de cada autor com tags.
+    '''
+    for autor in autores:
+        frequencias = dados_autores[autor]['frequencias']
+        if frequencias:
+            cache.png(cache.chave(autor, frequencias), autor, frequencias)
+
+
+# Pré-aquecimento offline: renderiza a nuvem de todos os autores no cache em disco
+#
+#   $ cd src/dash/
+#   $ python nuvem_tags.py
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pré-renderiza as nuvens de tags de todos os autores')
+    parser.add_argument('--csv', help='arquivo de citações (padrão: DADOS_CSV ou ../documents/dados.csv)')
+    args = parser.parse_args()
+    if args.csv:
+        os.environ['DADOS_CSV'] = args.csv
+
+    from callbaks import autores_unicos, cache_nuvens, dados_autores
+
+    if not cache_nuvens.diretorio:
+        print('Aviso: NUVENS_CACHE_DIR vazio, as imagens ficam apenas na memória deste processo.')
+
+    inicio = time.perf_counter()
+    aquecer(cache_nuvens, dados_autores, autores_unicos)
+    print(f'{len(autores_unicos)} autores em {time.perf_counter() - inicio:.1f}s '
+          f'({cache_nuvens.estatisticas["renderizadas"]} renderizadas, '
+          f'{cache_nuvens.estatisticas["disco"]} já em disco) -> {cache_nuvens.diretorio}')